@@ -10,6 +10,7 @@ import six
 
 from dragonfly import get_engine, MimicFailure, EngineError
 from dragonfly.loader import CommandModule, CommandModuleDirectory
+from dragonfly.grammar.decode_trace import DecodeTracer
 
 LOG = logging.getLogger("command")
 
@@ -56,7 +57,8 @@ def _load_cmd_modules(args):
     # logged.
     return_code = 0
     for f in files:
-        module_ = CommandModule(f.name)
+        module_ = CommandModule(f.name,
+                                getattr(args, "snapshot_dir", None))
         module_.load()
         if not module_.loaded:
             return_code = 1
@@ -123,6 +125,12 @@ def cli_cmd_test(args):
         if args.no_input:
             return return_code
 
+        # Trace recognition decoding if --trace-decoding was specified.
+        tracer = None
+        if args.trace_decoding > 0:
+            tracer = DecodeTracer()
+            tracer.install()
+
         # Get the number of seconds to delay between each mimic() call
         # (default 0). Log a message if the delay is non-zero.
         delay = args.delay
@@ -154,6 +162,11 @@ def cli_cmd_test(args):
         except KeyboardInterrupt:
             pass
 
+        # Print the hottest rules and elements if decoding was traced.
+        if tracer:
+            tracer.remove()
+            print(tracer.report(args.trace_decoding))
+
     # Return the success of this command.
     return return_code
 
@@ -202,7 +215,8 @@ def cli_cmd_load_directory(args):
             LOG.info("Loading command modules in sub-directories as "
                      "specified (recursive mode).")
         directory = CommandModuleDirectory(args.module_dir,
-                                           recursive=args.recursive)
+                                           recursive=args.recursive,
+                                           snapshot_dir=args.snapshot_dir)
         directory.load()
         return_code = 0 if directory.loaded else 1
 
@@ -333,11 +347,20 @@ def make_arg_parser():
         help="Time in seconds to delay before mimicking each command. This "
         "is useful for testing contexts."
     )
+    trace_decoding_argument = _build_argument(
+        "-t", "--trace-decoding", default=0, type=int, metavar="COUNT",
+        help="Trace the decoding of mimicked commands and afterwards print "
+        "the COUNT rules and elements which took the most time to decode. "
+        "Traced commands are decoded using the generator-based decoder "
+        "instead of the compiled decoder used otherwise, so the times "
+        "show where that decoder spends its time and are higher than "
+        "usual."
+    )
     _add_arguments(
         parser_test,
         cmd_module_files_argument, engine_argument, engine_options_argument,
         language_argument, no_input_argument, delay_argument,
-        log_level_argument, quiet_argument
+        trace_decoding_argument, log_level_argument, quiet_argument
     )
 
     # Define common arguments for the "load" and "load-directory" commands.
@@ -351,6 +374,12 @@ def make_arg_parser():
         "--no-recobs-messages", default=False, action="store_true",
         help="Disable recognition state messages for each spoken phrase."
     )
+    snapshot_dir_argument = _build_argument(
+        "--snapshot-dir", default=None, metavar="DIR",
+        help="Directory in which to save snapshots of the compound specs "
+             "parsed while loading command modules. Snapshots are used "
+             "to load the modules faster next time."
+    )
 
     # Create the parser for the "load" command.
     parser_load = subparsers.add_parser(
@@ -360,7 +389,7 @@ def make_arg_parser():
         parser_load,
         cmd_module_files_argument, engine_argument, engine_options_argument,
         language_argument, no_input_argument, no_recobs_messages_argument,
-        log_level_argument, quiet_argument
+        snapshot_dir_argument, log_level_argument, quiet_argument
     )
 
     # Create the parser for the "load-directory" command.
@@ -381,7 +410,8 @@ def make_arg_parser():
         parser_load_directory,
         module_dir_argument, recursive_argument, engine_argument,
         engine_options_argument, language_argument, no_input_argument,
-        no_recobs_messages_argument, log_level_argument, quiet_argument
+        no_recobs_messages_argument, snapshot_dir_argument,
+        log_level_argument, quiet_argument
     )
 
     # Return the argument parser.
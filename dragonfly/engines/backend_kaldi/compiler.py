@@ -229,7 +229,7 @@ class KaldiCompiler(CompilerBase, KaldiAGCompiler):
     # @trace_compile
     def _compile_sequence(self, element, src_state, dst_state, grammar, kaldi_rule, fst):
         src_state = self.add_weight_linkage(src_state, dst_state, self.get_weight(element), fst)
-        children = element.children
+        children = self._get_sequence_children(element)
         # Optimize for special lengths
         if len(children) == 0:
             fst.add_arc(src_state, dst_state, None)
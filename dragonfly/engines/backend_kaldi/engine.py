@@ -41,6 +41,7 @@ from .audio                     import MicAudio, VADAudio, AudioStore, WavAudio
 from .dictation                 import user_dictation_list, user_dictation_dictlist
 from .recobs                    import KaldiRecObsManager
 from .testing                   import debug_timer
+from dragonfly.grammar.context  import match_cache
 from dragonfly.grammar.state    import State
 from dragonfly.windows          import Window
 
@@ -311,6 +312,8 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
 
     def prepare_for_recognition(self):
         """ Can be called optionally before ``do_recognition()`` to speed up its starting of active recognition. """
+        # Apply any deferred list changes first, so that they are compiled together.
+        self.apply_list_updates()
         try:
             self._compiler.prepare_for_recognition()
         except KaldiError as e:
@@ -525,6 +528,7 @@ class KaldiEngine(EngineBase, DelegateTimerManagerInterface):
                 "title": fg_window.title,
                 "handle": fg_window.handle,
             }
+            match_cache.begin_phrase(**window_info)
             for grammar_wrapper in self._iter_all_grammar_wrappers_dynamically():
                 grammar_wrapper.phrase_start_callback(**window_info)
         self.prepare_for_recognition()
@@ -686,15 +690,14 @@ class GrammarWrapper(GrammarWrapperBase):
 
             state = State(words_rules, rule_names, self.engine)
             state.initialize_decoding()
-            for result in rule.decode(state):
-                if state.finished():
-                    root = state.build_parse_tree()
-                    notify_args = (words, rule, root, recognition)
-                    self.recobs_manager.notify_recognition(*notify_args)
-                    with debug_timer(self.engine._log.debug, "rule execution time"):
-                        rule.process_recognition(root)
-                    self.recobs_manager.notify_post_recognition(*notify_args)
-                    return
+            if rule.decode_complete(state):
+                root = state.build_parse_tree()
+                notify_args = (words, rule, root, recognition)
+                self.recobs_manager.notify_recognition(*notify_args)
+                with debug_timer(self.engine._log.debug, "rule execution time"):
+                    rule.process_recognition(root)
+                self.recobs_manager.notify_post_recognition(*notify_args)
+                return
 
         except Exception as e:
             self.engine._log.error("Grammar %s: exception: %s" % (self.grammar._name, e), exc_info=True)
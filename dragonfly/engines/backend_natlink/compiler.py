@@ -65,7 +65,7 @@ class NatlinkCompiler(CompilerBase):
     # Methods for compiling elements.
 
     def _compile_sequence(self, element, compiler):
-        children = element.children
+        children = self._get_sequence_children(element)
         if len(children) > 1:
             # Compile Sequence and Repetition elements differently.
             is_rep = isinstance(element, elements_.Repetition)
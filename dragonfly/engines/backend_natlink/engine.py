@@ -306,6 +306,26 @@ class NatlinkEngine(EngineBase):
         # Clear grammar wrapper word sets so they get recalculated.
         wrapper.rule_words_map.clear()
 
+    def update_list_delta(self, lst, grammar, added, removed):
+        # Natlink lists can only be emptied and appended to, so only
+        #  additions can be made incrementally.
+        if removed:
+            self.update_list(lst, grammar)
+            return
+
+        wrapper = self._get_grammar_wrapper(grammar)
+        if not wrapper:
+            return
+        grammar_object = wrapper.grammar_object
+
+        # Append the added items.
+        n = lst.name
+        f = grammar_object.appendList
+        [f(n, word) for word in added]
+
+        # Clear grammar wrapper word sets so they get recalculated.
+        wrapper.rule_words_map.clear()
+
     #-----------------------------------------------------------------------
     # Miscellaneous methods.
 
@@ -456,6 +476,7 @@ class GrammarWrapper(GrammarWrapperBase):
     def begin_callback(self, module_info):
         executable, title, handle = tuple(map_word(word)
                                           for word in module_info)
+        self.engine.apply_list_updates()
         self.grammar.process_begin(executable, title, handle)
 
     def _process_rules(self, words, words_rules, results,
@@ -482,24 +503,23 @@ class GrammarWrapper(GrammarWrapperBase):
                 s = state_.State(words_rules2, self.grammar._rule_names,
                                  self.engine)
             s.initialize_decoding()
-            for result in r.decode(s):
-                if s.finished():
-                    self._retain_audio(words, results, r.name)
-                    root = s.build_parse_tree()
-
-                    # Notify observers using the manager *before*
-                    # processing.
-                    notify_args = (words, r, root, results)
-                    self.recobs_manager.notify_recognition(*notify_args)
-
-                    r.process_recognition(root)
-
-                    # Notify observers using the manager *after*
-                    # processing.
-                    self.recobs_manager.notify_post_recognition(
-                        *notify_args
-                    )
-                    return True
+            if r.decode_complete(s):
+                self._retain_audio(words, results, r.name)
+                root = s.build_parse_tree()
+
+                # Notify observers using the manager *before*
+                # processing.
+                notify_args = (words, r, root, results)
+                self.recobs_manager.notify_recognition(*notify_args)
+
+                r.process_recognition(root)
+
+                # Notify observers using the manager *after*
+                # processing.
+                self.recobs_manager.notify_post_recognition(
+                    *notify_args
+                )
+                return True
 
         return False
 
@@ -136,10 +136,11 @@ class Sapi5Compiler(CompilerBase):
 
     @trace_compile
     def _compile_sequence(self, element, src_state, dst_state, grammar, grammar_handle):
-        states = [src_state.Rule.AddState() for i in range(len(element.children)-1)]
+        children = self._get_sequence_children(element)
+        states = [src_state.Rule.AddState() for i in range(len(children)-1)]
         states.insert(0, src_state)
         states.append(dst_state)
-        for i, child in enumerate(element.children):
+        for i, child in enumerate(children):
             s1 = states[i]
             s2 = states[i + 1]
             self.compile_element(child, s1, s2, grammar, grammar_handle)
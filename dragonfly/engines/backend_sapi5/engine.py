@@ -210,6 +210,24 @@ class Sapi5SharedEngine(EngineBase, DelegateTimerManagerInterface):
 
         grammar_handle.Rules.Commit()
 
+    def update_list_delta(self, lst, grammar, added, removed):
+        # Transitions can't be removed from a rule state individually, so
+        #  only additions can be made incrementally.
+        if removed:
+            self.update_list(lst, grammar)
+            return
+
+        grammar_handle = self._get_grammar_wrapper(grammar).handle
+        list_rule_name = "__list_%s" % lst.name
+        rule_handle = grammar_handle.Rules.FindRule(list_rule_name)
+
+        src_state = rule_handle.InitialState
+        dst_state = None
+        for item in added:
+            src_state.AddWordTransition(dst_state, item)
+
+        grammar_handle.Rules.Commit()
+
     def set_exclusiveness(self, grammar, exclusive):
         self._log.debug("Setting exclusiveness of grammar %s to %s."
                         % (grammar.name, exclusive))
@@ -505,6 +523,7 @@ class GrammarWrapper(GrammarWrapperBase):
             c.OnFalseRecognition = self.recognition_failure_callback
 
     def phrase_start_callback(self, stream_number, stream_position):
+        self.engine.apply_list_updates()
         window = Window.get_foreground()
         self.grammar.process_begin(window.executable, window.title,
                                    window.handle)
@@ -631,18 +650,17 @@ class GrammarWrapper(GrammarWrapperBase):
                     continue
 
                 s.initialize_decoding()
-                for result in r.decode(s):
-                    if s.finished():
-                        # Notify recognition observers, then process the
-                        # rule.
-                        root = s.build_parse_tree()
-                        notify_args = (words, r, root, newResult)
-                        self.recobs_manager.notify_recognition(*notify_args)
-                        r.process_recognition(root)
-                        self.recobs_manager.notify_post_recognition(
-                            *notify_args
-                        )
-                        return
+                if r.decode_complete(s):
+                    # Notify recognition observers, then process the
+                    # rule.
+                    root = s.build_parse_tree()
+                    notify_args = (words, r, root, newResult)
+                    self.recobs_manager.notify_recognition(*notify_args)
+                    r.process_recognition(root)
+                    self.recobs_manager.notify_post_recognition(
+                        *notify_args
+                    )
+                    return
 
         except Exception as e:
             Sapi5Engine._log.error("Grammar %s: exception: %s"
@@ -151,7 +151,7 @@ class JSGFCompiler(CompilerBase):
     def _compile_repetition(self, element, *args, **kwargs):
         # Compile the first element only; pyjsgf doesn't support limits on
         # repetition (yet).
-        children = element.children
+        children = self._get_sequence_children(element)
         if len(children) > 1:
             self._log.debug("Ignoring limits of repetition element %s."
                             % element)
@@ -254,7 +254,7 @@ class SphinxJSGFCompiler(JSGFCompiler):
     def _compile_repetition(self, element, *args, **kwargs):
         # Compile the first element only; pyjsgf doesn't support limits on
         # repetition (yet).
-        children = element.children
+        children = self._get_sequence_children(element)
         if len(children) > 1:
             self._log.debug("Ignoring limits of repetition element %s."
                             % element)
@@ -32,6 +32,7 @@ from jsgf import RootGrammar, PublicRule, Literal
 from sphinxwrapper import PocketSphinx
 
 from dragonfly import Window
+from dragonfly.grammar.context import match_cache
 from ..base import (EngineBase, EngineError, MimicFailure,
                     DelegateTimerManagerInterface,
                     DictationContainerBase)
@@ -638,8 +639,10 @@ class SphinxEngine(EngineBase, DelegateTimerManagerInterface):
             "handle": fg_window.handle,
         }
 
-        # Call process_begin for all grammars so that any out of context
-        # grammar will not be used.
+        # Apply deferred list changes, then call process_begin for all
+        # grammars so that any out of context grammar will not be used.
+        self.apply_list_updates()
+        match_cache.begin_phrase(**window_info)
         for wrapper in self._grammar_wrappers.copy().values():
             wrapper.process_begin(**window_info)
 
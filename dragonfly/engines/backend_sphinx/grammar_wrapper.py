@@ -182,29 +182,28 @@ class GrammarWrapper(GrammarWrapperBase):
             if not (r.active and r.exported):
                 continue
             s.initialize_decoding()
-            for _ in r.decode(s):
-                if s.finished():
-                    # Build the parse tree used to process this rule.
-                    root = s.build_parse_tree()
-
-                    # Notify observers using the manager *before*
-                    # processing.
-                    notify_args = (words, r, root, results_obj)
-                    self.recobs_manager.notify_recognition(
-                        *notify_args
-                    )
-
-                    # Process the rule if not in training mode.
-                    if not self.engine.training_session_active:
-                        try:
-                            r.process_recognition(root)
-                            self.recobs_manager.notify_post_recognition(
-                                *notify_args
-                            )
-                        except Exception as e:
-                            self._log.exception("Failed to process rule "
-                                                "'%s': %s" % (r.name, e))
-                    return True
+            if r.decode_complete(s):
+                # Build the parse tree used to process this rule.
+                root = s.build_parse_tree()
+
+                # Notify observers using the manager *before*
+                # processing.
+                notify_args = (words, r, root, results_obj)
+                self.recobs_manager.notify_recognition(
+                    *notify_args
+                )
+
+                # Process the rule if not in training mode.
+                if not self.engine.training_session_active:
+                    try:
+                        r.process_recognition(root)
+                        self.recobs_manager.notify_post_recognition(
+                            *notify_args
+                        )
+                    except Exception as e:
+                        self._log.exception("Failed to process rule "
+                                            "'%s': %s" % (r.name, e))
+                return True
 
         self._log.debug("Grammar %s: failed to decode recognition %r."
                         % (self.grammar.name, words))
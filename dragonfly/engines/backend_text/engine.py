@@ -27,6 +27,8 @@ from six import string_types, binary_type
 
 import dragonfly.grammar.state as state_
 from dragonfly import Window
+from dragonfly.grammar.context import match_cache
+from dragonfly.grammar.list import ListBase
 
 from .recobs import TextRecobsManager
 from ..base import (EngineBase, MimicFailure, ThreadedTimerManager,
@@ -49,6 +51,10 @@ class TextInputEngine(EngineBase):
     _name = "text"
     DictationContainer = DictationContainerBase
 
+    # Maximum number of matches of each rule to examine while looking for
+    #  the decodings returned by mimic() with *n_best*.
+    n_best_max_steps = 10000
+
     # -----------------------------------------------------------------------
 
     def __init__(self):
@@ -58,12 +64,24 @@ class TextInputEngine(EngineBase):
         self._recognition_observer_manager = TextRecobsManager(self)
         self._timer_manager = ThreadedTimerManager(0.02, self)
 
+        # Index of active rules by the lowercase words with which their
+        #  recognitions can begin.  Each word maps to a dictionary of
+        #  grammar wrapper keys and sets of rules.  Rules which can begin
+        #  with any word are stored under None.  Indexed rules are also
+        #  stored by the lists they reference.
+        self._rule_index = {}
+        self._indexed_rules = {}
+        self._list_rules = {}
+
     def connect(self):
         self._connected = True
 
     def disconnect(self):
-        # Clear grammar wrappers on disconnect()
+        # Clear grammar wrappers and the rule index on disconnect()
         self._grammar_wrappers.clear()
+        self._rule_index.clear()
+        self._indexed_rules.clear()
+        self._list_rules.clear()
         self._connected = False
 
     # -----------------------------------------------------------------------
@@ -94,8 +112,10 @@ class TextInputEngine(EngineBase):
         return self._build_grammar_wrapper(grammar)
 
     def _unload_grammar(self, grammar, wrapper):
-        # No engine-specific unloading required.
-        pass
+        # Remove the grammar's rules from the rule index.
+        for key, rule in list(self._indexed_rules):
+            if key == id(grammar):
+                self._unindex_rule(rule, grammar)
 
     def activate_grammar(self, grammar):
         # No engine-specific grammar activation required.
@@ -106,16 +126,46 @@ class TextInputEngine(EngineBase):
         pass
 
     def activate_rule(self, rule, grammar):
-        # No engine-specific rule activation required.
-        pass
+        self._index_rule(rule, grammar)
 
     def deactivate_rule(self, rule, grammar):
-        # No engine-specific rule deactivation required.
-        pass
+        self._unindex_rule(rule, grammar)
 
     def update_list(self, lst, grammar):
-        # No engine-specific list update is required.
-        pass
+        # Re-index active rules referencing the list, because their first
+        #  words may have changed.  These rules may be in other grammars.
+        for key, rule in list(self._list_rules.get(id(lst), ())):
+            self._index_rule(rule, self._grammar_wrappers[key].grammar)
+
+    def update_list_delta(self, lst, grammar, added, removed):
+        # Removed items may remove first words, which requires re-indexing
+        #  the rules referencing the list.
+        if removed:
+            self.update_list(lst, grammar)
+            return
+
+        # Otherwise, index these rules under the words of the added items
+        #  as well.  This is conservative: rules which reference the list
+        #  after their first words are tried, but fail to decode.
+        words = set()
+        for item in added:
+            item = item.lower()
+            index = item.find(" ")
+            while index != -1:
+                words.add(item[:index])
+                index = item.find(" ", index + 1)
+            words.add(item)
+        for key, rule in self._list_rules.get(id(lst), ()):
+            indexed_words, list_keys = self._indexed_rules[(key, rule)]
+            if indexed_words == (None,):
+                continue
+            new_words = words.difference(indexed_words)
+            for word in new_words:
+                rules = self._rule_index.setdefault(word, {})
+                rules.setdefault(key, set()).add(rule)
+            self._indexed_rules[(key, rule)] = (
+                tuple(indexed_words) + tuple(new_words), list_keys
+            )
 
     def set_exclusiveness(self, grammar, exclusive):
         wrapper = self._get_grammar_wrapper(grammar)
@@ -124,6 +174,56 @@ class TextInputEngine(EngineBase):
 
         wrapper.exclusive = exclusive
 
+    # -----------------------------------------------------------------------
+    # Methods for dispatching recognitions to rules.
+
+    def _index_rule(self, rule, grammar):
+        # Add the rule to the index under each of its first words and
+        #  under each list it references.
+        key = id(grammar)
+        self._unindex_rule(rule, grammar)
+        words, _ = rule.first_words()
+        if words is None:
+            words = (None,)
+        for word in words:
+            rules = self._rule_index.setdefault(word, {}).setdefault(key,
+                                                                     set())
+            rules.add(rule)
+        list_keys = set(id(dependency) for dependency in
+                        rule.dependencies(set())
+                        if isinstance(dependency, ListBase))
+        for list_key in list_keys:
+            self._list_rules.setdefault(list_key, set()).add((key, rule))
+        self._indexed_rules[(key, rule)] = (words, list_keys)
+
+    def _unindex_rule(self, rule, grammar):
+        key = id(grammar)
+        words, list_keys = self._indexed_rules.pop((key, rule), ((), ()))
+        for word in words:
+            grammar_rules = self._rule_index[word]
+            rules = grammar_rules[key]
+            rules.discard(rule)
+            if not rules:
+                del grammar_rules[key]
+            if not grammar_rules:
+                del self._rule_index[word]
+        for list_key in list_keys:
+            rules = self._list_rules[list_key]
+            rules.discard((key, rule))
+            if not rules:
+                del self._list_rules[list_key]
+
+    def _get_candidate_rules(self, word):
+        """
+        Returns a dictionary mapping grammar wrapper keys to the sets of
+        active rules whose recognitions can begin with the given word.
+        """
+        candidates = {}
+        for index_word in (word.lower(), None):
+            for key, rules in self._rule_index.get(index_word, {}).items():
+                candidates.setdefault(key, set()).update(rules)
+        return candidates
+
     # -----------------------------------------------------------------------
     # Miscellaneous methods.
 
@@ -166,12 +266,20 @@ class TextInputEngine(EngineBase):
         except KeyboardInterrupt:
             pass
 
-    def mimic(self, words, **kwargs):
+    def mimic(self, words, n_best=None, **kwargs):
         """
         Mimic a recognition of the given *words*.
 
         :param words: words to mimic
         :type words: str|iter
+        :param n_best: if given, the maximum number of complete decodings
+            of the words by active rules to return. The recognition is
+            processed as usual regardless.
+        :type n_best: int
+        :returns: if *n_best* is given, a list of up to *n_best*
+            *(rule, root node)* 2-tuples in the order in which rules are
+            tried. The first decoding is the one processed. Several
+            decodings indicate that the words are ambiguous.
         :Keyword Arguments:
 
            optional *executable*, *title* and/or *handle* keyword arguments
@@ -213,8 +321,13 @@ class TextInputEngine(EngineBase):
         # Allows optional passing of window attributes to mimic
         process_args.update(kwargs)
 
-        # Call process_begin() for each grammar wrapper. Use a copy of
-        # _grammar_wrappers in case it changes.
+        # Apply deferred list changes, then call process_begin() for each
+        # grammar wrapper. Use a copy of _grammar_wrappers in case it
+        # changes.
+        self.apply_list_updates()
+        match_cache.begin_phrase(process_args["executable"],
+                                 process_args["title"],
+                                 process_args["handle"])
         for wrapper in self._grammar_wrappers.copy().values():
             wrapper.process_begin(**process_args)
 
@@ -227,17 +340,41 @@ class TextInputEngine(EngineBase):
             if wrapper.exclusive:
                 exclusive_count += 1
 
-        # Call process_words() for each grammar wrapper, stopping early if
-        # processing occurred.
-        processing_occurred = False
+        # Look up the active rules which can begin with the first word.
+        candidates = self._get_candidate_rules(words_rules[0][0])
+
+        # Determine which grammar wrappers to process.
+        targets = []
         for wrapper in grammar_wrappers:
             # Skip non-exclusive grammars if there are one or more exclusive
             # grammars.
             if exclusive_count > 0 and not wrapper.exclusive:
                 continue
 
-            # Process the grammar.
-            processing_occurred = wrapper.process_words(words_rules)
+            # Skip grammars without candidate rules, unless they need to
+            # receive all recognitions.
+            rules = candidates.get(id(wrapper.grammar), ())
+            func = getattr(wrapper.grammar, "process_recognition", None)
+            if not (rules or func):
+                continue
+            targets.append((wrapper, rules))
+
+        # Collect up to *n_best* decodings before processing, if requested.
+        decodings = []
+        if n_best:
+            for wrapper, rules in targets:
+                if len(decodings) >= n_best:
+                    break
+                decodings.extend(wrapper.decode_words(
+                    words_rules, rules, n_best - len(decodings),
+                    self.n_best_max_steps
+                ))
+
+        # Call process_words() for each grammar wrapper, stopping early if
+        # processing occurred.
+        processing_occurred = False
+        for wrapper, rules in targets:
+            processing_occurred = wrapper.process_words(words_rules, rules)
             if processing_occurred:
                 break
 
@@ -247,6 +384,10 @@ class TextInputEngine(EngineBase):
             raise MimicFailure("No matching rule found for words %r."
                                % (words,))
 
+        # Return the decodings if requested.
+        if n_best:
+            return decodings
+
     def speak(self, text):
         self._log.warning("text-to-speech is not implemented for this "
                           "engine.")
@@ -287,7 +428,34 @@ class GrammarWrapper(GrammarWrapperBase):
     def process_begin(self, executable, title, handle):
         self.grammar.process_begin(executable, title, handle)
 
-    def process_words(self, words):
+    def decode_words(self, words_rules, rules=None, limit=None,
+                     max_steps=None):
+        """
+        Return a list of up to *limit* complete decodings of the given
+        *words_rules* by this grammar's active rules as *(rule, root node)*
+        2-tuples. If the *rules* argument is given, only rules in it are
+        decoded. The *max_steps* argument is passed to
+        :meth:`Rule.decode_complete_all` for each rule.
+        """
+        decodings = []
+        if not (self.grammar.enabled and self.grammar.active_rules):
+            return decodings
+
+        s = state_.State(words_rules, self.grammar.rule_names, self.engine)
+        for r in self.grammar.rules:
+            if limit is not None and len(decodings) >= limit:
+                break
+            if not (r.active and r.exported):
+                continue
+            if rules is not None and r not in rules:
+                continue
+            s.initialize_decoding()
+            remaining = None if limit is None else limit - len(decodings)
+            for _ in r.decode_complete_all(s, remaining, max_steps):
+                decodings.append((r, s.build_parse_tree()))
+        return decodings
+
+    def process_words(self, words, rules=None):
         # Return early if the grammar is disabled or if there are no active
         # rules.
         if not (self.grammar.enabled and self.grammar.active_rules):
@@ -326,32 +494,34 @@ class GrammarWrapper(GrammarWrapperBase):
         # Iterate through this grammar's rules, attempting to decode each.
         # If successful, call that rule's method for processing the
         # recognition and return.
+        # If the *rules* argument was given, only rules in it are decoded.
         s = state_.State(words_rules, self.grammar.rule_names, self.engine)
         for r in self.grammar.rules:
             if not (r.active and r.exported):
                 continue
+            if rules is not None and r not in rules:
+                continue
             s.initialize_decoding()
-            for _ in r.decode(s):
-                if s.finished():
-                    try:
-                        root = s.build_parse_tree()
-
-                        # Notify observers using the manager *before*
-                        # processing.
-                        notify_args = (words, r, root, results_obj)
-                        self.recobs_manager.notify_recognition(
-                            *notify_args
-                        )
-
-                        r.process_recognition(root)
-
-                        self.recobs_manager.notify_post_recognition(
-                            *notify_args
-                        )
-                    except Exception as e:
-                        self._log.exception("Failed to process rule "
-                                            "'%s': %s" % (r.name, e))
-                    return True
+            if r.decode_complete(s):
+                try:
+                    root = s.build_parse_tree()
+
+                    # Notify observers using the manager *before*
+                    # processing.
+                    notify_args = (words, r, root, results_obj)
+                    self.recobs_manager.notify_recognition(
+                        *notify_args
+                    )
+
+                    r.process_recognition(root)
+
+                    self.recobs_manager.notify_post_recognition(
+                        *notify_args
+                    )
+                except Exception as e:
+                    self._log.exception("Failed to process rule "
+                                        "'%s': %s" % (r.name, e))
+                return True
 
         self._log.debug("Grammar %s: failed to decode recognition %r."
                         % (self.grammar.name, words))
@@ -77,6 +77,33 @@ class CompilerBase(object):
                                   " for element type %s."
                                   % (self, element))
 
+    def _get_sequence_children(self, element):
+        """
+            Returns the children of the given sequence element for
+            compilation.
+
+            :class:`Repetition` elements only have their repeated child
+            element as a child.  For these, the children of the
+            equivalent expanded sequence are returned instead: the child
+            element *min* times followed by nested optional sequences
+            for the remaining repetitions.
+
+        """
+        if not isinstance(element, elements_.Repetition):
+            return element.children
+
+        child = element.children[0]
+        children = [child] * element.min
+        optional_length = element.max - element.min - 1
+        if optional_length > 0:
+            optional = elements_.Optional(child)
+            for _ in range(optional_length - 1):
+                optional = elements_.Optional(
+                    elements_.Sequence([child, optional])
+                )
+            children.append(optional)
+        return tuple(children)
+
     #-----------------------------------------------------------------------
 
     def _compile_unknown_element(self, element, *args, **kwargs):
@@ -25,9 +25,13 @@ EngineBase class
 """
 
 import logging
+import threading
+from collections import OrderedDict
+
 from .timer import Timer
 
 import dragonfly.engines
+from dragonfly.grammar.context import match_cache
 
 
 #---------------------------------------------------------------------------
@@ -62,6 +66,28 @@ class EngineBase(object):
     _name = "base"
     _timer_manager = None
 
+    #: Whether grammars skip matching contexts and updating the active
+    #: state of their rules at the start of a phrase if the foreground
+    #: window and the enabled, context and active states of all grammars
+    #: and rules are unchanged since the previous phrase.  The
+    #: :meth:`Grammar._process_begin` and :meth:`Rule._process_begin`
+    #: callbacks of active grammars and rules are still called.  This
+    #: should only be enabled if all contexts depend only on the
+    #: foreground window's executable, title and handle.
+    skip_unchanged_window = False
+
+    #: Whether changes to Dragonfly lists are applied to the engine
+    #: later, together, instead of when the lists are modified.  The
+    #: changes made to each list since the last update are then applied
+    #: at once, at the start of the next phrase or after
+    #: :attr:`list_update_delay` seconds, whichever is first.  They can
+    #: also be applied using :meth:`apply_list_updates`.
+    defer_list_updates = False
+
+    #: Number of seconds after which deferred list changes are applied,
+    #: or *None* to apply them only at the start of phrases.
+    list_update_delay = 0.05
+
     #-----------------------------------------------------------------------
 
     def __init__(self):
@@ -71,6 +97,12 @@ class EngineBase(object):
         self._grammar_wrappers = {}
         self._recognition_observer_manager = None
 
+        # Lists with deferred changes, by identity, and the timer started
+        #  to apply them.
+        self._pending_lists = OrderedDict()
+        self._pending_lists_lock = threading.Lock()
+        self._list_update_timer = None
+
 #    def __del__(self):
 #        try:
 #            try:
@@ -158,6 +190,58 @@ class EngineBase(object):
         raise NotImplementedError("Virtual method not implemented for"
                                   " engine %s." % self)
 
+    def update_list_delta(self, lst, grammar, added, removed):
+        """
+            Update a list given the items *added* to and *removed* from it
+            since its last update.
+
+            Engines which can change their lists incrementally should
+            override this method.  By default, the whole list is updated
+            using :meth:`update_list`.
+        """
+        self.update_list(lst, grammar)
+
+    def schedule_list_update(self, lst):
+        """
+            Schedule the engine update for changes to the given list.
+
+            **Internal:** this method is normally *not* called directly
+            by the user, but instead automatically when a list is
+            modified while :attr:`defer_list_updates` is enabled.
+        """
+        with self._pending_lists_lock:
+            self._pending_lists[id(lst)] = lst
+            if (self._list_update_timer is None and
+                    self.list_update_delay is not None):
+                self._list_update_timer = self.create_timer(
+                    self.apply_list_updates, self.list_update_delay,
+                    repeating=False
+                )
+
+    def apply_list_updates(self):
+        """
+            Apply the deferred changes to Dragonfly lists.
+
+            Engines call this method at the start of each phrase.  The
+            changes made to several lists are applied in the order in
+            which the lists were first modified.
+        """
+        # The timer, if any, is left to expire, so that it is not stopped
+        #  from another thread.
+        with self._pending_lists_lock:
+            if not self._pending_lists:
+                return
+            lists = list(self._pending_lists.values())
+            self._pending_lists.clear()
+            self._list_update_timer = None
+        for lst in lists:
+            # pylint: disable=protected-access
+            try:
+                lst._notify_grammar()
+            except Exception as e:
+                self._log.exception("Failed to update list %s: %s"
+                                    % (lst.name, e))
+
     def activate_grammar(self, grammar):
         raise NotImplementedError("Virtual method not implemented for"
                                   " engine %s." % self)
@@ -293,6 +377,9 @@ class EngineBase(object):
         if window is None:
             from dragonfly.windows.window import Window
             window = Window.get_foreground()
+        self.apply_list_updates()
+        match_cache.begin_phrase(window.executable, window.title,
+                                 window.handle)
         for grammar in self.grammars:
             # Prevent 'notify_begin()' from being called.
             if grammar.name == "_recobs_grammar":
@@ -0,0 +1,36 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+
+"""
+Helper functions shared by the grammar modules.
+"""
+
+
+def method_function(method):
+    """
+        Returns the plain function of a method.
+
+        On Python 2, methods looked up on classes are unbound methods
+        which compare unequal even if they wrap the same function.  This
+        is used to check whether a class overrides a method.
+
+    """
+    return getattr(method, "__func__", method)
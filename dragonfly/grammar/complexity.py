@@ -0,0 +1,244 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Grammar complexity metrics
+============================================================================
+
+This module computes metrics of the size and complexity of grammars and
+rules.  They are returned by :meth:`Grammar.get_complexity` and
+summarized by :meth:`Grammar.get_complexity_string`, and can be used to
+keep grammars within a size budget, e.g. in tests::
+
+    complexity = grammar.get_complexity()
+    assert complexity.elements < 5000
+    assert complexity.paths < 10 ** 9
+
+The number of paths is the number of distinct ways in which a rule's
+elements can match, e.g. 6 for ``"(a | b | c) [d]"``.  Each list item
+counts as one path.  The number is infinite for rules which contain
+:class:`Dictation` elements or reference themselves.
+
+The branching factor is the average number of choices at each point
+where the elements of a rule offer a choice, i.e. at each
+:class:`Alternative`, :class:`Optional`, :class:`Repetition` and
+:class:`ListRef` element.
+
+"""
+
+from collections import namedtuple
+
+from .elements_basic import (Sequence, Optional, Alternative, Repetition,
+                             RuleRef, ListRef, Dictation, Impossible)
+
+
+#---------------------------------------------------------------------------
+
+RuleComplexity = namedtuple("RuleComplexity", "rule elements"
+                            " distinct_elements depth choice_points"
+                            " branching_factor paths")
+RuleComplexity.__doc__ = """
+    Complexity metrics of a single rule.
+
+    The *elements* is the number of nodes in the rule's element tree and
+    *distinct_elements* the number of distinct element objects, which
+    is lower if elements are shared.  The *depth* is the depth of the
+    element tree.  Referenced rules are not included in these numbers,
+    but are included in the rule's *paths*.
+
+"""
+
+GrammarComplexity = namedtuple("GrammarComplexity", "grammar rules"
+                               " elements distinct_elements choice_points"
+                               " branching_factor paths")
+GrammarComplexity.__doc__ = """
+    Complexity metrics of a grammar.
+
+    The *rules* is a tuple of a :class:`RuleComplexity` for each of the
+    grammar's rules.  The *paths* is the total number of paths of the
+    grammar's exported rules.  The other numbers are totals over all of
+    the grammar's rules.
+
+"""
+
+
+#---------------------------------------------------------------------------
+
+class _ComplexityCounter(object):
+    # Computes metrics, sharing the number of paths of each element and
+    #  rule between the rules of a grammar.
+
+    def __init__(self):
+        self._paths = {}
+        self._rule_paths = {}
+
+    def rule_complexity(self, rule):
+        element = rule.element
+        if element is None:
+            return RuleComplexity(rule, 0, 0, 0, 0, 1.0, 0)
+        elements, depth, distinct = _count_elements(element)
+        choice_points, choices = _count_choices(distinct)
+        return RuleComplexity(rule, elements, len(distinct), depth,
+                              choice_points,
+                              _branching_factor(choice_points, choices),
+                              self.rule_paths(rule))
+
+    def rule_paths(self, rule):
+        if rule in self._rule_paths:
+            return self._rule_paths[rule]
+
+        # Mark the rule as infinite while counting, in case it references
+        #  itself.
+        self._rule_paths[rule] = float("inf")
+        if rule.element is None:
+            paths = 0
+        else:
+            paths = self.paths(rule.element)
+        self._rule_paths[rule] = paths
+        return paths
+
+    def paths(self, element):
+        paths = self._paths.get(id(element))
+        if paths is None:
+            paths = self._paths[id(element)] = self._get_paths(element)
+        return paths
+
+    def _get_paths(self, element):
+        # pylint: disable=too-many-return-statements
+        if isinstance(element, Repetition):
+            child = self.paths(element.children[0])
+            if child == float("inf"):
+                return child
+            return sum(child ** count
+                       for count in range(element.min, element.max))
+        elif isinstance(element, Sequence):
+            return self._product(element.children)
+        elif isinstance(element, Optional):
+            return self.paths(element.children[0]) + 1
+        elif isinstance(element, Alternative):
+            return sum(self.paths(child) for child in element.children)
+        elif isinstance(element, RuleRef):
+            return self.rule_paths(element.rule)
+        elif isinstance(element, ListRef):
+            return len(element.list)
+        elif isinstance(element, Dictation):
+            return float("inf")
+        elif isinstance(element, Impossible):
+            return 0
+        else:
+            return self._product(element.children)
+
+    def _product(self, children):
+        # Return the product of the numbers of paths of the given
+        #  children.  Children without paths make the product 0, even if
+        #  others have infinite paths.
+        paths = 1
+        for child in children:
+            child_paths = self.paths(child)
+            if not child_paths:
+                return 0
+            paths *= child_paths
+        return paths
+
+
+def _count_elements(element):
+    # Return the number of nodes and the depth of the element tree,
+    #  and its distinct elements by identity.
+    nodes = 0
+    depth = 0
+    distinct = {}
+    stack = [(element, 1)]
+    while stack:
+        element, level = stack.pop()
+        nodes += 1
+        depth = max(depth, level)
+        distinct[id(element)] = element
+        stack.extend((child, level + 1) for child in element.children)
+    return nodes, depth, distinct
+
+
+def _count_choices(distinct):
+    # Return the number of choice points and the total number of
+    #  choices among the given elements.
+    choice_points = choices = 0
+    for element in distinct.values():
+        if isinstance(element, Repetition):
+            count = element.max - element.min
+        elif isinstance(element, Sequence):
+            continue
+        elif isinstance(element, Optional):
+            count = 2
+        elif isinstance(element, Alternative):
+            count = len(element.children)
+        elif isinstance(element, ListRef):
+            count = len(element.list)
+        else:
+            continue
+        if count > 1:
+            choice_points += 1
+            choices += count
+    return choice_points, choices
+
+
+def _branching_factor(choice_points, choices):
+    if not choice_points:
+        return 1.0
+    return float(choices) / choice_points
+
+
+#---------------------------------------------------------------------------
+
+def get_rule_complexity(rule):
+    """ Returns a :class:`RuleComplexity` for the given *rule*. """
+    return _ComplexityCounter().rule_complexity(rule)
+
+
+def get_grammar_complexity(grammar):
+    """ Returns a :class:`GrammarComplexity` for the given *grammar*. """
+    counter = _ComplexityCounter()
+    rules = tuple(counter.rule_complexity(rule) for rule in grammar.rules)
+    distinct = {}
+    for rule in grammar.rules:
+        if rule.element is not None:
+            distinct.update(_count_elements(rule.element)[2])
+    choice_points, choices = _count_choices(distinct)
+    paths = sum(r.paths for r in rules if r.rule.exported)
+    return GrammarComplexity(grammar, tuple(rules),
+                             sum(r.elements for r in rules), len(distinct),
+                             choice_points,
+                             _branching_factor(choice_points, choices),
+                             paths)
+
+
+def format_paths(paths):
+    """ Returns a short string for a number of paths. """
+    if paths == float("inf"):
+        return "inf"
+    elif paths < 10 ** 6:
+        return "%d" % paths
+
+    # Round to three significant digits without converting to a float,
+    #  which would overflow for very large numbers of paths.
+    exponent = len(str(paths)) - 1
+    leading = (paths + 5 * 10 ** (exponent - 3)) // 10 ** (exponent - 2)
+    if leading >= 1000:
+        leading //= 10
+        exponent += 1
+    return "%d.%02de+%02d" % (leading // 100, leading % 100, exponent)
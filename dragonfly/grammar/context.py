@@ -79,6 +79,22 @@ keyword arguments to the constructor::
    AppContext(cls=["jetbrains-studio", "jetbrains-pycharm-ce"])
 
 
+Match results cache
+----------------------------------------------------------------------------
+
+Grammars and rules evaluate their contexts at the start of each phrase
+through the :data:`match_cache`, which remembers the result of each
+context until the next phrase begins.  A context used by many grammars
+and rules, or within several logical combinations, is therefore only
+evaluated once per phrase.  :class:`AppContext` objects created with
+the same arguments share their results, as do logical combinations of
+such contexts.  Results of other contexts are only shared by the same
+context object.  Contexts themselves are only equal to the same object.
+
+Calling a context's :meth:`Context.matches` method directly always
+evaluates it.
+
+
 
 Class reference
 ----------------------------------------------------------------------------
@@ -88,12 +104,37 @@ Class reference
 import copy
 import inspect
 import logging
+import weakref
 
 
 # --------------------------------------------------------------------------
 from six import string_types
 
 
+class _MatchToken(object):
+    # Object identifying contexts with the same match key.  Tokens hash
+    #  and compare by identity, which is cheaper than using the keys.
+    __slots__ = ("__weakref__",)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+# Tokens of the match keys of existing contexts.  Each token is only kept
+#  while contexts refer to it.
+_match_tokens = weakref.WeakValueDictionary()
+
+
+def _get_match_token(key):
+    token = _match_tokens.get(key)
+    if token is None:
+        token = _match_tokens.setdefault(key, _MatchToken())
+    return token
+
+
 class Context(object):
     """
         Base class for other context classes.
@@ -130,6 +171,35 @@ class Context(object):
     def copy(self):
         return copy.deepcopy(self)
 
+    # ----------------------------------------------------------------------
+    # Methods for the match results cache.
+
+    def _match_key(self):
+        """
+            Returns a hashable key which is equal for contexts that
+            always match in the same windows, or *None* if this context
+            only shares cached match results with itself.
+
+            This method can be overloaded by derived classes whose
+            matching depends only on their constructor arguments.
+
+        """
+        # pylint: disable=no-self-use
+        return None
+
+    def _get_match_token(self):
+        # Return the token shared by all contexts with the same match
+        #  key, or None if this context only shares results with itself.
+        #  It is looked up once, because keys can be expensive to hash.
+        try:
+            return self._match_token
+        except AttributeError:
+            key = self._match_key()
+            if key is not None:
+                key = _get_match_token(key)
+            self._match_token = key
+            return key
+
     # ----------------------------------------------------------------------
     # Logical operations.
 
@@ -171,6 +241,26 @@ class Context(object):
 # --------------------------------------------------------------------------
 # Wrapper contexts for combining contexts in logical structures.
 
+def _child_matches(child, executable, title, handle):
+    # Evaluate a child context, using the match cache through which the
+    #  parent context is being evaluated, if any.
+    # pylint: disable=protected-access
+    cache = ContextMatchCache._evaluating
+    if cache is not None:
+        return cache.matches(child, executable, title, handle)
+    return child.matches(executable, title, handle)
+
+
+def _children_key(context, children):
+    # Return a match key for a logical combination of the given contexts,
+    #  or None if any of them only shares results with itself.
+    # pylint: disable=protected-access
+    tokens = tuple(child._get_match_token() for child in children)
+    if None in tokens:
+        return None
+    return (type(context), tokens)
+
+
 class LogicAndContext(Context):
 
     def __init__(self, *children):
@@ -178,9 +268,12 @@ class LogicAndContext(Context):
         self._children = children
         self._str = ", ".join(str(child) for child in children)
 
+    def _match_key(self):
+        return _children_key(self, self._children)
+
     def matches(self, executable, title, handle):
         for child in self._children:
-            if not child.matches(executable, title, handle):
+            if not _child_matches(child, executable, title, handle):
                 return False
         return True
 
@@ -192,9 +285,12 @@ class LogicOrContext(Context):
         self._children = children
         self._str = ", ".join(str(child) for child in children)
 
+    def _match_key(self):
+        return _children_key(self, self._children)
+
     def matches(self, executable, title, handle):
         for child in self._children:
-            if child.matches(executable, title, handle):
+            if _child_matches(child, executable, title, handle):
                 return True
         return False
 
@@ -206,12 +302,96 @@ class LogicNotContext(Context):
         self._child = child
         self._str = str(child)
 
+    def _match_key(self):
+        return _children_key(self, (self._child,))
+
     def matches(self, executable, title, handle):
-        return not self._child.matches(executable, title, handle)
+        return not _child_matches(self._child, executable, title, handle)
 
 
 # --------------------------------------------------------------------------
 
+class _PatternSet(object):
+    # Lowercase patterns of an application context which are registered
+    #  with the pattern matcher.  They are only searched for while
+    #  contexts refer to this object, which copies of a context share.
+    __slots__ = ("patterns", "__weakref__")
+
+    def __init__(self, patterns):
+        self.patterns = frozenset(patterns)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class _PatternMatcher(object):
+    # Finds which of the executable and title patterns of application
+    #  contexts occur in a string.  This is a substring search for each
+    #  distinct pattern, not a single pass over the string, but each
+    #  pattern is searched for once per string however many contexts
+    #  use it.  The results for recent strings are kept, because each
+    #  phrase begins with the same executable and title being matched by
+    #  many contexts.
+
+    max_results = 8
+
+    def __init__(self):
+        self._sets = {}
+        self._removed = []
+        self._patterns = frozenset()
+        self._results = {}
+
+    def add(self, patterns):
+        # Register lowercase patterns, returning the pattern set which
+        #  keeps them registered.
+        pattern_set = _PatternSet(patterns)
+        reference = weakref.ref(pattern_set, self._removed.append)
+        self._sets[reference] = pattern_set.patterns
+        if not self._patterns.issuperset(pattern_set.patterns):
+            self._patterns = self._patterns.union(pattern_set.patterns)
+            self._results = {}
+        return pattern_set
+
+    def _purge(self):
+        # Stop searching for the patterns of discarded pattern sets.
+        #  This is deferred from the weak reference callbacks, which may
+        #  be called at any time.
+        while self._removed:
+            self._sets.pop(self._removed.pop(), None)
+        patterns = frozenset().union(*self._sets.values())
+        if patterns != self._patterns:
+            self._patterns = patterns
+            self._results = {}
+
+    def find(self, string):
+        # Return the set of registered patterns which occur in the given
+        #  string, ignoring case.
+        if self._removed:
+            self._purge()
+        results = self._results
+        found = results.get(string)
+        if found is None:
+            lower = string.lower()
+            found = frozenset(pattern for pattern in self._patterns
+                              if pattern in lower)
+            if len(results) >= self.max_results:
+                results.clear()
+            results[string] = found
+        return found
+
+
+_pattern_matcher = _PatternMatcher()
+
+
+def _tuple_or_none(values):
+    if values is None:
+        return None
+    return tuple(values)
+
+
 class AppContext(Context):
     """
         Context class using foreground application details.
@@ -281,30 +461,47 @@ class AppContext(Context):
             new_kwargs[key] = values
 
         self._exclude = bool(exclude)
+        self._patterns = _pattern_matcher.add((self._executable or [])
+                                              + (self._title or []))
         self._str = "%s, %s, %s" % (self._executable, self._title,
                                     self._exclude)
         self._kwargs = new_kwargs
         if self._kwargs:
             self._str += ", %s" % self._kwargs
 
+        # Contexts created with the same arguments share their cached
+        #  results, unless a derived class matches differently.
+        self._key = None
+        matches_class = next(cls for cls in type(self).__mro__
+                             if "matches" in vars(cls))
+        if matches_class is AppContext:
+            key = (AppContext, _tuple_or_none(self._executable),
+                   _tuple_or_none(self._title), self._exclude,
+                   tuple(sorted((name, _tuple_or_none(values))
+                                for name, values in new_kwargs.items())))
+            try:
+                hash(key)
+                self._key = key
+            except TypeError:
+                pass
+
+    def _match_key(self):
+        return self._key
+
     # ----------------------------------------------------------------------
     # Matching methods.
 
     def matches(self, executable, title, handle):
         # pylint: disable=too-many-branches
         # Suppress warnings about too many if-else branches.
-        if isinstance(executable, string_types):
-            executable = executable.lower()
-        if isinstance(title, string_types):
-            title = title.lower()
 
+        # The executable and title patterns of all application contexts
+        #  are searched for at once by the pattern matcher.
         if self._executable:
             found = False
             if isinstance(executable, string_types):
-                for match in self._executable:
-                    if executable.find(match) != -1:
-                        found = True
-                        break
+                found = not _pattern_matcher.find(executable).isdisjoint(
+                    self._executable)
             if self._exclude == found:
                 self._log_match.debug("%s: No match, executable doesn't "
                                       "match.", self)
@@ -313,10 +510,8 @@ class AppContext(Context):
         if self._title:
             found = False
             if isinstance(title, string_types):
-                for match in self._title:
-                    if title.find(match) != -1:
-                        found = True
-                        break
+                found = not _pattern_matcher.find(title).isdisjoint(
+                    self._title)
             if self._exclude == found:
                 self._log_match.debug("%s: No match, title doesn't match.",
                                       self)
@@ -417,3 +612,80 @@ class FuncContext(Context):
                                 self._function.__name__)
             # Fallback to matching
             return True
+
+
+# --------------------------------------------------------------------------
+
+class ContextMatchCache(object):
+    """
+        Cache of context match results for the current phrase.
+
+        Grammars and rules evaluate their contexts through the
+        :data:`match_cache` instance of this class.  The cached results
+        are discarded when the foreground window changes, when
+        :meth:`begin_phrase` is called, or when a grammar begins a phrase
+        for the second time, which means that a new phrase has begun.
+
+    """
+
+    # The cache through which contexts are currently being evaluated.
+    _evaluating = None
+
+    def __init__(self):
+        self.enabled = True
+        self._window = None
+        self._grammars = set()
+        self._results = {}
+
+    def begin_phrase(self, executable, title, handle):
+        """
+            Discard cached results because a new phrase has begun in the
+            given foreground window.
+
+            Engines which notify all grammars at once of the start of a
+            phrase call this method first.
+
+        """
+        self._window = (executable, title, handle)
+        self._grammars = set()
+        self._results = {}
+
+    def begin_grammar(self, grammar, executable, title, handle):
+        """
+            Called when the given *grammar* is notified of the start of
+            a phrase in the given foreground window.
+        """
+        if ((executable, title, handle) != self._window
+                or id(grammar) in self._grammars):
+            self.begin_phrase(executable, title, handle)
+        self._grammars.add(id(grammar))
+
+    def matches(self, context, executable, title, handle):
+        """
+            Returns whether the given *context* matches, evaluating it
+            only if neither it nor a context with the same match key was
+            evaluated for the current phrase.
+        """
+        if (not self.enabled
+                or (executable, title, handle) != self._window):
+            return context.matches(executable, title, handle)
+
+        # Contexts with the same match key share their results.
+        # pylint: disable=protected-access
+        key = context._get_match_token()
+        if key is None:
+            key = context
+        result = self._results.get(key)
+        if result is None:
+            evaluating = ContextMatchCache._evaluating
+            ContextMatchCache._evaluating = self
+            try:
+                result = bool(context.matches(executable, title, handle))
+            finally:
+                ContextMatchCache._evaluating = evaluating
+            self._results[key] = result
+        return result
+
+
+#: The :class:`ContextMatchCache` used by grammars and rules.
+match_cache = ContextMatchCache()
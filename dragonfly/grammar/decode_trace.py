@@ -0,0 +1,259 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Recognition decoding tracer
+============================================================================
+
+This module implements the :class:`DecodeTracer` class, which collects
+statistics about recognition decoding.  It can be used to find out which
+rules and elements cost the most time to decode::
+
+    tracer = DecodeTracer()
+    tracer.install()
+    engine.mimic("some words")
+    tracer.remove()
+    print(tracer.report())
+
+Decoding is only traced for recognitions which begin while a tracer is
+installed.  Traced recognitions are decoded by the generator-based
+:meth:`decode` methods of rules and elements instead of by the compiled
+decoder, which doesn't report individual decoding steps.  The statistics
+therefore describe the generator-based decoder.  Elements which are
+expensive there are usually also expensive when compiled, but the times
+are higher than without tracing.
+
+The *test* command of the command-line interface can also report
+decoding statistics for mimicked input using the *--trace-decoding*
+option.
+
+"""
+
+from collections import namedtuple
+from timeit      import default_timer
+
+from .state      import State
+from .rule_base  import Rule
+
+
+#---------------------------------------------------------------------------
+
+DecodeEvent = namedtuple("DecodeEvent", "event element depth index time")
+DecodeEvent.__doc__ = """
+    A single recognition decoding step.
+
+    The *event* is one of "attempt", "retry", "rollback", "success" or
+    "failure".  The *depth* and *index* are the decoding depth and word
+    index of the decoding state after the step.  The *time* is the value
+    of :func:`timeit.default_timer` when the step happened.
+
+"""
+
+
+class DecodeStats(object):
+    """
+        Decoding statistics of a single rule or element.
+
+        The *time* is the total time in seconds spent decoding the
+        element, including the time spent decoding its children.
+
+    """
+
+    __slots__ = ("element", "rule", "attempts", "retries", "successes",
+                 "failures", "time")
+
+    def __init__(self, element, rule):
+        self.element = element
+        self.rule = rule
+        self.attempts = 0
+        self.retries = 0
+        self.successes = 0
+        self.failures = 0
+        self.time = 0.0
+
+    def __repr__(self):
+        return ("%s(%s, attempts=%d, failures=%d, time=%.6f)"
+                % (self.__class__.__name__, self.element, self.attempts,
+                   self.failures, self.time))
+
+
+#---------------------------------------------------------------------------
+
+class DecodeTracer(object):
+    """
+        Tracer which collects statistics about recognition decoding.
+
+        Constructor argument:
+         - *record_events* (*bool*, default: *False*) --
+           whether to keep a list of all :class:`DecodeEvent` objects in
+           the :attr:`events` attribute
+
+        Derived classes can override the :meth:`on_event` method to
+        process decoding events as they happen.
+
+    """
+
+    def __init__(self, record_events=False):
+        self._record_events = record_events
+        self.events = []
+        self._stats = {}
+        self._starts = {}
+        self._rules = []
+
+    #-----------------------------------------------------------------------
+    # Methods for controlling tracing.
+
+    def install(self):
+        """ Trace the decoding of recognitions which begin from now on. """
+        State.tracer = self
+
+    def remove(self):
+        """ Stop tracing the decoding of recognitions. """
+        if State.tracer is self:
+            State.tracer = None
+
+    def reset(self):
+        """ Discard all collected statistics and events. """
+        self.events = []
+        self._stats = {}
+        self._starts = {}
+        self._rules = []
+
+    #-----------------------------------------------------------------------
+    # Methods for collecting statistics.
+
+    def trace_step(self, state, element, event):
+        """
+            Record a single decoding step.
+
+            This method is called by :class:`State` objects for each step
+            of decoding *element*.
+
+        """
+        now = default_timer()
+        stats = self._stats.get(id(element))
+        if stats is None:
+            if self._rules: rule = self._rules[-1]
+            else:           rule = None
+            stats = DecodeStats(element, rule)
+            self._stats[id(element)] = stats
+
+        # Time is measured from each attempt or retry of an element to
+        #  its following success or failure.
+        if event == "attempt" or event == "retry":
+            if event == "attempt": stats.attempts += 1
+            else:                  stats.retries += 1
+            self._starts.setdefault(id(element), []).append(now)
+            if isinstance(element, Rule):
+                self._rules.append(element)
+        elif event == "success" or event == "failure":
+            if event == "success": stats.successes += 1
+            else:                  stats.failures += 1
+            starts = self._starts.get(id(element))
+            if starts:
+                stats.time += now - starts.pop()
+            if isinstance(element, Rule) and self._rules:
+                self._rules.pop()
+
+        # pylint: disable=protected-access
+        self.on_event(DecodeEvent(event, element, state._depth,
+                                  state._index, now))
+
+    def on_event(self, event):
+        """
+            Called for each :class:`DecodeEvent` after statistics have
+            been updated.
+
+            By default, this method records the event if the
+            *record_events* constructor argument was *True*.
+
+        """
+        if self._record_events:
+            self.events.append(event)
+
+    #-----------------------------------------------------------------------
+    # Methods for retrieving statistics.
+
+    @property
+    def stats(self):
+        """ List of the :class:`DecodeStats` of each traced element. """
+        return list(self._stats.values())
+
+    def hottest_rules(self, count=10, key="time"):
+        """
+            Returns the :class:`DecodeStats` of the *count* rules with
+            the highest value of the given *key* attribute, e.g. "time",
+            "attempts" or "failures".
+
+        """
+        stats = [s for s in self._stats.values()
+                 if isinstance(s.element, Rule)]
+        return self._hottest(stats, count, key)
+
+    def hottest_elements(self, count=10, key="time"):
+        """
+            Returns the :class:`DecodeStats` of the *count* elements
+            (excluding rules) with the highest value of the given *key*
+            attribute, e.g. "time", "attempts" or "failures".
+
+        """
+        stats = [s for s in self._stats.values()
+                 if not isinstance(s.element, Rule)]
+        return self._hottest(stats, count, key)
+
+    @staticmethod
+    def _hottest(stats, count, key):
+        stats.sort(key=lambda s: getattr(s, key), reverse=True)
+        return stats[:count]
+
+    def report(self, count=10, key="time"):
+        """
+            Returns a formatted multi-line string listing the hottest
+            rules and elements.
+
+        """
+        header = "%10s %10s %10s  %s" % ("time (ms)", "attempts",
+                                         "failures", "%s")
+        lines = ["Statistics of generator-based decoding; compiled"
+                 " decoding was disabled while tracing.", "",
+                 "Hottest rules:", header % "rule"]
+        for stats in self.hottest_rules(count, key):
+            lines.append(self._format_stats(stats, stats.element))
+        lines.extend(["", "Hottest elements:", header % "element (rule)"])
+        for stats in self.hottest_elements(count, key):
+            if stats.rule is None:
+                description = "%s" % stats.element
+            else:
+                description = "%s (%s)" % (stats.element,
+                                           self._rule_name(stats.rule))
+            lines.append(self._format_stats(stats, description))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _rule_name(rule):
+        if rule.grammar is not None:
+            return "%s: %s" % (rule.grammar.name, rule.name)
+        return rule.name
+
+    def _format_stats(self, stats, description):
+        if isinstance(description, Rule):
+            description = self._rule_name(description)
+        return "%10.3f %10d %10d  %s" % (stats.time * 1000, stats.attempts,
+                                         stats.failures, description)
@@ -0,0 +1,535 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Compiled recognition decoder
+============================================================================
+
+This module implements an alternative to the generator-based decoding
+performed by the :meth:`decode` methods of rules and elements.
+
+A rule's element tree is compiled once into a graph of simple
+instructions.  These are then executed by a single loop which keeps an
+explicit stack of choice points instead of a chain of nested generators.
+The order in which decoding possibilities are explored is the same as
+that of the generator-based decoding, so the first complete parse found,
+and therefore the resulting parse tree, is also the same.
+
+Elements whose classes override the :meth:`decode` method are compiled
+into instructions which call that method, so custom element classes
+continue to work as before.
+
+"""
+
+import itertools
+
+from ._util           import method_function
+from .state           import State
+from .rule_base       import Rule
+from .elements_basic  import (Sequence, Optional, Alternative, Repetition,
+                              Literal, RuleRef, ListRef, Empty, Dictation,
+                              Impossible)
+
+
+#---------------------------------------------------------------------------
+# Instruction operation codes.
+
+_RULE        = 0
+_SEQUENCE    = 1
+_ALTERNATIVE = 2
+_OPTIONAL    = 3
+_LITERAL     = 4
+_RULE_REF    = 5
+_LIST_REF    = 6
+_EMPTY       = 7
+_DICTATION   = 8
+_IMPOSSIBLE  = 9
+_REPETITION  = 10
+_REPEAT      = 11
+_GENERATOR   = 12
+
+# Choice point kinds.
+_CHOICE_CONTINUE    = 0
+_CHOICE_ALTERNATIVE = 1
+_CHOICE_SPAN        = 2
+_CHOICE_GENERATOR   = 3
+_CHOICE_FAILURE     = 4
+
+
+# Operation codes for each of the generator-based decode methods which
+#  have a compiled equivalent.
+_decode_operations = [
+    (method_function(Rule.decode),        _RULE),
+    (method_function(Sequence.decode),    _SEQUENCE),
+    (method_function(Alternative.decode), _ALTERNATIVE),
+    (method_function(Optional.decode),    _OPTIONAL),
+    (method_function(Repetition.decode),  _REPETITION),
+    (method_function(Literal.decode),     _LITERAL),
+    (method_function(RuleRef.decode),     _RULE_REF),
+    (method_function(ListRef.decode),     _LIST_REF),
+    (method_function(Empty.decode),       _EMPTY),
+    (method_function(Dictation.decode),   _DICTATION),
+    (method_function(Impossible.decode),  _IMPOSSIBLE),
+]
+
+
+#---------------------------------------------------------------------------
+
+class Instruction(object):
+    """
+        Compiled form of a single rule or element.
+
+        The *actor* is the rule or element for which parse tree frames
+        are recorded.  The *children* are the instructions of the
+        actor's child elements or referenced rule.  The *data* attribute
+        holds operation specific information.
+
+    """
+
+    __slots__ = ("op", "actor", "children", "data")
+
+    def __init__(self, op, actor):
+        self.op = op
+        self.actor = actor
+        self.children = ()
+        self.data = None
+
+    def __repr__(self):
+        return "%s(%d, %r)" % (self.__class__.__name__, self.op,
+                               self.actor)
+
+
+#---------------------------------------------------------------------------
+
+class CompiledDecoder(object):
+    """
+        Decoder for recognitions of a single rule.
+
+        Constructor argument:
+         - *rule* (*Rule*) -- the rule to compile
+
+        The rule's element tree is compiled by the constructor.  List
+        contents are looked up during decoding, so list modifications do
+        not require recompilation.
+
+    """
+
+    def __init__(self, rule):
+        self._rule = rule
+        self._instructions = {}
+        self._root = self._compile(rule)
+
+        # Compute the lookahead tables of alternatives now instead of
+        #  during the first decoding.
+        for instruction in self._instructions.values():
+            if instruction.op == _ALTERNATIVE:
+                self._lookahead_table(instruction)
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self._rule)
+
+    rule = property(lambda self: self._rule,
+                    doc="The rule compiled by this decoder.  (Read-only)")
+
+    instruction_count = property(lambda self: len(self._instructions),
+                                 doc="The number of compiled"
+                                     " instructions.  (Read-only)")
+
+    #-----------------------------------------------------------------------
+    # Methods for compiling element trees.
+
+    def _compile(self, actor):
+        # Reuse instructions of shared elements and rules.  This also
+        #  prevents infinite recursion for recursive rule references.
+        instruction = self._instructions.get(id(actor))
+        if instruction is not None:
+            return instruction
+
+        decode_function = method_function(type(actor).decode)
+        for function, op in _decode_operations:
+            if decode_function is function:
+                break
+        else:
+            op = _GENERATOR
+
+        instruction = Instruction(op, actor)
+        self._instructions[id(actor)] = instruction
+
+        # pylint: disable=protected-access
+        if op == _RULE:
+            instruction.children = (self._compile(actor.element),)
+        elif op in (_SEQUENCE, _ALTERNATIVE):
+            instruction.children = tuple(self._compile(child)
+                                         for child in actor._children)
+        elif op == _OPTIONAL:
+            instruction.children = (self._compile(actor._child),)
+            instruction.data = actor._greedy
+        elif op == _LITERAL:
+            instruction.data = ([word.lower() for word in actor._words],
+                                [word.lower() for word in actor._words_ext])
+        elif op == _RULE_REF:
+            instruction.children = (self._compile(actor.rule),)
+        elif op == _REPETITION:
+            instruction.data = self._compile_repetition(actor)
+        return instruction
+
+    def _compile_repetition(self, actor):
+        # Compile one step instruction for each number of repetitions
+        #  already decoded.  A step's data holds whether the next
+        #  repetition is required and the step which follows it; the
+        #  final step only has the null match.  Returns the first step.
+        # pylint: disable=protected-access
+        children = (self._compile(actor._child),)
+        step = Instruction(_REPEAT, actor)
+        step.data = (False, None)
+        for count in range(actor._max - 2, -1, -1):
+            previous = Instruction(_REPEAT, actor)
+            previous.children = children
+            previous.data = (count < actor._min, step)
+            step = previous
+        return step
+
+    #-----------------------------------------------------------------------
+    # Methods for decoding recognitions.
+
+    def decode(self, state):
+        """
+            Decode the recognition stored in the given *state*.
+
+            Returns *True* if the rule matched the complete recognition,
+            in which case the decoding stack of *state* describes the
+            parse tree and :meth:`State.build_parse_tree` can be called.
+            Returns *False* otherwise.
+
+        """
+        for _ in self.decode_all(state):
+            return True
+        return False
+
+    def decode_all(self, state, max_steps=None):
+        """
+            Iterate through the complete decodings of the recognition
+            stored in the given *state*.
+
+            Yields *state* each time the rule matched the complete
+            recognition, in which case the decoding stack of *state*
+            describes the parse tree until iteration continues.  The
+            decodings are yielded in the order in which generator-based
+            decoding would find them.
+
+            If *max_steps* is not *None*, decoding stops after the rule
+            has matched that many times, whether or not all of the
+            recognized words were consumed and whether or not all
+            decodings have been found.  Generator-based decoding counts
+            steps in the same way.
+
+        """
+        # pylint: disable=protected-access,too-many-locals
+        # pylint: disable=too-many-branches,too-many-statements
+        results = state._results
+        length = len(results)
+        frames = state._stack
+        base_depth = state._depth
+        index = state._index
+        Frame = State.Frame
+
+        # Lowercase the recognized words once for all literal elements.
+        words = [result[0] for result in results]
+        lowered = [word.lower() if word else word for word in words]
+        if state.engine.quoted_words_support:
+            literal_data = 1
+        else:
+            literal_data = 0
+
+        # Elements which fail to decode at a given index are remembered in
+        #  the state's failure memo.  A failure choice point is pushed when
+        #  entering such an element; if it is popped while the element's
+        #  frame has no end index, then all ways of decoding the element
+        #  have been exhausted without success.
+        failures = state._failures
+        memoize = state.memoize_failures
+
+        # The continuation is a linked list of the tasks which remain to
+        #  be done for the current decoding path.  Each link is a tuple
+        #  of (instruction, depth, next) for entering an instruction or
+        #  of (None, frame, next) for finishing an entered element.
+        continuation = (self._root, base_depth + 1, None)
+        choices = []
+
+        while True:
+            # Execute tasks until the current path fails.
+            while True:
+                if continuation is None:
+                    # The rule has been decoded; accept it only if all
+                    #  words were consumed.  Look for further decodings
+                    #  afterwards.
+                    if index >= length:
+                        state._index = index
+                        state._depth = base_depth
+                        yield state
+                    if max_steps is not None:
+                        max_steps -= 1
+                        if max_steps <= 0:
+                            choices = ()
+                    break
+
+                instruction, depth, continuation = continuation
+                if instruction is None:
+                    depth.end = index
+                    continue
+
+                op = instruction.op
+                if op == _LITERAL:
+                    literal_words = instruction.data[literal_data]
+                    count = len(literal_words)
+                    if count == 1:
+                        if (index >= length
+                                or lowered[index] != literal_words[0]):
+                            break
+                    elif lowered[index:index + count] != literal_words:
+                        break
+                    frame = Frame(depth, instruction.actor, index)
+                    index += count
+                    frame.end = index
+                    frames.append(frame)
+
+                elif op <= _ALTERNATIVE or op == _RULE_REF:
+                    actor = instruction.actor
+                    if memoize and (actor, index) in failures:
+                        break
+                    children = instruction.children
+                    if op == _ALTERNATIVE and children:
+                        # Only try the children which can begin with the
+                        #  next word.
+                        table = self._lookahead_table(instruction)
+                        if index < length:
+                            children = table[0].get(lowered[index],
+                                                    table[1])
+                        else:
+                            children = table[2]
+                        if not children:
+                            break
+
+                    frame = Frame(depth, actor, index)
+                    frames.append(frame)
+                    if memoize:
+                        choices.append((_CHOICE_FAILURE, index, frame))
+                    continuation = (None, frame, continuation)
+                    depth += 1
+
+                    if op == _SEQUENCE:
+                        for child in reversed(children):
+                            continuation = (child, depth, continuation)
+                    elif op == _ALTERNATIVE:
+                        if len(children) > 1:
+                            choices.append((_CHOICE_ALTERNATIVE, index,
+                                            len(frames), continuation,
+                                            children, 1, depth))
+                        if children:
+                            continuation = (children[0], depth,
+                                            continuation)
+                    else:
+                        continuation = (children[0], depth, continuation)
+
+                elif op == _OPTIONAL:
+                    frame = Frame(depth, instruction.actor, index)
+                    frames.append(frame)
+                    continuation = (None, frame, continuation)
+                    child = instruction.children[0]
+                    if index < length:
+                        word = lowered[index]
+                    else:
+                        word = None
+                    # Only try the child if it can begin with the next
+                    #  word.  Otherwise, only the null match is possible.
+                    # pylint: disable=protected-access
+                    if child.actor._may_begin_with(word):
+                        child = (child, depth + 1, continuation)
+                        if instruction.data:
+                            # Greedy: try the child, then the null match.
+                            choices.append((_CHOICE_CONTINUE, index,
+                                            len(frames), continuation))
+                            continuation = child
+                        else:
+                            choices.append((_CHOICE_CONTINUE, index,
+                                            len(frames), child))
+
+                elif op == _REPETITION:
+                    actor = instruction.actor
+                    if memoize and (actor, index) in failures:
+                        break
+                    frame = Frame(depth, actor, index)
+                    frames.append(frame)
+                    if memoize:
+                        choices.append((_CHOICE_FAILURE, index, frame))
+                    continuation = (instruction.data, depth + 1,
+                                    (None, frame, continuation))
+
+                elif op == _REPEAT:
+                    required, step = instruction.data
+                    if step is None:
+                        # Maximum number of repetitions decoded.
+                        continue
+                    child = instruction.children[0]
+                    repetition = (child, depth, (step, depth, continuation))
+                    if required:
+                        continuation = repetition
+                        continue
+                    if index < length:
+                        word = lowered[index]
+                    else:
+                        word = None
+                    # Greedy: try another repetition if the child can
+                    #  begin with the next word, then the null match.
+                    # pylint: disable=protected-access
+                    if child.actor._may_begin_with(word):
+                        choices.append((_CHOICE_CONTINUE, index,
+                                        len(frames), continuation))
+                        continuation = repetition
+
+                elif op == _LIST_REF:
+                    actor = instruction.actor
+                    if memoize and (actor, index) in failures:
+                        break
+                    ends = self._list_ref_ends(actor, words, index)
+                    if not ends:
+                        state.memoize_failure(actor, index)
+                        break
+                    frame = Frame(depth, instruction.actor, index)
+                    frames.append(frame)
+                    if len(ends) > 1:
+                        choices.append((_CHOICE_SPAN, index, len(frames),
+                                        continuation, frame, ends, 1))
+                    index = frame.end = ends[0]
+
+                elif op == _DICTATION:
+                    state._index = index
+                    if state.rule() != "dgndictation":
+                        break
+                    count = 1
+                    while state.rule(count) == "dgndictation":
+                        count += 1
+                    ends = list(range(index + count, index, -1))
+                    frame = Frame(depth, instruction.actor, index)
+                    frames.append(frame)
+                    if len(ends) > 1:
+                        choices.append((_CHOICE_SPAN, index, len(frames),
+                                        continuation, frame, ends, 1))
+                    index = frame.end = ends[0]
+
+                elif op == _EMPTY:
+                    frame = Frame(depth, instruction.actor, index)
+                    frame.end = index
+                    frames.append(frame)
+
+                elif op == _IMPOSSIBLE:
+                    break
+
+                else:
+                    # Element with a custom decode() method.
+                    state._index = index
+                    state._depth = depth - 1
+                    generator = instruction.actor.decode(state)
+                    if not self._advance_generator(state, generator,
+                                                   continuation, choices):
+                        break
+                    index = state._index
+
+            # The current path failed; backtrack to the most recent choice
+            #  point which can continue.
+            while choices:
+                choice = choices.pop()
+                kind = choice[0]
+                if kind == _CHOICE_FAILURE:
+                    frame = choice[2]
+                    if frame.end is None:
+                        state.memoize_failure(frame.actor, choice[1])
+                    continue
+
+                index = choice[1]
+                del frames[choice[2]:]
+                continuation = choice[3]
+
+                if kind == _CHOICE_CONTINUE:
+                    break
+
+                elif kind == _CHOICE_ALTERNATIVE:
+                    _, _, _, _, children, i, depth = choice
+                    if i + 1 < len(children):
+                        choices.append(choice[:5] + (i + 1, depth))
+                    continuation = (children[i], depth, continuation)
+                    break
+
+                elif kind == _CHOICE_SPAN:
+                    _, _, _, _, frame, ends, i = choice
+                    if i + 1 < len(ends):
+                        choices.append(choice[:6] + (i + 1,))
+                    index = frame.end = ends[i]
+                    break
+
+                else:
+                    generator = choice[4]
+                    state._index = index
+                    state._depth = choice[5]
+                    if self._advance_generator(state, generator,
+                                               continuation, choices):
+                        index = state._index
+                        break
+            else:
+                # No decoding possibilities left.
+                state._index = index
+                state._depth = base_depth
+                return
+
+    @staticmethod
+    def _lookahead_table(instruction):
+        # Return the lookahead table of an alternative element with child
+        #  indices replaced by child instructions.
+        table = instruction.actor.get_lookahead_table()
+        data = instruction.data
+        if data is None or data[3] is not table:
+            children = instruction.children
+            def get_children(indices):
+                return tuple(children[index] for index in indices)
+            mapping, default, nullable, _ = table
+            data = (dict((word, get_children(indices))
+                         for word, indices in mapping.items()),
+                    get_children(default), get_children(nullable), table)
+            instruction.data = data
+        return data
+
+    @staticmethod
+    def _advance_generator(state, generator, continuation, choices):
+        # pylint: disable=protected-access
+        for _ in generator:
+            choices.append((_CHOICE_GENERATOR, state._index,
+                            len(state._stack), continuation, generator,
+                            state._depth))
+            return True
+        return False
+
+    @staticmethod
+    def _list_ref_ends(element, words, index):
+        # Return the end indices of all spans of words starting at
+        #  *index* which are in the referenced list, longest first.
+        # pylint: disable=protected-access
+        counts = element._list.match_words(itertools.islice(words, index,
+                                                            None))
+        return [index + count for count in counts]
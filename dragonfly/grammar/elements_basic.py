@@ -84,10 +84,24 @@ import itertools
 import logging
 
 from six import integer_types, string_types
+from six.moves import intern
 
+from ._util      import method_function
 from .rule_base  import Rule
 from .list       import ListBase, DictList
 
+#===========================================================================
+# Utility functions.
+
+def _intern_word(word):
+    # Return the interned version of a word, if it can be interned.
+    #  Python 2 cannot intern unicode strings.
+    try:
+        return intern(word)
+    except TypeError:
+        return word
+
+
 #===========================================================================
 # Element base class.
 
@@ -96,7 +110,15 @@ id_generator = itertools.count()
 class ElementBase(object):
     """ Base class for all other element classes. """
 
-    name = "uninitialized"
+    # Element classes store their attributes in slots to save memory,
+    #  because grammars can contain very many elements.  The "__dict__"
+    #  slot allows other attributes to be set as well, e.g. by derived
+    #  classes without slots or by specials like "{weight=...}" in
+    #  compound specs.  The instance dictionary is only created if this
+    #  is done.
+    __slots__ = ("name", "_default", "_id", "_first_words_cache",
+                 "_gstring_cache", "_dependencies_cache", "_lists_cache",
+                 "__dict__")
 
     _log_decode = logging.getLogger("grammar.decode")
     _log_eval = logging.getLogger("grammar.eval")
@@ -117,12 +139,18 @@ class ElementBase(object):
         self.name = name
         self._default = default
         self._id = next(id_generator)
+        self._first_words_cache = None
+        self._gstring_cache = None
+        self._dependencies_cache = None
+        self._lists_cache = None
 
     #-----------------------------------------------------------------------
     # Methods for runtime introspection.
 
     def __repr__(self):
-        if self.name:   name_str = ", name=%r" % self.name
+        # The name may not be set yet if this is called during __init__().
+        name = getattr(self, "name", None)
+        if name:        name_str = ", name=%r" % name
         else:           name_str = ""
         return "%s(...%s)" % (self.__class__.__name__, name_str)
 
@@ -171,15 +199,73 @@ class ElementBase(object):
             The dependencies are the objects that are necessary
             for this element.  These include lists and other rules.
 
+            The lists and rules referenced by this element and its
+            children are cached, because elements don't change after
+            they have been constructed.  The dependencies of referenced
+            rules are added to the returned iterable.
+
         """
         if self._id in memo:
             return []
         memo.add(self._id)
         dependencies = []
-        for c in self.children:
-            dependencies.extend(c.dependencies(memo))
+        for dependency in self._get_cached_dependencies():
+            dependencies.append(dependency)
+            if not isinstance(dependency, ListBase):
+                dependencies.extend(dependency.dependencies(memo))
+        return dependencies
+
+    def _get_cached_dependencies(self):
+        dependencies = self._dependencies_cache
+        if dependencies is None:
+            dependencies = self._dependencies_cache = \
+                self._get_dependencies()
         return dependencies
 
+    def _get_list_versions(self):
+        # Return the modification counts of the lists referenced by this
+        #  element, its children and referenced rules.  Information
+        #  derived from the contents of these lists is valid while these
+        #  counts are unchanged.
+        # pylint: disable=protected-access
+        lists = self._lists_cache
+        if lists is None:
+            lists = {}
+            for dependency in self.dependencies(set()):
+                if isinstance(dependency, ListBase):
+                    lists[id(dependency)] = dependency
+            lists = self._lists_cache = tuple(lists.values())
+        if not lists:
+            return ()
+        return tuple(lst._version for lst in lists)
+
+    def _get_dependencies(self):
+        """
+            Returns a tuple of the lists and rules referenced by this
+            element and its children, not including the dependencies
+            of referenced rules.
+
+            This method should be overloaded by derived classes which
+            reference lists or rules themselves.  By default, the
+            dependencies of this element's children are returned.
+
+        """
+        # pylint: disable=protected-access
+        dependencies = []
+        seen = set()
+        for child in self.children:
+            if (method_function(type(child).dependencies)
+                    is method_function(ElementBase.dependencies)):
+                child_dependencies = child._get_cached_dependencies()
+            else:
+                # The child's class computes its dependencies itself.
+                child_dependencies = child.dependencies(set())
+            for dependency in child_dependencies:
+                if id(dependency) not in seen:
+                    seen.add(id(dependency))
+                    dependencies.append(dependency)
+        return tuple(dependencies)
+
     def gstring(self):
         """
             Returns a formatted grammar string of the contents
@@ -188,10 +274,103 @@ class ElementBase(object):
             The grammar string is of a format similar to that used
             by Natlink to define its grammars.
 
+            The result is cached, because elements don't change after
+            they have been constructed.
+
+        """
+        gstring = self._gstring_cache
+        if gstring is None:
+            gstring = self._gstring_cache = self._get_gstring()
+        return gstring
+
+    def _get_gstring(self):
+        """
+            Computes the return value of :meth:`gstring`.
+
+            This method must be overloaded by derived classes.
+
         """
         raise NotImplementedError("Call to virtual method gstring()"
                                   " in base class ElementBase")
 
+    #-----------------------------------------------------------------------
+    # Methods for sharing identical elements.
+
+    # Names of the attributes which, together with the element's class,
+    #  name, default and children, determine the element's behavior.
+    #  Elements of classes which define this attribute themselves can be
+    #  replaced by identical elements; it is not inherited by derived
+    #  classes, which may add state of their own.
+    _intern_attributes = None
+
+    def _replace_children(self, children):
+        """
+            Replaces this element's children with the given identical
+            elements.
+
+            Returns *False* if this element's children cannot be
+            replaced, which is the default.
+
+        """
+        return False
+
+    #-----------------------------------------------------------------------
+    # Methods for decoding lookahead.
+
+    # Whether a derived class' custom decode() method only finds
+    #  decodings which the decode() method of its base class would also
+    #  find, so that the lookahead of the base class still applies.
+    _lookahead_decode = False
+
+    def first_words(self):
+        """
+            Returns a 2-tuple containing the set of lowercase words with
+            which a recognition of this element can begin and whether
+            this element can match without consuming any words.
+
+            The set is *None* if a recognition can begin with any word,
+            as is the case for :class:`Dictation` elements and elements
+            with a custom :meth:`decode` method.
+
+            The result is cached until a Dragonfly list referenced by
+            this element, its children or referenced rules is modified.
+
+        """
+        versions = self._get_list_versions()
+        cache = self._first_words_cache
+        if cache is None or cache[0] != versions:
+            # Store a conservative result during the computation, in case
+            #  this element is reached again through recursive rules.
+            self._first_words_cache = (versions, None, True)
+            if (self._lookahead_decode or method_function(type(self).decode)
+                    in _lookahead_decode_functions):
+                words, nullable = self._get_first_words()
+            else:
+                words, nullable = None, True
+            cache = self._first_words_cache = (versions, words, nullable)
+        return cache[1], cache[2]
+
+    def _get_first_words(self):
+        """
+            Computes the return value of :meth:`first_words`.
+
+            This method should be overloaded by derived classes.  By
+            default, any word can begin a recognition of this element.
+
+        """
+        return None, True
+
+    def _may_begin_with(self, word):
+        # Whether a recognition of this element can begin with the given
+        #  lowercase word, or can match at the end of the words if *word*
+        #  is None.
+        words, nullable = self.first_words()
+        if nullable:
+            return True
+        if word is None:
+            return False
+        return words is None or word in words
+
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
@@ -289,6 +468,8 @@ class Sequence(ElementBase):
 
     """
 
+    __slots__ = ("_children",)
+
     def __init__(self, children=(), name=None, default=None):
         ElementBase.__init__(self, name=name, default=default)
         self._children = self._copy_sequence(children,
@@ -302,26 +483,45 @@ class Sequence(ElementBase):
         return self._children
 
     #-----------------------------------------------------------------------
-    # Methods for load-time setup.
+    # Methods for sharing identical elements.
 
-    def dependencies(self, memo):
-        if self._id in memo:
-            return []
-        memo.add(self._id)
-        dependencies = []
-        for c in self._children:
-            dependencies.extend(c.dependencies(memo))
-        return dependencies
+    _intern_attributes = ()
 
-    def gstring(self):
+    def _replace_children(self, children):
+        self._children = tuple(children)
+        return True
+
+    #-----------------------------------------------------------------------
+    # Methods for load-time setup.
+
+    def _get_gstring(self):
         return "(" \
              + " ".join([e.gstring() for e in self._children]) \
              + ")"
 
+    def _get_first_words(self):
+        words = set()
+        for child in self._children:
+            child_words, nullable = child.first_words()
+            if child_words is None:
+                words = None
+            elif words is not None:
+                words.update(child_words)
+            if not nullable:
+                break
+        else:
+            nullable = True
+        if words is not None:
+            words = frozenset(words)
+        return words, nullable
+
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
     def decode(self, state):
+        # Skip decoding if this sequence is known to fail here.
+        if state.known_failure(self):
+            return
         state.decode_attempt(self)
 
         # Special case for an empty sequence.
@@ -335,6 +535,7 @@ class Sequence(ElementBase):
         # Attempt to walk a path through the entire sequence of children
         #  so that each one decodes successfully.
         path = [self._children[0].decode(state)]
+        succeeded = False
         while path:
             # Allow the last child to attempt decoding.
             try: next(path[-1])
@@ -349,12 +550,16 @@ class Sequence(ElementBase):
                     path.append(self._children[len(path)].decode(state))
                 else:
                     # Sequence complete, all children decoded successfully.
+                    succeeded = True
                     state.decode_success(self)
                     yield state
                     state.decode_retry(self)
 
         # Sequence of children could not all decode successfully: failure.
+        #  Remember the failure if this sequence never decoded here.
         state.decode_failure(self)
+        if not succeeded:
+            state.memoize_failure(self)
         return
 
     def value(self, node):
@@ -388,6 +593,8 @@ class Optional(ElementBase):
 
     """
 
+    __slots__ = ("_child", "_greedy")
+
     def __init__(self, child, name=None, default=None):
         ElementBase.__init__(self, name, default=default)
 
@@ -405,17 +612,24 @@ class Optional(ElementBase):
         return (self._child, )
 
     #-----------------------------------------------------------------------
-    # Methods for load-time setup.
+    # Methods for sharing identical elements.
 
-    def dependencies(self, memo):
-        if self._id in memo:
-            return []
-        memo.add(self._id)
-        return self._child.dependencies(memo)
+    _intern_attributes = ("_greedy",)
 
-    def gstring(self):
+    def _replace_children(self, children):
+        self._child, = children
+        return True
+
+    #-----------------------------------------------------------------------
+    # Methods for load-time setup.
+
+    def _get_gstring(self):
         return "[" + self._child.gstring() + "]"
 
+    def _get_first_words(self):
+        words, _ = self._child.first_words()
+        return words, True
+
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
@@ -423,8 +637,15 @@ class Optional(ElementBase):
         # pylint: disable=unused-variable
         state.decode_attempt(self)
 
+        # Only allow the child to decode if it can begin with the next
+        #  word.
+        word = state.word()
+        if word is not None:
+            word = word.lower()
+        child_may_match = self._child._may_begin_with(word)
+
         # If in greedy mode, allow the child to decode before.
-        if self._greedy:
+        if self._greedy and child_may_match:
             for result in self._child.decode(state):
                 state.decode_success(self)
                 yield state
@@ -439,7 +660,7 @@ class Optional(ElementBase):
         state.decode_retry(self)
 
         # If not in greedy mode, allow the child to decode after.
-        if not self._greedy:
+        if not self._greedy and child_may_match:
             for result in self._child.decode(state):
                 state.decode_success(self)
                 yield state
@@ -484,10 +705,13 @@ class Alternative(ElementBase):
 
     """
 
+    __slots__ = ("_children", "_lookahead_cache")
+
     def __init__(self, children=(), name=None, default=None):
         ElementBase.__init__(self, name, default=default)
         self._children = self._copy_sequence(children,
                                              "children", ElementBase)
+        self._lookahead_cache = None
 
     #-----------------------------------------------------------------------
     # Methods for runtime introspection.
@@ -496,27 +720,90 @@ class Alternative(ElementBase):
         """ Returns the alternative child elements. """
         return self._children
 
+    #-----------------------------------------------------------------------
+    # Methods for sharing identical elements.
+
+    _intern_attributes = ()
+
+    def _replace_children(self, children):
+        self._children = tuple(children)
+        return True
+
     #-----------------------------------------------------------------------
     # Methods for load-time setup.
 
-    def gstring(self):
+    def _get_gstring(self):
         return "(" \
              + " | ".join([e.gstring() for e in self._children]) \
              + ")"
 
-    def dependencies(self, memo):
-        if self._id in memo:
-            return []
-        memo.add(self._id)
-        dependencies = []
-        for c in self._children:
-            dependencies.extend(c.dependencies(memo))
-        return dependencies
+    def _get_first_words(self):
+        words = set()
+        nullable = False
+        for child in self._children:
+            child_words, child_nullable = child.first_words()
+            if child_words is None:
+                words = None
+            elif words is not None:
+                words.update(child_words)
+            nullable = nullable or child_nullable
+        if words is not None:
+            words = frozenset(words)
+        return words, nullable
+
+    def get_lookahead_table(self):
+        """
+            Returns a table of which children can begin with which words.
+
+            The table is a 4-tuple containing a dictionary mapping
+            lowercase words to tuples of child indices, a tuple of the
+            indices of children which can begin with any other word, a
+            tuple of the indices of children which can match without any
+            words, and the modification counts of the referenced lists
+            for which the table was built.  The child indices are in
+            order.
+
+            The table is cached until a Dragonfly list referenced by
+            this element, its children or referenced rules is modified.
+
+        """
+        versions = self._get_list_versions()
+        table = self._lookahead_cache
+        if table is not None and table[3] == versions:
+            return table
+
+        mapping = {}
+        default = []
+        nullable = []
+        for index, child in enumerate(self._children):
+            words, child_nullable = child.first_words()
+            if child_nullable:
+                nullable.append(index)
+            if child_nullable or words is None:
+                # This child must be tried for every word.
+                default.append(index)
+                for indices in mapping.values():
+                    indices.append(index)
+            else:
+                for word in words:
+                    indices = mapping.get(word)
+                    if indices is None:
+                        indices = mapping[word] = list(default)
+                    indices.append(index)
+
+        mapping = dict((word, tuple(indices))
+                       for word, indices in mapping.items())
+        table = (mapping, tuple(default), tuple(nullable), versions)
+        self._lookahead_cache = table
+        return table
 
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
     def decode(self, state):
+        # Skip decoding if this alternative is known to fail here.
+        if state.known_failure(self):
+            return
         state.decode_attempt(self)
 
         # Special case for an empty list of alternatives.
@@ -527,12 +814,21 @@ class Alternative(ElementBase):
             state.decode_failure(self)
             return
 
-        # Iterate through the children.
-        for child in self._children:
+        # Iterate through the children which can begin with the next word.
+        mapping, default, nullable, _ = self.get_lookahead_table()
+        word = state.word()
+        if word is None:
+            indices = nullable
+        else:
+            indices = mapping.get(word.lower(), default)
+        succeeded = False
+        for index in indices:
+            child = self._children[index]
 
             # Iterate through this child's possible decoding states.
             # pylint: disable=unused-variable
             for result in child.decode(state):
+                succeeded = True
                 state.decode_success(self)
                 yield state
                 state.decode_retry(self)
@@ -543,7 +839,10 @@ class Alternative(ElementBase):
             state.decode_rollback(self)
 
         # None of the children could decode successfully: failure.
+        #  Remember the failure if no child ever decoded here.
         state.decode_failure(self)
+        if not succeeded:
+            state.memoize_failure(self)
         return
 
     def value(self, node):
@@ -592,6 +891,8 @@ class Repetition(Sequence):
 
     """
 
+    __slots__ = ("_child", "_min", "_max", "_optimize")
+
     # pylint: disable=redefined-builtin,unused-variable
 
     def __init__(self, child, min=1, max=None, name=None, default=None,
@@ -609,22 +910,14 @@ class Repetition(Sequence):
         else:           self._max = max
         self._optimize = optimize
 
-        optional_length = self._max - self._min - 1
-        if optional_length > 0:
-            element = Optional(child)
-            for index in range(optional_length-1):
-                element = Optional(Sequence([child, element]))
-
-            if self._min >= 1:
-                children = [child] * self._min + [element]
-            else:
-                children = [element]
-        elif self._min > 0:
-            children = [child] * self._min
-        else:
+        if self._max - self._min <= 1 and self._min <= 0:
             raise ValueError("Repetition not allowed to be empty.")
 
-        Sequence.__init__(self, children, name=name, default=default)
+        # The child element is repeated during decoding, so it is the
+        #  only child of this element.  Compilers which need an
+        #  equivalent expanded sequence of the child element build it
+        #  themselves.
+        Sequence.__init__(self, [child], name=name, default=default)
 
     min = property(
         lambda self: self._min,
@@ -646,15 +939,77 @@ class Repetition(Sequence):
         "optimally. (Read-only)"
     )
 
-    def dependencies(self, memo):
-        if self._id in memo:
-            return []
-        memo.add(self._id)
-        return self._child.dependencies(memo)
+    _intern_attributes = ("_min", "_max", "_optimize")
+
+    def _replace_children(self, children):
+        self._child, = children
+        self._children = (self._child,)
+        return True
+
+    def _get_gstring(self):
+        # Format the grammar string of the equivalent expanded sequence:
+        #  the child *min* times followed by nested optional sequences.
+        child = self._child.gstring()
+        strings = [child] * self._min
+        optional_length = self._max - self._min - 1
+        if optional_length > 0:
+            optional = "[" + child + "]"
+            for index in range(optional_length-1):
+                optional = "[(" + child + " " + optional + ")]"
+            strings.append(optional)
+        return "(" + " ".join(strings) + ")"
+
+    def _get_first_words(self):
+        words, nullable = self._child.first_words()
+        return words, nullable or self._min == 0
 
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
+    def decode(self, state):
+        state.decode_attempt(self)
+        child = self._child
+        minimum = self._min
+        maximum = self._max - 1
+
+        # Attempt to walk a path of repetitions of the child element so
+        #  that each one decodes successfully.  As many repetitions as
+        #  possible are attempted first.
+        path = [child.decode(state)]
+        while path:
+            # Allow the last repetition to attempt decoding.
+            try: next(path[-1])
+            except StopIteration:
+                # Last repetition failed to decode, remove it from the
+                #  path.  The remaining repetitions are a complete
+                #  decoding if there are enough of them.
+                path.pop()
+                complete = len(path) >= minimum
+            else:
+                # Last repetition successfully decoded.  Append another
+                #  repetition if it is required, or if it is allowed and
+                #  the child can begin with the next word.
+                complete = True
+                if len(path) < minimum:
+                    path.append(child.decode(state))
+                    complete = False
+                elif len(path) < maximum:
+                    word = state.word()
+                    if word is not None:
+                        word = word.lower()
+                    if child._may_begin_with(word):
+                        path.append(child.decode(state))
+                        complete = False
+
+            if complete:
+                state.decode_success(self)
+                yield state
+                state.decode_retry(self)
+
+        # No more decoding possibilities available, failure.
+        state.decode_failure(self)
+        return
+
     def get_repetitions(self, node):
         """
             Returns a list containing the nodes associated with
@@ -668,31 +1023,11 @@ class Repetition(Sequence):
 
         """
         repetitions = []
-        for index in range(self._min):
-            element = node.children[index]
-            if element.actor != self._child:
+        for child in node.children:
+            if child.actor != self._child:
                 raise TypeError("Invalid child of %s: %s" \
-                    % (self, element.actor))
-            repetitions.append(element)
-
-        if self._max - self._min > 1:
-            optional = node.children[-1]
-            while optional.children:
-                child = optional.children[0]
-                if isinstance(child.actor, Sequence):
-                    assert len(child.children) == 2
-                    element, optional = child.children
-                    if element.actor != self._child:
-                        raise TypeError("Invalid child of %s: %s" \
-                            % (self, element.actor))
-                    repetitions.append(element)
-                elif child.actor == self._child:
-                    repetitions.append(child)
-                    break
-                else:
-                    raise TypeError("Invalid child of %s: %s" \
-                        % (self, child.actor))
-
+                    % (self, child.actor))
+            repetitions.append(child)
         return repetitions
 
     def value(self, node):
@@ -739,6 +1074,8 @@ class Literal(ElementBase):
 
     """
 
+    __slots__ = ("_value", "_words", "_words_ext")
+
     def __init__(self, text, name=None, value=None, default=None,
                  quote_start_str='"', quote_end_str='"',
                  strip_quote_strs=True):
@@ -790,7 +1127,14 @@ class Literal(ElementBase):
             words.extend(current_quoted_sequence)
             words_ext.extend(current_quoted_sequence)
 
-        # Set both lists.
+        # Set both lists.  Literals often share their words with other
+        #  literals, and usually have no quoted words, so the word strings
+        #  are interned and the lists are shared if they are equal.
+        words = [_intern_word(word) for word in words]
+        if words_ext == words:
+            words_ext = words
+        else:
+            words_ext = [_intern_word(word) for word in words_ext]
         self._words = words
         self._words_ext = words_ext
 
@@ -811,15 +1155,20 @@ class Literal(ElementBase):
         "single items. This is extends the :py:attr:`~words` property."
     )
 
+    _intern_attributes = ("_words", "_words_ext", "_value")
+
     #-----------------------------------------------------------------------
     # Methods for load-time setup.
 
-    def dependencies(self, memo):
-        return []
-
-    def gstring(self):
+    def _get_gstring(self):
         return " ".join(self._words)
 
+    def _get_first_words(self):
+        words = frozenset(words[0].lower()
+                          for words in (self._words, self._words_ext)
+                          if words)
+        return words, not self._words
+
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
@@ -877,6 +1226,8 @@ class RuleRef(ElementBase):
 
     """
 
+    __slots__ = ("_rule",)
+
     def __init__(self, rule, name=None, default=None):
         ElementBase.__init__(self, name, default=default)
 
@@ -895,34 +1246,44 @@ class RuleRef(ElementBase):
 
     rule = property(lambda self: self._rule)
 
+    _intern_attributes = ("_rule",)
+
     #-----------------------------------------------------------------------
     # Methods for load-time setup.
 
-    def dependencies(self, memo):
-        if self._id in memo:
-            return []
-        memo.add(self._id)
-        return [self._rule] + self._rule.dependencies(memo)
+    def _get_dependencies(self):
+        return (self._rule,)
 
-    def gstring(self):
+    def _get_gstring(self):
         return "<" + self._rule.name + ">"
 
+    def _get_first_words(self):
+        return self._rule.first_words()
+
 
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
     def decode(self, state):
+        # Skip decoding if this reference is known to fail here.
+        if state.known_failure(self):
+            return
         state.decode_attempt(self)
 
         # Allow the rule to attempt decoding.
         # pylint: disable=unused-variable
+        succeeded = False
         for result in self._rule.decode(state):
+            succeeded = True
             state.decode_success(self)
             yield state
             state.decode_retry(self)
 
         # The rule failed to deliver a valid decoding, failure.
+        #  Remember the failure if it never decoded here.
         state.decode_failure(self)
+        if not succeeded:
+            state.memoize_failure(self)
 
     def value(self, node):
         return node.children[0].value()
@@ -947,6 +1308,8 @@ class ListRef(ElementBase):
 
     """
 
+    __slots__ = ("_list", "_key")
+
     # pylint: disable=redefined-builtin
     def __init__(self, name, list, key=None, default=None):
         self._list = None
@@ -973,38 +1336,51 @@ class ListRef(ElementBase):
 
     list = property(lambda self: self._list)
 
+    _intern_attributes = ("_list", "_key")
+
     #-----------------------------------------------------------------------
     # Methods for load-time setup.
 
-    def dependencies(self, memo):
-        if self._id in memo:
-            return []
-        memo.add(self._id)
-        return [self._list]
+    def _get_dependencies(self):
+        return (self._list,)
 
-    def gstring(self):
+    def _get_gstring(self):
         return "{" + self._list.name + "}"
 
+    def _get_first_words(self):
+        # Include each prefix of each item that ends at a space, because
+        #  recognized words can contain spaces.
+        words = set()
+        for item in self._list:
+            if not isinstance(item, string_types):
+                return None, False
+            item = item.lower()
+            index = item.find(" ")
+            while index != -1:
+                words.add(item[:index])
+                index = item.find(" ", index + 1)
+            words.add(item)
+        return frozenset(words), False
+
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
     def decode(self, state):
         state.decode_attempt(self)
 
+        # Determine which of the following sequences of words are in the
+        #  list before yielding, because the state's index is changed by
+        #  each yield.  Longer sequences are yielded first.
+        words = (state.word(delta) for delta in itertools.count())
+        counts = self._list.match_words(words)
+
         # If the next word(s) is/are in the list, success.
-        delta = 0
-        word = state.word()
-        while 1:
-            if word in self._list:
-                state.next(delta + 1)
-                state.decode_success(self)
-                yield state
-                state.decode_retry(self)
-            delta += 1
-            next = state.word(delta)
-            if next is None:
-                break
-            word += " " + next
+        for count in counts:
+            state.next(count)
+            state.decode_success(self)
+            yield state
+            state.decode_retry(self)
+            state.decode_rollback(self)
 
         # If the word is not in the list, or on retry, failure.
         state.decode_failure(self)
@@ -1032,6 +1408,8 @@ class DictListRef(ListRef):
 
     """
 
+    __slots__ = ()
+
     # pylint: disable=redefined-builtin
     def __init__(self, name, dict, key=None, default=None):
         if not isinstance(dict, DictList):
@@ -1039,6 +1417,8 @@ class DictListRef(ListRef):
                             "DictList." % self.__class__.__name__)
         ListRef.__init__(self, name, dict, key, default=default)
 
+    _intern_attributes = ListRef._intern_attributes
+
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
@@ -1063,16 +1443,23 @@ class Empty(ElementBase):
 
     """
 
+    __slots__ = ("_value",)
+
     def __init__(self, name=None, value=True, default=None):
         self._value = value
         ElementBase.__init__(self, name, default=default)
 
+    _intern_attributes = ("_value",)
+
     #-----------------------------------------------------------------------
     # Methods for load-time setup.
 
-    def gstring(self):
+    def _get_gstring(self):
         return "<Empty()>"
 
+    def _get_first_words(self):
+        return frozenset(), True
+
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
@@ -1126,6 +1513,8 @@ class Dictation(ElementBase):
             Dictation("camelText").camel()
     """
 
+    __slots__ = ("_format_words", "_string_methods")
+
     # pylint: disable=redefined-builtin
     def __init__(self, name=None, format=True, default=None):
         ElementBase.__init__(self, name, default=default)
@@ -1150,9 +1539,12 @@ class Dictation(ElementBase):
     #-----------------------------------------------------------------------
     # Methods for load-time setup.
 
-    def gstring(self):
+    def _get_gstring(self):
         return "<Dictation()>"
 
+    def _get_first_words(self):
+        return None, False
+
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
@@ -1217,11 +1609,16 @@ class Modifier(Alternative):
             Modifier(int_rep, lambda r: ", ".join(map(str, r)))
 
     """
+
+    __slots__ = ("_modifier",)
+
     def __init__(self, element, modifier=None):
         self._modifier = modifier
         Alternative.__init__(self, children=(element,), name=element.name,
                              default=element.default)
 
+    _intern_attributes = ("_modifier",)
+
     def value(self, node):
         initial_value = Alternative.value(self, node)
         if self._modifier:
@@ -1244,15 +1641,22 @@ class Impossible(ElementBase):
 
     """
 
+    __slots__ = ()
+
     def __init__(self, name=None):
         ElementBase.__init__(self, name)
 
+    _intern_attributes = ()
+
     #-----------------------------------------------------------------------
     # Methods for load-time setup.
 
-    def gstring(self):
+    def _get_gstring(self):
         return "<Impossible()>"
 
+    def _get_first_words(self):
+        return frozenset(), False
+
     #-----------------------------------------------------------------------
     # Methods for runtime recognition processing.
 
@@ -1310,6 +1714,8 @@ class RuleWrap(RuleRef):
 
     """
 
+    __slots__ = ()
+
     _next_id = 0
 
     def __init__(self, name, element, default=None):
@@ -1317,3 +1723,16 @@ class RuleWrap(RuleRef):
         RuleWrap._next_id += 1
         rule = Rule(name=rule_name, element=element, exported=False)
         RuleRef.__init__(self, rule=rule, name=name, default=default)
+
+    _intern_attributes = RuleRef._intern_attributes
+
+
+#===========================================================================
+# Decode methods for which the first words of elements are known.
+
+_lookahead_decode_functions = frozenset(method_function(method)
+                                        for method in (
+    Sequence.decode, Optional.decode, Alternative.decode,
+    Repetition.decode, Literal.decode, RuleRef.decode, ListRef.decode,
+    Empty.decode, Dictation.decode, Impossible.decode,
+))
@@ -36,9 +36,11 @@ import re
 
 from six import string_types, binary_type
 
-from dragonfly.grammar.elements_basic import Alternative, ElementBase
+from dragonfly.grammar.elements_basic import (Alternative, ElementBase,
+                                              Literal)
 
-from dragonfly.parsing.parse import spec_parser, CompoundTransformer, ParseError
+from dragonfly.parsing.parse import (spec_parser, spec_cache,
+                                     CompoundTransformer, ParseError)
 
 #---------------------------------------------------------------------------
 # The Compound class.
@@ -90,8 +92,11 @@ class Compound(Alternative):
 
     """
 
+    __slots__ = ("_spec", "_value", "_value_func", "_extras", "_references")
+
     _log = logging.getLogger("compound.parse")
     _parser = spec_parser
+    _spec_cache = spec_cache
 
     def __init__(self, spec, extras=None, actions=None, name=None,
                  value=None, value_func=None, elements=None, default=None):
@@ -134,11 +139,14 @@ class Compound(Alternative):
             extras = elements
         self._extras = extras
 
+        # Parse the spec, reusing its parse tree from the spec cache if
+        #  possible, and build a new element structure from the tree.
         try:
-            tree = self._parser.parse(spec)
+            tree, references = self._spec_cache.get_tree(self._parser, spec)
         except Exception as e:
             self._log.error("Exception raised parsing %r: %s", spec, e)
             raise ParseError("Exception raised parsing %r: %s" % (spec, e))
+        self._references = references
 
         try:
             element = CompoundTransformer(self._extras).transform(tree)
@@ -149,6 +157,10 @@ class Compound(Alternative):
         Alternative.__init__(self, (element,), name=name,
                              default=default)
 
+    # Compounds with the same structure, extras and values are identical,
+    #  even if their specs are written differently.
+    _intern_attributes = ("_value", "_value_func", "_extras")
+
     def __repr__(self):
         arguments = ["%r" % self._spec]
         if self.name:
@@ -156,16 +168,39 @@ class Compound(Alternative):
         arguments = ", ".join(arguments)
         return "%s(%s)" % (self.__class__.__name__, arguments)
 
+    references = property(lambda self: self._references,
+                          doc="Tuple of the names of the extras referenced"
+                              " by this element's spec.  (Read-only)")
+
+    def get_extras_values(self, node):
+        """
+            Returns a dictionary mapping the names of the extras spoken
+            in the given *node* to their values.
+
+            Only the extras referenced by this element's spec are looked
+            up.  The nodes below *node* are walked once for all of them.
+
+            Argument:
+             - *node* (*Node*) --
+               the parse tree node of this element, or of one of its
+               unnamed ancestors
+
+        """
+        values = {}
+        for name in self._references:
+            extra_node = node.get_child_by_name(name, shallow=True)
+            if extra_node:
+                values[name] = extra_node.value()
+        return values
+
     def value(self, node):
         if self._value_func is not None:
             # Prepare *extras* dict for passing to value_func().
             extras = {"_node": node}
             for name, element in self._extras.items():
-                extra_node = node.get_child_by_name(name, shallow=True)
-                if extra_node:
-                    extras[name] = extra_node.value()
-                elif element.has_default():
+                if element.has_default():
                     extras[name] = element.default
+            extras.update(self.get_extras_values(node))
             try:
                 value = self._value_func(node, extras)
             except Exception as e:
@@ -181,6 +216,13 @@ class Compound(Alternative):
 #---------------------------------------------------------------------------
 # The Choice class which maps multiple Compound instances to values.
 
+# Choice keys which are plain phrases without any spec syntax.  These are
+#  built as Literal elements directly, because parsing them as specs
+#  would give the same Literal element wrapped in a Compound.
+_plain_phrase = re.compile(r"[ \t]*{word}(?:[ \t]+{word})*[ \t]*\Z"
+                           .format(word=r"[^\s\[\]<>|(){}]+"))
+
+
 class Choice(Alternative):
     """
         Element allowing a dictionary of phrases to be recognised to be
@@ -195,6 +237,11 @@ class Choice(Alternative):
             - *default* (default: *None*) -- the default value of this
               element
 
+        Keys which are plain phrases, without any of the spec syntax
+        characters ``[]()|<>{}``, are built as :class:`Literal` elements
+        directly, without being parsed.  Other keys are built as
+        :class:`Compound` elements.
+
         Example:
 
         .. code:: python
@@ -219,6 +266,9 @@ class Choice(Alternative):
                 }),
             ]
     """
+
+    __slots__ = ("_choices", "_extras")
+
     def __init__(self, name, choices, extras=None, default=None):
         # Argument type checking.
         assert isinstance(name, string_types) or name is None
@@ -230,10 +280,16 @@ class Choice(Alternative):
         self._choices = choices
         self._extras = extras
         children = []
+        match_plain = _plain_phrase.match
         for k, v in choices.items():
-            child = Compound(spec=k, value=v, extras=extras)
+            if not isinstance(k, binary_type) and match_plain(k):
+                child = Literal(k, value=v)
+            else:
+                child = Compound(spec=k, value=v, extras=extras)
             children.append(child)
 
         # Initialize super class.
         Alternative.__init__(self, children=children,
                              name=name, default=default)
+
+    _intern_attributes = ()
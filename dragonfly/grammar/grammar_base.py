@@ -28,12 +28,20 @@ import logging
 from six import string_types
 
 from ..engines         import get_engine
+from ._util            import method_function
 from .rule_base        import Rule
 from .list             import ListBase
-from .context          import Context
+from .context          import Context, match_cache
+from .interning        import intern_rule_elements
+from .complexity       import get_grammar_complexity, format_paths
 from ..error           import GrammarError
 
 
+# --------------------------------------------------------------------------
+
+_rule_process_begin = method_function(Rule.process_begin)
+
+
 # --------------------------------------------------------------------------
 
 class Grammar(object):
@@ -63,6 +71,15 @@ class Grammar(object):
     _log_results  = logging.getLogger("grammar.results")
     _log          = logging.getLogger("grammar")
 
+    # Whether identical elements of this grammar's rules are replaced by a
+    #  single instance when the grammar is loaded.  See
+    #  :mod:`dragonfly.grammar.interning`.
+    intern_elements = False
+
+    # Counter incremented whenever the enabled state, context or loaded
+    #  state of any grammar changes.
+    _state_count = 0
+
     # ----------------------------------------------------------------------
     # Methods for initialization and cleanup.
 
@@ -85,6 +102,7 @@ class Grammar(object):
         self._loaded = False
         self._enabled = True
         self._in_context = False
+        self._begin_key = None
 
     def __del__(self):
         try:
@@ -139,6 +157,7 @@ class Grammar(object):
 
         """
         self._enabled = True
+        Grammar._state_count += 1
 
     def disable(self):
         """
@@ -147,6 +166,7 @@ class Grammar(object):
 
         """
         self._enabled = False
+        Grammar._state_count += 1
 
     enabled = property(lambda self: self._enabled,
                        doc="Whether a grammar is active to receive "
@@ -187,6 +207,7 @@ class Grammar(object):
             raise TypeError("context must be either a Context object or "
                             "None")
         self._context = context
+        Grammar._state_count += 1
 
     context = property(lambda self: self._context,
                        doc="A grammar's context, under which it and its "
@@ -213,6 +234,11 @@ class Grammar(object):
            function correctly if used. It is better to use *separate*
            ``Rule`` instances for each grammar instead.
 
+        Private rules, such as those referenced by ``IntegerRef``
+        elements, are often shared by several grammars.  Their
+        :attr:`~Rule.grammar` is the first grammar they were added to
+        which still contains them.
+
         :param rule: Dragonfly rule
         :type rule: Rule
         """
@@ -225,6 +251,9 @@ class Grammar(object):
         elif not isinstance(rule, Rule):
             raise GrammarError("Invalid rule object: %s" % rule)
         elif rule in self._rules:
+            # Take over private rules removed from their grammar.
+            if rule.grammar is None:
+                rule.grammar = self
             return
         elif rule.imported:
             return
@@ -237,9 +266,11 @@ class Grammar(object):
                                    "recommended.", rule.name,
                                    rule.grammar.name, self._name)
 
-        # Append the rule to this grammar object's internal list.
+        # Append the rule to this grammar object's internal list.  Private
+        #  rules stay with the first grammar they were added to.
         self._rules.append(rule)
-        rule.grammar = self
+        if rule.exported or rule.grammar is None:
+            rule.grammar = self
 
     def remove_rule(self, rule):
         """
@@ -261,9 +292,11 @@ class Grammar(object):
         elif rule not in self._rules:
             return
 
-        # Remove the rule from this grammar object's internal list.
+        # Remove the rule from this grammar object's internal list.  Rules
+        #  which belong to another grammar are left alone.
         self._rules.remove(rule)
-        rule.grammar = None
+        if rule.grammar is self:
+            rule.grammar = None
 
     def add_list(self, lst):
         """
@@ -423,6 +456,34 @@ class Grammar(object):
 
         self._engine.update_list(lst, self)
 
+    def update_list_delta(self, lst, added, removed):
+        """
+            Update a list's content loaded in this grammar, given the
+            items added to and removed from the list since its last
+            update.
+
+            **Internal:** this method is normally *not* called
+            directly by the user, but instead automatically when
+            the list itself is modified by the user.
+
+        """
+        self._log_load.debug("Grammar %s: updating list %s (%d added,"
+                             " %d removed).", self._name, lst.name,
+                             len(added), len(removed))
+
+        # Check for valid list instance and added items.  Nothing needs to
+        #  be updated if the list's items only changed order.
+        if lst not in self._lists:
+            raise GrammarError("List '%s' not loaded in this grammar."
+                               % lst.name)
+        elif [True for w in added if not isinstance(w, string_types)]:
+            raise GrammarError("List '%s' contains objects other than"
+                               "strings." % lst.name)
+        elif not added and not removed:
+            return
+
+        self._engine.update_list_delta(lst, self, added, removed)
+
     # ----------------------------------------------------------------------
     # Methods for registering a grammar object instance in natlink.
 
@@ -437,9 +498,14 @@ class Grammar(object):
             return
 
         self.add_all_dependencies()
+        if self.intern_elements:
+            count = intern_rule_elements(self._rules)
+            self._log_load.info("Grammar %s: %d identical elements"
+                                " interned.", self._name, count)
         self._engine.load_grammar(self)
         self._loaded = True
         self._in_context = False
+        Grammar._state_count += 1
 
         # Update all rules loaded in this grammar.
         for rule in self._rules:
@@ -447,10 +513,17 @@ class Grammar(object):
             # have active set to None) are activated.
             if rule.active is not False:
                 rule.activate(force=True)
-        # Update all lists loaded in this grammar.
+        # Update all lists loaded in this grammar.  The engine is updated
+        #  immediately, even if list updates are deferred.
         for lst in self._lists:
             # pylint: disable=protected-access
-            lst._update()
+            lst._reset_delta()
+            lst._notify_grammar()
+
+        # Compile the decoders of top-level rules, if enabled.
+        for rule in self._rules:
+            if rule.exported and rule.compiled_decoding:
+                rule.compile_decoder()
 
         #        self._log_load.warning(self.get_complexity_string())
 
@@ -465,6 +538,17 @@ class Grammar(object):
         self._engine.unload_grammar(self)
         self._loaded = False
         self._in_context = False
+        Grammar._state_count += 1
+
+    def get_complexity(self):
+        """
+            Return a
+            :class:`~dragonfly.grammar.complexity.GrammarComplexity`
+            object with metrics of the size and complexity of this
+            grammar and its rules.
+
+        """
+        return get_grammar_complexity(self)
 
     def get_complexity_string(self):
         """
@@ -472,22 +556,27 @@ class Grammar(object):
             complexity of this grammar.
 
         """
+        complexity = self.get_complexity()
         rules_all = self.rules
         rules_top = [r for r in self.rules if r.exported]
         rules_imp = [r for r in self.rules if r.imported]
-        elements = []
-        for rule in rules_all:
-            elements.extend(self._get_element_list(rule))
-        text = ("Grammar: %3d (%3d, %3d) rules, %4d elements (%3d avg)     %s"
+        text = ("Grammar: %3d (%3d, %3d) rules, %4d elements (%3d avg),"
+                " %4d distinct, branching %.2f, %s paths     %s"
                 % (
                     len(rules_all), len(rules_top), len(rules_imp),
-                    len(elements), len(elements) / len(rules_all),
-                    self,
+                    complexity.elements,
+                    complexity.elements / max(len(rules_all), 1),
+                    complexity.distinct_elements,
+                    complexity.branching_factor,
+                    format_paths(complexity.paths), self,
                 )
                 )
-        for rule in rules_all:
-            elements = self._get_element_list(rule)
-            text += "\n  Rule: %4d  %s" % (len(elements), rule)
+        for rule in complexity.rules:
+            text += ("\n  Rule: %4d elements, %4d distinct, depth %2d,"
+                     " branching %.2f, %s paths  %s"
+                     % (rule.elements, rule.distinct_elements, rule.depth,
+                        rule.branching_factor, format_paths(rule.paths),
+                        rule.rule))
         return text
 
     def _get_element_list(self, thing):
@@ -529,12 +618,30 @@ class Grammar(object):
         self._log_begin.debug("Grammar %s: executable '%s', title '%s'.",
                               self._name, executable, title)
 
+        match_cache.begin_grammar(self, executable, title, handle)
+
+        # Reuse the previous context matching and rule activation if the
+        #  foreground window and the state of all grammars and rules are
+        #  unchanged, if enabled by the engine.
+        begin_key = (executable, title, handle, Grammar._state_count,
+                     Rule._state_count)
+        if self._engine.skip_unchanged_window \
+                and begin_key == self._begin_key:
+            self._log_begin.debug("Grammar %s: window unchanged, skipping"
+                                  " context matching.", self._name)
+            if self._enabled and self._in_context:
+                self._process_begin(executable, title, handle)
+                self._process_rules_begin_unchanged(executable, title,
+                                                    handle)
+            return
+
         if not self._enabled:
             # Grammar is disabled, so deactivate all active rules.
             [r.deactivate() for r in self._rules if r.active]
 
-        elif not self._context \
-                or self._context.matches(executable, title, handle):
+        elif not self._context or match_cache.matches(self._context,
+                                                      executable, title,
+                                                      handle):
             # Grammar is within context.
             if not self._in_context:
                 self._in_context = True
@@ -554,6 +661,21 @@ class Grammar(object):
         self._log_begin.debug("Grammar %s:     active rules: %s.",
                               self._name,
                               [r.name for r in self._rules if r.active])
+        self._begin_key = (executable, title, handle, Grammar._state_count,
+                           Rule._state_count)
+
+    def _process_rules_begin_unchanged(self, executable, title, handle):
+        # Call the start of phrase callbacks of this grammar's active
+        #  rules without matching their contexts again.  Rules which
+        #  override process_begin() are called as usual.
+        # pylint: disable=protected-access
+        for r in self._rules:
+            if not (r.exported and hasattr(r, "process_begin")):
+                continue
+            if method_function(type(r).process_begin) is not _rule_process_begin:
+                r.process_begin(executable, title, handle)
+            elif r.active:
+                r._process_begin()
 
     def enter_context(self):
         """
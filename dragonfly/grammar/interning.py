@@ -0,0 +1,183 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+"""
+Element interning
+============================================================================
+
+This module implements the sharing of identical element subtrees.
+Grammars built from common building blocks often contain many separate
+but identical elements, e.g. the same :class:`Literal` or
+:class:`Optional` in many commands.  Interning replaces these with a
+single instance, so that the compiled decoder, and any engine compiler
+which keeps track of the elements it has already compiled, only
+compiles each of them once.
+
+Two elements are identical if they are of the same class, have the same
+name and default value, have identical children and the same values for
+the attributes listed by their class' ``_intern_attributes``, as well as
+the same weight if one was set by a compound spec special.  Strings,
+numbers and sequences and dictionaries of these are compared by value,
+while other objects, such as actions, lists and rules, are compared by
+identity.  Elements of classes which don't define
+``_intern_attributes`` themselves are never replaced, although their
+children may be.
+
+Interned elements must not be modified afterwards, because the
+modification would affect every place where they are used.
+
+Interning is enabled for a grammar by setting its
+:attr:`Grammar.intern_elements` attribute to *True* before loading it.
+
+"""
+
+from six import string_types, integer_types, binary_type
+
+from .elements_basic import ElementBase
+from .elements_compound import Compound
+
+
+#---------------------------------------------------------------------------
+
+# Types of values which are compared by value instead of by identity.
+_value_types = string_types + integer_types + (binary_type, float,
+                                                type(None))
+
+# Attributes which can be set on any element by specials in compound
+#  specs, e.g. "{weight=2}".
+_special_attributes = ("weight",)
+
+
+class ElementInterner(object):
+    """
+        Replaces identical elements with a single instance.
+
+        Elements are interned using the :meth:`intern` method.  The same
+        interner can be used for several element trees, in which case
+        identical elements are shared between them.
+
+    """
+
+    def __init__(self):
+        self._table = {}
+        self._canonical = {}
+
+        # References to each interned element, so that the identities
+        #  used in keys remain valid.
+        self._elements = []
+
+    def intern(self, element):
+        """
+            Interns the given *element* and its descendants.
+
+            Returns the instance which should be used in place of
+            *element*.  This is *element* itself unless an identical
+            element was interned earlier.  The children of the given
+            elements are replaced with their interned instances if
+            possible.
+
+        """
+        # pylint: disable=protected-access
+        canonical = self._canonical.get(id(element))
+        if canonical is not None:
+            return canonical
+        self._elements.append(element)
+
+        # Intern the children first, so that identical children have the
+        #  same identity in this element's key.
+        children = tuple(element.children)
+        interned = tuple(self.intern(child) for child in children)
+        if interned != children and element._replace_children(interned):
+            children = interned
+
+        # Compound elements are given the interned instances of their
+        #  extras, because these may be looked up by identity in their
+        #  trees, e.g. by integer parsers.
+        if isinstance(element, Compound):
+            extras = dict((name, self._canonical.get(id(extra), extra))
+                          for name, extra in element._extras.items())
+            if any(extras[name] is not extra
+                   for name, extra in element._extras.items()):
+                element._extras = extras
+
+        canonical = element
+        attributes = vars(type(element)).get("_intern_attributes")
+        if attributes is not None:
+            key = (type(element), element.name,
+                   self._value_key(element._default),
+                   tuple(self._value_key(getattr(element, name))
+                         for name in attributes),
+                   tuple(self._value_key(getattr(element, name, None))
+                         for name in _special_attributes),
+                   tuple(id(child) for child in children))
+            canonical = self._table.setdefault(key, element)
+        self._canonical[id(element)] = canonical
+        return canonical
+
+    def _value_key(self, value):
+        # Return a hashable key for an attribute value.
+        if isinstance(value, ElementBase):
+            return (ElementBase, id(self._canonical.get(id(value), value)))
+        elif isinstance(value, (list, tuple)):
+            return (type(value),
+                    tuple(self._value_key(item) for item in value))
+        elif isinstance(value, dict):
+            return (dict, tuple((self._value_key(k), self._value_key(v))
+                                for k, v in value.items()))
+        elif isinstance(value, _value_types):
+            # Include the type so that e.g. 1, 1.0 and True differ.
+            return (type(value), value)
+        else:
+            self._elements.append(value)
+            return (object, id(value))
+
+
+def count_elements(rules):
+    """
+        Returns the number of distinct elements in the element trees of
+        the given rules, not including referenced rules.
+
+    """
+    seen = set()
+    stack = [rule.element for rule in rules if rule.element is not None]
+    while stack:
+        element = stack.pop()
+        if id(element) in seen:
+            continue
+        seen.add(id(element))
+        stack.extend(element.children)
+    return len(seen)
+
+
+def intern_rule_elements(rules):
+    """
+        Interns the element trees of the given rules.
+
+        Identical elements are shared between all of the rules.  Returns
+        the number of elements which were replaced.
+
+    """
+    # pylint: disable=protected-access
+    rules = [rule for rule in rules if rule.element is not None]
+    before = count_elements(rules)
+    interner = ElementInterner()
+    for rule in rules:
+        rule._element = interner.intern(rule.element)
+    return before - count_elements(rules)
@@ -40,8 +40,31 @@
 #""" % {"class": "list", "function": name})
 #   return "".join(output)
 #print construct_skeleton()
+#
+# The methods were since changed to pass the items they add and remove to
+# _update(), so that engines can be passed only the changed items.  Methods
+# which don't modify the list, such as __add__() and __reduce__(), are no
+# longer overridden.
+from collections import Counter
+from functools import wraps
+import threading
+
 from six import string_types
 
+# Lock held while a list is modified and its changes are recorded, and
+#  while the recorded changes are passed to the engine.  Deferred engine
+#  updates happen on another thread than most list modifications.
+_changes_lock = threading.RLock()
+
+
+def _locked(method):
+    # Decorator for list methods which modify the list.
+    @wraps(method)
+    def locked_method(self, *args, **kwargs):
+        with _changes_lock:
+            return method(self, *args, **kwargs)
+    return locked_method
+
 #===========================================================================
 # Base class for dragonfly list objects.
 
@@ -53,6 +76,20 @@ class ListBase(object):
         self._grammar = None
         self._batch_mode = False
         self._batch_updates = False
+        self._trie = None
+
+        # Number of modifications made to this list.  This is used to
+        #  invalidate information derived from its contents, such as the
+        #  first words of elements which reference it.
+        self._version = 0
+
+        # Counts of the list's items, kept up to date by modifications
+        #  while the list is part of a grammar, and whether each item
+        #  changed since the engine was last updated was present then.
+        #  The counts are None if the engine's next update should include
+        #  all items.
+        self._engine_items = None
+        self._changed_items = {}
 
     #-----------------------------------------------------------------------
     # Protected attribute access.
@@ -69,6 +106,7 @@ class ListBase(object):
 
     def _set_grammar(self, grammar):
         self._grammar = grammar
+        self._reset_delta()
         # if self._grammar is None:
         #     self._grammar = grammar
         # else:
@@ -87,32 +125,107 @@ class ListBase(object):
     def __exit__(self, exc_type, exc_value, exc_tb):
         self._batch_mode = False
         if self._batch_updates:
-            self._update()
+            # The changes were recorded by the methods called in the block.
+            with _changes_lock:
+                self._update((), ())
             self._batch_updates = False
 
     #-----------------------------------------------------------------------
     # Notify the grammar of a list modification.
 
-    def _update(self):
+    def _update(self, added=None, removed=None):
         """
         Internal method that notifies the engine of list updates.
 
         This method should be called internally by :class:`ListBase`sub-
-        classes when the list is modified.
+        classes when the list is modified.  The *added* and *removed*
+        arguments are the items added to and removed from the list by the
+        modification, if these are known.
         """
+        # Invalidate information derived from list contents.
+        self._version += 1
+        self._trie = None
+        self._record_changes(added, removed)
+
         # Return early for batch mode. A single update_list() call will
         # occur in __exit__(), after a 'with' block.
         if self._batch_mode:
             self._batch_updates = True
             return
 
-        # Validate list items.
-        self._validate_items()
-
-        # If this list is part of a grammar, then notify it of the list
-        # changes.
-        if self._grammar:
-            self._grammar.update_list(self)
+        # Validate list items and notify this list's grammar, if any, of
+        # the changes.  The engine may defer the notification, in which
+        # case the changes are still validated now.
+        grammar = self._grammar
+        if not grammar:
+            self._validate_items()
+        elif grammar.engine.defer_list_updates:
+            if self._engine_items is None:
+                self._validate_items()
+            grammar.engine.schedule_list_update(self)
+        else:
+            self._notify_grammar()
+
+    @_locked
+    def _notify_grammar(self):
+        # Pass the changes to this list's grammar, only the added and
+        #  removed items if possible.
+        grammar = self._grammar
+        if not grammar:
+            return
+        delta = self._get_delta()
+        if delta is None:
+            grammar.update_list(self)
+        else:
+            grammar.update_list_delta(self, *delta)
+
+    def _record_changes(self, added, removed):
+        # Update the item counts for a modification.  Unknown changes or
+        #  invalid added items require a full update.
+        counts = self._engine_items
+        if counts is None:
+            return
+        valid_types = self.valid_types
+        if (added is None or removed is None or
+                [True for i in added if not isinstance(i, valid_types)]):
+            self._reset_delta()
+            return
+        changed = self._changed_items
+        for item in removed:
+            changed.setdefault(item, True)
+            count = counts[item]
+            if count == 1:
+                del counts[item]
+            else:
+                counts[item] = count - 1
+        for item in added:
+            changed.setdefault(item, item in counts)
+            counts[item] = counts.get(item, 0) + 1
+
+    def _get_delta(self):
+        # Return sorted lists of the items added and removed since the
+        #  engine was last updated, or None if the engine should be
+        #  passed all items.  Items are compared as a set, because engine
+        #  lists don't depend on the order or number of duplicate items.
+        counts = self._engine_items
+        changed = self._changed_items
+        self._changed_items = {}
+        if counts is None:
+            self._validate_items()
+            self._engine_items = Counter(self.get_list_items())
+            return None
+        added = sorted(item for item, present in changed.items()
+                       if not present and item in counts)
+        removed = sorted(item for item, present in changed.items()
+                         if present and item not in counts)
+        return added, removed
+
+    @_locked
+    def _reset_delta(self):
+        # Make the next update pass all items to the engine, e.g. after
+        #  the list's grammar has been (re)loaded.
+        self._engine_items = None
+        self._changed_items = {}
 
     def _validate_items(self):
         valid_types = self.valid_types
@@ -126,6 +239,58 @@ class ListBase(object):
     def get_list_items(self):
         raise NotImplementedError("Call to virtual method list_items()")
 
+    #-----------------------------------------------------------------------
+    # Methods for matching recognized words to list items.
+
+    def _get_trie(self):
+        # Build a trie of the words of this list's items, if necessary.
+        #  Each node is a dictionary mapping words to child nodes.  Nodes
+        #  at the end of an item contain None as a key.
+        trie = self._trie
+        if trie is None:
+            trie = {}
+            for item in self:
+                if not isinstance(item, string_types):
+                    continue
+                node = trie
+                for word in item.split(" "):
+                    node = node.setdefault(word, {})
+                node[None] = True
+            self._trie = trie
+        return trie
+
+    def match_words(self, words):
+        """
+        Returns the numbers of leading words in the given iterable which
+        together are an item of this list, longest first.
+
+        Words are joined with spaces to form items, so recognized words
+        may themselves contain spaces.  Iteration stops at the first
+        *None* word.  The trie of words used for matching is rebuilt only
+        after the list is modified.
+
+        :param words: recognized words
+        :type words: iterable
+        :rtype: list
+        """
+        node = self._get_trie()
+        counts = []
+        count = 0
+        for word in words:
+            if word is None:
+                break
+            for part in word.split(" "):
+                node = node.get(part)
+                if node is None:
+                    break
+            if node is None:
+                break
+            count += 1
+            if None in node:
+                counts.append(count)
+        counts.reverse()
+        return counts
+
 
 #===========================================================================
 # Wrapper for Python's built-in list type.
@@ -160,62 +325,68 @@ class List(ListBase, list):
     #-----------------------------------------------------------------------
     # Overridden list methods.
 
-    def __add__(self, *args, **kwargs):
-        result = list.__add__(self, *args, **kwargs)
-        self._update(); return result
-    def __delitem__(self, *args, **kwargs):
-        result = list.__delitem__(self, *args, **kwargs)
-        self._update(); return result
+    @_locked
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        result = list.__delitem__(self, index)
+        self._update((), removed); return result
+    @_locked
     def __delslice__(self, *args, **kwargs):
         # pylint: disable=no-member
         result = list.__delslice__(self, *args, **kwargs)
         self._update(); return result
-    def __iadd__(self, *args, **kwargs):
-        result = list.__iadd__(self, *args, **kwargs)
-        self._update(); return result
+    @_locked
+    def __iadd__(self, other):
+        other = list(other)
+        result = list.__iadd__(self, other)
+        self._update(other, ()); return result
+    @_locked
     def __imul__(self, *args, **kwargs):
         result = list.__imul__(self, *args, **kwargs)
         self._update(); return result
-    def __mul__(self, *args, **kwargs):
-        result = list.__mul__(self, *args, **kwargs)
-        self._update(); return result
-    def __reduce__(self, *args, **kwargs):
-        result = list.__reduce__(self, *args, **kwargs)
-        self._update(); return result
-    def __reduce_ex__(self, *args, **kwargs):
-        result = list.__reduce_ex__(self, *args, **kwargs)
-        self._update(); return result
-    def __rmul__(self, *args, **kwargs):
-        result = list.__rmul__(self, *args, **kwargs)
-        self._update(); return result
-    def __setitem__(self, *args, **kwargs):
-        result = list.__setitem__(self, *args, **kwargs)
-        self._update(); return result
+    @_locked
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            removed, value = self[index], list(value)
+            added = value
+        else:
+            removed, added = [self[index]], [value]
+        result = list.__setitem__(self, index, value)
+        self._update(added, removed); return result
+    @_locked
     def __setslice__(self, *args, **kwargs):
         # pylint: disable=no-member
         result = list.__setslice__(self, *args, **kwargs)
         self._update(); return result
-    def append(self, *args, **kwargs):
-        result = list.append(self, *args, **kwargs)
-        self._update(); return result
-    def extend(self, *args, **kwargs):
-        result = list.extend(self, *args, **kwargs)
-        self._update(); return result
-    def insert(self, *args, **kwargs):
-        result = list.insert(self, *args, **kwargs)
-        self._update(); return result
+    @_locked
+    def append(self, item):
+        result = list.append(self, item)
+        self._update((item,), ()); return result
+    @_locked
+    def extend(self, other):
+        other = list(other)
+        result = list.extend(self, other)
+        self._update(other, ()); return result
+    @_locked
+    def insert(self, index, item):
+        result = list.insert(self, index, item)
+        self._update((item,), ()); return result
+    @_locked
     def pop(self, *args, **kwargs):
         result = list.pop(self, *args, **kwargs)
-        self._update(); return result
-    def remove(self, *args, **kwargs):
-        result = list.remove(self, *args, **kwargs)
-        self._update(); return result
+        self._update((), (result,)); return result
+    @_locked
+    def remove(self, item):
+        result = list.remove(self, item)
+        self._update((), (item,)); return result
+    @_locked
     def reverse(self, *args, **kwargs):
         result = list.reverse(self, *args, **kwargs)
-        self._update(); return result
+        self._update((), ()); return result
+    @_locked
     def sort(self, *args, **kwargs):
         result = list.sort(self, *args, **kwargs)
-        self._update(); return result
+        self._update((), ()); return result
     def clear(self):
         del self[:]
 
@@ -255,33 +426,37 @@ class DictList(ListBase, dict):
     #-----------------------------------------------------------------------
     # Overridden dict methods.
 
-    def __delitem__(self, *args, **kwargs):
-        result = dict.__delitem__(self, *args, **kwargs)
-        self._update(); return result
-    def __reduce__(self, *args, **kwargs):
-        result = dict.__reduce__(self, *args, **kwargs)
-        self._update(); return result
-    def __reduce_ex__(self, *args, **kwargs):
-        result = dict.__reduce_ex__(self, *args, **kwargs)
-        self._update(); return result
-    def __setitem__(self, *args, **kwargs):
-        result = dict.__setitem__(self, *args, **kwargs)
-        self._update(); return result
-    def clear(self, *args, **kwargs):
-        result = dict.clear(self, *args, **kwargs)
-        self._update(); return result
-    def fromkeys(self, *args, **kwargs):
-        result = dict.fromkeys(self, *args, **kwargs)
-        self._update(); return result
-    def pop(self, *args, **kwargs):
-        result = dict.pop(self, *args, **kwargs)
-        self._update(); return result
-    def popitem(self, *args, **kwargs):
-        result = dict.popitem(self, *args, **kwargs)
-        self._update(); return result
-    def setdefault(self, *args, **kwargs):
-        result = dict.setdefault(self, *args, **kwargs)
-        self._update(); return result
+    @_locked
+    def __delitem__(self, key):
+        result = dict.__delitem__(self, key)
+        self._update((), (key,)); return result
+    @_locked
+    def __setitem__(self, key, value):
+        added = () if key in self else (key,)
+        result = dict.__setitem__(self, key, value)
+        self._update(added, ()); return result
+    @_locked
+    def clear(self):
+        removed = list(self)
+        result = dict.clear(self)
+        self._update((), removed); return result
+    @_locked
+    def pop(self, key, *args):
+        removed = (key,) if key in self else ()
+        result = dict.pop(self, key, *args)
+        self._update((), removed); return result
+    @_locked
+    def popitem(self):
+        result = dict.popitem(self)
+        self._update((), (result[0],)); return result
+    @_locked
+    def setdefault(self, key, *args):
+        added = () if key in self else (key,)
+        result = dict.setdefault(self, key, *args)
+        self._update(added, ()); return result
+    @_locked
     def update(self, *args, **kwargs):
-        result = dict.update(self, *args, **kwargs)
-        self._update(); return result
+        other = dict(*args, **kwargs)
+        added = [key for key in other if key not in self]
+        result = dict.update(self, other)
+        self._update(added, ()); return result
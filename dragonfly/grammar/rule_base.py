@@ -28,7 +28,9 @@ Rule class
 
 import logging
 
-from .context import Context
+from ._util import method_function
+from .context import Context, match_cache
+from .state import State
 from ..error import GrammarError
 
 
@@ -70,6 +72,14 @@ class Rule(object):
     # Counter ID used for anonymous rules to give them a unique name.
     _next_anonymous_id = 0
 
+    # Whether recognitions are decoded using a compiled decoder instead of
+    #  the generator-based decode() methods.
+    compiled_decoding = True
+
+    # Counter incremented whenever the enabled state, context or active
+    #  state of any rule changes.
+    _state_count = 0
+
     def __init__(self, name=None, element=None, context=None,
                  imported=False, exported=True):
         # The default argument for *element* is NOT acceptable; this
@@ -93,6 +103,7 @@ class Rule(object):
                             "None")
         self._context = context
         self._grammar = None
+        self._decoder = None
 
     def __repr__(self):
         return "%s(%s)" % (self.__class__.__name__, self._name)
@@ -127,6 +138,7 @@ class Rule(object):
 
         """
         self._enabled = True
+        Rule._state_count += 1
         self.activate()
 
     def disable(self):
@@ -137,6 +149,7 @@ class Rule(object):
 
         """
         self._enabled = False
+        Rule._state_count += 1
         if self._active:
             self.deactivate()
 
@@ -176,6 +189,7 @@ class Rule(object):
             raise TypeError("context must be either a Context object or "
                             "None")
         self._context = context
+        Rule._state_count += 1
 
     context = property(lambda self: self._context,
                        doc="This rule's context, under which it will be "
@@ -213,7 +227,8 @@ class Rule(object):
                 self.deactivate()
             return
         if self._context:
-            if self._context.matches(executable, title, handle):
+            if match_cache.matches(self._context, executable, title,
+                                   handle):
                 if not self._active:
                     self.activate()
                 self._process_begin()
@@ -234,8 +249,12 @@ class Rule(object):
                 self.deactivate()
             return
         if not self._active or force:
-            self._grammar.activate_rule(self)
+            # Private rules may be shared by several grammars and are
+            #  never activated in the engine.
+            if self._exported:
+                self._grammar.activate_rule(self)
             self._active = True
+            Rule._state_count += 1
 
     def deactivate(self):
         if not self._grammar:
@@ -243,11 +262,13 @@ class Rule(object):
                                "before it is bound to a grammar.")
         if self._active:
             try:
-                self._grammar.deactivate_rule(self)
+                if self._exported:
+                    self._grammar.deactivate_rule(self)
             except Exception as e:
                 self._log.warning("Failed to deactivate rule: %s (%s)",
                                   self, e)
             self._active = False
+            Rule._state_count += 1
 
     #-----------------------------------------------------------------------
     # Compilation related methods.
@@ -268,6 +289,22 @@ class Rule(object):
         else:
             return []
 
+    def first_words(self):
+        """
+            Returns a 2-tuple containing the set of lowercase words with
+            which a recognition of this rule can begin and whether this
+            rule can match without any words.
+
+            See :meth:`ElementBase.first_words` for details.  The set is
+            *None* if a recognition can begin with any word, e.g. if this
+            rule overrides :meth:`decode`.
+
+        """
+        if (self._element is None or method_function(type(self).decode)
+                is not method_function(Rule.decode)):
+            return None, True
+        return self._element.first_words()
+
     #-----------------------------------------------------------------------
     # Methods for decoding and evaluating recognitions.
 
@@ -281,6 +318,130 @@ class Rule(object):
 
         state.decode_failure(self)
 
+    def compile_decoder(self):
+        """
+            Compile this rule's element tree for use by
+            :meth:`decode_complete`.
+
+            This method is called automatically when the rule's grammar
+            is loaded.  It should be called again if the rule's element
+            tree is modified after that.
+
+        """
+        from .decoder import CompiledDecoder
+        self._decoder = CompiledDecoder(self)
+        return self._decoder
+
+    def decode_complete(self, state):
+        """
+            Decode the complete recognition stored in the given *state*.
+
+            Returns *True* if this rule matches all of the recognized
+            words, in which case the parse tree can be built using
+            *state.build_parse_tree()*.  Returns *False* otherwise.
+
+            The rule's compiled decoder is used if
+            :attr:`compiled_decoding` is *True* and the decoding steps of
+            *state* are not traced, i.e. decode logging is disabled and
+            no decoding tracer is installed.  Otherwise the generator
+            returned by :meth:`decode` is used.
+
+        """
+        # pylint: disable=protected-access
+        if self.compiled_decoding and not state._trace:
+            decoder = self._decoder
+            if decoder is None:
+                decoder = self.compile_decoder()
+            return decoder.decode(state)
+
+        for _ in self.decode(state):
+            if state.finished():
+                return True
+        return False
+
+    def decode_complete_all(self, state, limit=None, max_steps=None):
+        """
+            Iterate through the complete decodings of the recognition
+            stored in the given *state*.
+
+            Yields *state* each time this rule matches all of the
+            recognized words.  The parse tree of each decoding can be
+            built using *state.build_parse_tree()* before iteration
+            continues.  The first decoding is the one found by
+            :meth:`decode_complete`.
+
+            Arguments:
+             - *limit* (*int*, default: *None*) --
+               the maximum number of decodings to yield; iteration stops
+               as soon as this many have been found
+             - *max_steps* (*int*, default: *None*) --
+               the maximum number of matches of this rule to examine,
+               whether or not they consume all of the recognized words;
+               this bounds the cost of rules with very many possible
+               decodings.  Compiled and generator-based decoding count
+               steps in the same way, so they yield the same decodings
+               for the same *max_steps*.
+
+        """
+        # pylint: disable=protected-access
+        if limit is not None and limit <= 0:
+            return
+        if max_steps is not None and max_steps <= 0:
+            return
+        if self.compiled_decoding and not state._trace:
+            decoder = self._decoder
+            if decoder is None:
+                decoder = self.compile_decoder()
+            decodings = decoder.decode_all(state, max_steps)
+        else:
+            decodings = self._decode_all(state, max_steps)
+
+        count = 0
+        for _ in decodings:
+            yield state
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+    def _decode_all(self, state, max_steps):
+        # Generator-based equivalent of CompiledDecoder.decode_all().
+        for _ in self.decode(state):
+            if state.finished():
+                yield state
+            if max_steps is not None:
+                max_steps -= 1
+                if max_steps <= 0:
+                    return
+
+    def decode_all(self, words, limit=None, max_steps=None):
+        """
+            Returns a list of the parse trees of the complete decodings
+            of the given *words* by this rule.
+
+            *words* is a sequence of words or of *(word, rule_id)*
+            2-tuples as used by engine back-ends.  Plain words are given
+            rule id 0, i.e. they are attributed to the grammar's first
+            rule, so they are treated as grammar words rather than
+            dictation on both decoding paths.  The *limit*
+            and *max_steps* arguments are passed to
+            :meth:`decode_complete_all`.
+
+            This method can be used to detect ambiguous rules.
+
+        """
+        results = [word if isinstance(word, tuple) else (word, 0)
+                   for word in words]
+        if self._grammar is not None:
+            engine = self._grammar.engine
+            rule_names = self._grammar.rule_names
+        else:
+            from ..engines import get_engine
+            engine = get_engine()
+            rule_names = (self._name,)
+        state = State(results, rule_names, engine)
+        return [state.build_parse_tree() for _ in
+                self.decode_complete_all(state, limit, max_steps)]
+
     def value(self, node):
         """
             Start of phrase callback.
@@ -129,6 +129,14 @@ class CompoundRule(Rule):
         self._defaults = dict(defaults)
 
         child = Compound(spec, extras=self._extras)
+        self._compound = child
+
+        # Default values of the extras elements, which are used for any
+        #  extras not spoken.
+        self._extras_defaults = dict((name, element.default)
+                                     for name, element
+                                     in self._extras.items()
+                                     if element.has_default())
         Rule.__init__(self, name, child, exported=exported, context=context)
 
     #-----------------------------------------------------------------------
@@ -150,12 +158,8 @@ class CompoundRule(Rule):
             "_node":     node,
         }
         extras.update(self._defaults)
-        for name, element in self._extras.items():
-            extra_node = node.get_child_by_name(name, shallow=True)
-            if extra_node:
-                extras[name] = extra_node.value()
-            elif element.has_default():
-                extras[name] = element.default
+        extras.update(self._extras_defaults)
+        extras.update(self._compound.get_extras_values(node))
 
         # Call the method to do the actual processing.
         self._process_recognition(node, extras)
@@ -143,6 +143,17 @@ class MappingRule(Rule):
         self._extras   = {element.name : element for element in extras}
         self._defaults = defaults
 
+        # Default values of the extras elements, which are used for any
+        #  extras not spoken.
+        self._extras_defaults = dict((name, element.default)
+                                     for name, element
+                                     in self._extras.items()
+                                     if element.has_default())
+
+        # The root node and extras dict of the last recognition, which
+        #  is shared by value() and process_recognition().
+        self._last_extras = None
+
         children = []
         for spec, value in self._mapping.items():
             c = Compound(spec, elements=self._extras, value=value)
@@ -163,25 +174,44 @@ class MappingRule(Rule):
         """
         return [k for k, _ in self._mapping.items()]
 
-    def value(self, node):
-        node = node.children[0]
-        value = node.value()
+    def _get_extras(self, node):
+        # Return the *extras* dict for the recognition with the given
+        #  root node.  Only the extras which the recognized spec can
+        #  contain are looked up, in one walk of the parse tree.
+        last_extras = self._last_extras
+        if last_extras is not None and last_extras[0] is node:
+            return last_extras[1]
 
-        if hasattr(value, "copy_bind"):
-            # Prepare *extras* dict for passing to _copy_bind().
-            extras = {
-                "_grammar":  self.grammar,
-                "_rule":     self,
-                "_node":     node,
-            }
-            extras.update(self._defaults)
-            for name, element in self._extras.items():
+        extras = {
+            "_grammar":  self.grammar,
+            "_rule":     self,
+            "_node":     node,
+        }
+        extras.update(self._defaults)
+        extras.update(self._extras_defaults)
+
+        # Find the Compound element of the recognized spec.
+        element_node = node.children[0]
+        if (element_node.children
+                and isinstance(element_node.children[0].actor, Compound)):
+            compound = element_node.children[0].actor
+            extras.update(compound.get_extras_values(node))
+        else:
+            for name in self._extras:
                 extra_node = node.get_child_by_name(name, shallow=True)
                 if extra_node:
                     extras[name] = extra_node.value()
-                elif element.has_default():
-                    extras[name] = element.default
 
+        self._last_extras = (node, extras)
+        return extras
+
+    def value(self, node):
+        value = node.children[0].value()
+
+        if hasattr(value, "copy_bind"):
+            # Prepare *extras* dict for passing to _copy_bind().
+            extras = dict(self._get_extras(node))
+            extras["_node"] = node.children[0]
             value = value.copy_bind(extras)
 
         return value
@@ -200,18 +230,9 @@ class MappingRule(Rule):
         item_value = node.value()
 
         # Prepare *extras* dict for passing to _process_recognition().
-        extras = {
-            "_grammar":  self.grammar,
-            "_rule":     self,
-            "_node":     node,
-        }
-        extras.update(self._defaults)
-        for name, element in self._extras.items():
-            extra_node = node.get_child_by_name(name, shallow=True)
-            if extra_node:
-                extras[name] = extra_node.value()
-            elif element.has_default():
-                extras[name] = element.default
+        #  It is usually already built by value().
+        extras = self._get_extras(node)
+        self._last_extras = None
 
         # Call the method to do the actual processing.
         self._process_recognition(item_value, extras)
@@ -38,6 +38,18 @@ class State(object):
 
     _log_decode = getLogger("grammar.decode")
 
+    # Whether elements which failed to decode at a given word index are
+    #  remembered during decoding, so that further attempts to decode them
+    #  at that index fail immediately.
+    memoize_failures = True
+
+    # Maximum number of decoding failures remembered during decoding.
+    failure_memo_size = 10000
+
+    # Tracer which is notified of each decoding step of states created
+    #  while it is set, e.g. a DecodeTracer object.
+    tracer = None
+
     # -----------------------------------------------------------------------
     # Methods for initialization.
 
@@ -49,9 +61,17 @@ class State(object):
         self._data = {}
         self._depth = 0
         self._stack = []
+        self._failures = set()
         self.initialize_decoding()
         self._previous_index = None
 
+        # Decoding steps are only traced if decode logging is enabled or
+        #  a tracer is set when the state is created.
+        self._tracer = self.tracer
+        self._log_steps = bool(self._log_decode
+                               and self._log_decode.isEnabledFor(DEBUG))
+        self._trace = self._log_steps or self._tracer is not None
+
     def __repr__(self):
         if PY2:
             return self.__unicode__().encode(getpreferredencoding())
@@ -127,17 +147,45 @@ class State(object):
     def initialize_decoding(self):
         self._depth = 0
         self._stack = []
+        self._failures = set()
         self._previous_index = None
 
+    def known_failure(self, element, index=None):
+        """
+            Whether *element* is known to fail to decode at the given
+            word *index*, or at the current index if *index* is *None*.
+
+        """
+        if index is None:
+            index = self._index
+        return (element, index) in self._failures
+
+    def memoize_failure(self, element, index=None):
+        """
+            Remember that *element* failed to decode at the given word
+            *index*, or at the current index if *index* is *None*.
+
+            Nothing is remembered if failure memoization is disabled or
+            if the maximum number of failures has been reached.
+
+        """
+        if index is None:
+            index = self._index
+        if (self.memoize_failures
+                and len(self._failures) < self.failure_memo_size):
+            self._failures.add((element, index))
+
     def decode_attempt(self, element):
         self._depth += 1
         self._stack.append(State.Frame(self._depth, element, self._index))
-        self._log_step(element, "attempt")
+        if self._trace:
+            self._trace_step(element, "attempt")
 
     def decode_retry(self, element):
         frame = self._get_frame_from_actor(element)
         self._depth = frame.depth
-        self._log_step(element, "retry")
+        if self._trace:
+            self._trace_step(element, "retry")
 
     def decode_rollback(self, element):
         frame = self._get_frame_from_depth()
@@ -148,10 +196,12 @@ class State(object):
             self._index = frame.begin
         else:
             raise GrammarError("Recognition decoding stack broken")
-        self._log_step(element, "rollback")
+        if self._trace:
+            self._trace_step(element, "rollback")
 
     def decode_success(self, element):
-        self._log_step(element, "success")
+        if self._trace:
+            self._trace_step(element, "success")
         frame = self._get_frame_from_depth()
         if not frame or frame.actor != element:
             raise GrammarError("Recognition decoding stack broken.")
@@ -162,7 +212,8 @@ class State(object):
         frame = self._stack.pop()
         self._index = frame.begin
         self._depth = frame.depth
-        self._log_step(element, "failure")
+        if self._trace:
+            self._trace_step(element, "failure")
         self._depth -= 1
 
     def _get_frame_from_depth(self):
@@ -179,9 +230,13 @@ class State(object):
                 return frame
         return None
 
+    def _trace_step(self, element, event):
+        if self._log_steps:
+            self._log_step(element, event)
+        if self._tracer is not None:
+            self._tracer.trace_step(self, element, event)
+
     def _log_step(self, parser, message):
-        if not self._log_decode or not self._log_decode.isEnabledFor(DEBUG):
-            return
         indent = u"   " * self._depth
         output = u"%s%s: %s" % (indent, message, parser)
         if isinstance(output, binary_type):
@@ -220,7 +275,8 @@ class State(object):
 class Node(object):
 
     __slots__ = ("parent", "children", "actor", "results",
-                 "begin", "end", "depth", "engine")
+                 "begin", "end", "depth", "engine", "_names",
+                 "_shallow_names")
 
     # pylint: disable=too-many-arguments
     def __init__(self, parent, actor, results, begin, end, depth, engine):
@@ -232,6 +288,8 @@ class Node(object):
         self.depth = depth
         self.engine = engine
         self.children = []
+        self._names = None
+        self._shallow_names = None
 
     def __repr__(self):
         return "Node: %s, %s" % (self.actor, self.words())
@@ -257,40 +315,55 @@ class Node(object):
         return self.actor.name
     name = property(_get_name)
 
+    def _get_name_index(self, shallow):
+        # Return a dictionary mapping names to the nodes below this node
+        #  with that name, in depth-first order.  The index is built on
+        #  the first lookup, so that looking up several names only walks
+        #  the tree once.
+        if shallow:
+            names = self._shallow_names
+        else:
+            names = self._names
+        if names is not None:
+            return names
+
+        names = {}
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            name = node.name
+            if name:
+                if name in names:
+                    names[name].append(node)
+                else:
+                    names[name] = [node]
+                if shallow:
+                    # If shallow, don't look past named nodes.
+                    continue
+            stack.extend(reversed(node.children))
+
+        if shallow:
+            self._shallow_names = names
+        else:
+            self._names = names
+        return names
+
     def has_child_with_name(self, name):
         """True if at least one node below this node has the given name."""
-        for child in self.children:
-            if child.name == name:
-                return True
-            if child.has_child_with_name(name):
-                return True
-        return False
+        if not name:
+            return any(child.name == name or child.has_child_with_name(name)
+                       for child in self.children)
+        return name in self._get_name_index(False)
 
     def get_child_by_name(self, name, shallow=False):
         """Get one node below this node with the given name."""
-        for child in self.children:
-            if child.name:
-                if child.name == name:
-                    return child
-                if shallow:
-                    # If shallow, don't look past named children.
-                    continue
-            match = child.get_child_by_name(name, shallow)
-            if match:
-                return match
+        nodes = self._get_name_index(shallow).get(name)
+        if nodes:
+            return nodes[0]
         return None
 
     def get_children_by_name(self, name, shallow=False):
         """
         Get all nodes below this node with the given name.
         """
-        matches = []
-        for child in self.children:
-            if child.name:
-                if child.name == name:
-                    matches.append(child)
-                if shallow:
-                    # If shallow, don't look past named children.
-                    continue
-            matches.extend(child.get_children_by_name(name, shallow))
-        return matches
+        return list(self._get_name_index(shallow).get(name, ()))
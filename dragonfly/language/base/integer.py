@@ -24,9 +24,11 @@ elements.
 
 """
 
+import weakref
+
 from ..loader            import language
 from ...grammar.elements import (Alternative, Sequence, Optional,
-                                 Compound, ListRef, RuleWrap)
+                                 Compound, ListRef, RuleRef, RuleWrap)
 from ...grammar.list     import  List
 
 
@@ -35,8 +37,14 @@ from ...grammar.list     import  List
 
 class Integer(Alternative):
 
+    __slots__ = ("_builders", "_min", "_max", "_parser")
+
     _content = None
 
+    # Integer.decode() finds the same decodings as Alternative.decode(),
+    #  in the same order, only faster.
+    _lookahead_decode = True
+
     @classmethod
     def _set_content(cls, content):
         """
@@ -63,6 +71,7 @@ class Integer(Alternative):
         self._min = min; self._max = max
         children = self._build_children(min, max)
         Alternative.__init__(self, children, name=name, default=default)
+        self._parser = None
 
     #-----------------------------------------------------------------------
     # Methods for runtime introspection.
@@ -79,25 +88,109 @@ class Integer(Alternative):
     #-----------------------------------------------------------------------
     # Methods for load-time setup.
 
+    _intern_attributes = ("_content", "_min", "_max")
+
     def _build_children(self, min, max):
-        children = [c.build_element(min, max)
-                    for c in self._builders]
-        return [c for c in children if c]
+        # Integer elements with the same content and range share their
+        #  children, because building them is expensive and they are
+        #  never modified.
+        return self._content.build_elements(min, max)
+
+    def _get_parser(self):
+        if self._parser is None:
+            self._parser = self._content.get_parser(self._min, self._max)
+        return self._parser
+
+    #-----------------------------------------------------------------------
+    # Methods for runtime recognition processing.
+
+    def decode(self, state):
+        # Find the words at the current position which can be part of an
+        #  integer and parse them directly instead of decoding the
+        #  children.  The decodings are yielded in the same order as
+        #  decoding the children would yield them.
+        parser = self._get_parser()
+        vocabulary = parser.vocabulary
+        words = []
+        word = state.word()
+        while word is not None and word.lower() in vocabulary:
+            words.append(word)
+            word = state.word(len(words))
+
+        ends = parser.parse_ends(words)
+        if ends is None:
+            # The words are ambiguous, so decode the children.
+            for result in Alternative.decode(self, state):
+                yield result
+            return
+
+        state.decode_attempt(self)
+        for end in ends:
+            state.next(end)
+            state.decode_success(self)
+            yield state
+            state.decode_retry(self)
+            state.decode_rollback(self)
+        state.decode_failure(self)
+
+    def value(self, node):
+        # Parse tree nodes of directly parsed integers have no children.
+        if not node.children:
+            return self._get_parser().parse(node.words())
+        return Alternative.value(self, node)
 
 
 #---------------------------------------------------------------------------
 # Integer reference class.
 
+# Private rules wrapping integer elements, keyed by language content and
+#  range.  Integer references with the same content and range refer to
+#  the same rule.  This is safe because private rules are never activated
+#  or processed themselves and may be added to more than one grammar.
+#  Rules are only kept while integer references still refer to them.
+_integer_rules = weakref.WeakValueDictionary()
+
+
+def _wrap_integer(ref, name, min, max, default, content):
+    key = (content, min, max)
+    rule = None
+    if ref.share_rules:
+        rule = _integer_rules.get(key)
+    if rule is None:
+        element = Integer(None, min, max, content=content)
+        RuleWrap.__init__(ref, name, element, default=default)
+        if ref.share_rules:
+            _integer_rules[key] = ref.rule
+    else:
+        RuleRef.__init__(ref, rule=rule, name=name, default=default)
+
+
 class IntegerRef(RuleWrap):
 
+    __slots__ = ()
+
+    # Whether integer references with the same language content and range
+    #  share one private rule.
+    share_rules = True
+
     def __init__(self, name, min, max, default=None):
-        element = Integer(None, min, max)
-        RuleWrap.__init__(self, name, element, default=default)
+        content = Integer._content or language.IntegerContent
+        _wrap_integer(self, name, min, max, default, content)
+
+    _intern_attributes = RuleWrap._intern_attributes
 
 class ShortIntegerRef(RuleWrap):
 
+    __slots__ = ()
+
+    # Whether integer references with the same language content and range
+    #  share one private rule.
+    share_rules = True
+
     def __init__(self, name, min, max, default=None):
-        element = Integer(None, min, max, content=language.ShortIntegerContent)
-        RuleWrap.__init__(self, name, element, default=default)
+        content = language.ShortIntegerContent
+        _wrap_integer(self, name, min, max, default, content)
+
+    _intern_attributes = RuleWrap._intern_attributes
 
 #---------------------------------------------------------------------------
@@ -25,7 +25,7 @@ elements.
 """
 
 from ...grammar.elements  import (Alternative, Sequence, Optional,
-                                  Compound, ListRef)
+                                  Compound, ListRef, Literal, Empty)
 from ...grammar.list      import List
 
 
@@ -196,6 +196,8 @@ class MagnitudeIntBuilder(IntBuilderBase):
 
 class Collection(Compound):
 
+    __slots__ = ("_element",)
+
     _element_name = "element"
     _default_value = None
 
@@ -212,6 +214,8 @@ class Collection(Compound):
 
 class Magnitude(Compound):
 
+    __slots__ = ("_factor", "_mul", "_rem")
+
     _mul_default = 1
     _rem_default = 0
 
@@ -236,8 +240,272 @@ class Magnitude(Compound):
         return multiplier * self._factor + remainder
 
 
+#---------------------------------------------------------------------------
+# Parser for the words of integer elements.
+
+class IntParser(object):
+    """
+        Parser which converts spoken words directly into an integer value.
+
+        The parser interprets the elements built by the integer builders
+        for a given range.  It therefore accepts the same words and
+        returns the same values as decoding those elements, but parses
+        each element only once at each word position and doesn't need
+        a decoding state.
+
+        Constructor argument:
+         - *elements* (*list*) --
+           the elements built by the integer builders
+
+    """
+
+    def __init__(self, elements):
+        self._elements = tuple(elements)
+        self._extras = {}
+        self._vocabulary = set()
+        try:
+            for element in self._elements:
+                self._prepare(element)
+        except TypeError:
+            # Elements which the parser cannot interpret were found, so
+            #  the parser accepts nothing.
+            self._vocabulary = set()
+        self._vocabulary = frozenset(self._vocabulary)
+        self._last = (None, None)
+        self._last_ends = (None, None)
+
+    vocabulary = property(lambda self: self._vocabulary,
+                          doc="Set of all lowercase words which can be"
+                              " part of a spoken integer.")
+
+    def _prepare(self, element):
+        # Collect the vocabulary of the given element and the extras of
+        #  its compound elements, checking that they can be interpreted.
+        if isinstance(element, Compound):
+            if (not isinstance(element, (Magnitude, Collection))
+                    and element._value is None):
+                raise TypeError("Compound element without value: %r"
+                                % element)
+            self._get_extras(element)
+        elif isinstance(element, Literal):
+            self._vocabulary.update(w.lower() for w in element.words)
+        elif isinstance(element, ListRef):
+            if element.list:
+                raise TypeError("Non-empty list reference: %r" % element)
+        elif type(element) not in (Alternative, Sequence, Optional, Empty):
+            raise TypeError("Unsupported element: %r" % element)
+        for child in element.children:
+            self._prepare(child)
+
+    #-----------------------------------------------------------------------
+    # Methods for parsing.
+
+    def parse(self, words):
+        """
+            Returns the integer value of the given words, or *None* if
+            they are not a spoken integer or if they can have more than
+            one value.
+
+        """
+        words = tuple(word.lower() for word in words)
+        if self._last[0] == words:
+            return self._last[1]
+        value = None
+        vocabulary = self._vocabulary
+        if words and all(word in vocabulary for word in words):
+            values = set()
+            end = len(words)
+            memo = {}
+            for element in self._elements:
+                values.update(v for e, v in
+                              self._parse_value(element, words, 0, memo)
+                              if e == end)
+            if len(values) == 1:
+                value = values.pop()
+        self._last = (words, value)
+        return value
+
+    def parse_ends(self, words):
+        """
+            Returns a list of the numbers of words at the start of the
+            given words which are a spoken integer, in the order in
+            which decoding the elements would find them, including
+            repeats.  Returns *None* if the elements cannot be
+            interpreted or if any of those numbers of words can have
+            more than one value.
+
+        """
+        words = tuple(word.lower() for word in words)
+        if self._last_ends[0] == words:
+            return self._last_ends[1]
+        ends = None
+        if self._vocabulary:
+            results = []
+            memo = {}
+            for element in self._elements:
+                results.extend(self._parse_value(element, words, 0, memo))
+            values = {}
+            for end, value in results:
+                values.setdefault(end, set()).add(value)
+            if all(len(v) == 1 for v in values.values()):
+                ends = [end for end, _ in results]
+        self._last_ends = (words, ends)
+        return ends
+
+    def _get_extras(self, element):
+        # Return the identities of the extras of the given compound
+        #  element.  They are looked up again if the element's extras were
+        #  replaced, e.g. by interning.
+        # pylint: disable=protected-access
+        extras, identities = self._extras.get(id(element), (None, None))
+        if extras is not element._extras:
+            extras = element._extras
+            identities = frozenset(id(e) for e in extras.values())
+            self._extras[id(element)] = (extras, identities)
+        return identities
+
+    def _parse_value(self, element, words, index, memo):
+        # Return a list of (end, value) tuples for each way the given
+        #  element can be parsed beginning at *index*.
+        key = (True, id(element), index)
+        results = memo.get(key)
+        if results is not None:
+            return results
+
+        if isinstance(element, Compound):
+            extras = self._get_extras(element)
+            parsed = self._parse_structure(element.children[0], extras,
+                                           words, index, memo)
+            if isinstance(element, Magnitude):
+                results = [(end, self._magnitude_value(element, bindings))
+                           for end, bindings in parsed]
+            elif isinstance(element, Collection):
+                results = [(end, self._collection_value(element, bindings))
+                           for end, bindings in parsed]
+            else:
+                results = [(end, element._value) for end, _ in parsed]
+        elif type(element) is Alternative:
+            results = []
+            for child in element.children:
+                results.extend(self._parse_value(child, words, index, memo))
+        else:
+            results = [(end, None) for end, _ in
+                       self._parse_structure(element, (), words, index,
+                                             memo)]
+
+        memo[key] = results
+        return results
+
+    @staticmethod
+    def _first_values(bindings):
+        # Return a dictionary of the first value bound to each name, the
+        #  same as the nodes found by Node.get_child_by_name().
+        return dict(reversed(bindings))
+
+    def _magnitude_value(self, element, bindings):
+        # pylint: disable=protected-access
+        values = self._first_values(bindings)
+        multiplier = values.get(element._mul.name, element._mul_default)
+        remainder = values.get(element._rem.name, element._rem_default)
+        return multiplier * element._factor + remainder
+
+    def _collection_value(self, element, bindings):
+        # pylint: disable=protected-access
+        values = self._first_values(bindings)
+        return values.get(element._element_name, element._default_value)
+
+    def _parse_structure(self, element, extras, words, index, memo):
+        # Return a list of (end, bindings) tuples for each way the given
+        #  element can be parsed beginning at *index*.  The bindings are
+        #  (name, value) tuples of the extras parsed, in order.
+        if id(element) in extras:
+            return [(end, ((element.name, value),)) for end, value
+                    in self._parse_value(element, words, index, memo)]
+
+        key = (False, id(element), index)
+        results = memo.get(key)
+        if results is not None:
+            return results
+
+        if isinstance(element, Literal):
+            end = index + len(element.words)
+            if tuple(w.lower() for w in element.words) == words[index:end]:
+                results = [(end, ())]
+            else:
+                results = []
+        elif isinstance(element, Sequence):
+            results = [(index, ())]
+            for child in element.children:
+                results = [(end, bindings + child_bindings)
+                           for begin, bindings in results
+                           for end, child_bindings
+                           in self._parse_structure(child, extras, words,
+                                                    begin, memo)]
+        elif isinstance(element, Optional):
+            results = (self._parse_structure(element.children[0], extras,
+                                             words, index, memo)
+                       + [(index, ())])
+        elif isinstance(element, Empty):
+            results = [(index, ())]
+        elif isinstance(element, Alternative):
+            results = []
+            for child in element.children:
+                results.extend(self._parse_structure(child, extras, words,
+                                                     index, memo))
+        else:
+            # Only empty list references remain, which match nothing.
+            results = []
+
+        memo[key] = results
+        return results
+
+
 #---------------------------------------------------------------------------
 # Integer content class.
 
 class IntegerContentBase(object):
     builders = None
+
+    # Elements and parsers built for each content class and range.
+    _elements_cache = {}
+    _parser_cache = {}
+
+    @classmethod
+    def build_elements(cls, min, max):
+        """
+            Returns the elements built by this content's builders for the
+            range *min* to *max*.  Elements are only built once for each
+            range and are shared by all integer elements using it.
+
+        """
+        key = (cls, min, max)
+        elements = cls._elements_cache.get(key)
+        if elements is None:
+            elements = [b.build_element(min, max) for b in cls.builders]
+            elements = [e for e in elements if e]
+            cls._elements_cache[key] = elements
+        return elements
+
+    @classmethod
+    def get_parser(cls, min, max):
+        """
+            Returns an :class:`IntParser` for this content's integers in
+            the range *min* to *max*.
+
+        """
+        key = (cls, min, max)
+        parser = cls._parser_cache.get(key)
+        if parser is None:
+            parser = IntParser(cls.build_elements(min, max))
+            cls._parser_cache[key] = parser
+        return parser
+
+    @classmethod
+    def parse_words(cls, words, min, max):
+        """
+            Returns the value of the given spoken integer words in the
+            range *min* to *max*, or *None* if the words are not a
+            spoken integer in that range.
+
+        """
+        return cls.get_parser(min, max).parse(words)
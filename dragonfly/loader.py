@@ -22,13 +22,25 @@
 Command module loading classes
 ============================================================================
 
+Command modules can be given a *snapshot_dir* directory in which to save
+snapshots of the compound specs parsed while loading them.  When a
+module is loaded again, e.g. on the next start, the specs are taken from
+its snapshot instead of being parsed again.  Specs which are not in the
+snapshot are parsed as usual.  A module's snapshot is saved again when
+the module uses different specs, whether because of changes to the
+module itself or to the modules it imports.
+
 """
 
+import hashlib
+import json
 import os.path
 import logging
 
 import six
 
+from .parsing.parse import spec_cache
+
 # --------------------------------------------------------------------------
 # Command module class; wraps a single command-module.
 
@@ -37,8 +49,9 @@ class CommandModule(object):
 
     _log = logging.getLogger("module")
 
-    def __init__(self, path):
+    def __init__(self, path, snapshot_dir=None):
         self._path = os.path.abspath(path)
+        self._snapshot_dir = snapshot_dir
         self._namespace = None
         self._loaded = False
 
@@ -57,20 +70,73 @@ class CommandModule(object):
         namespace = {"__file__": self._path}
 
         # Attempt to execute the module; handle any exceptions.
+        recording = None
         try:
             # pylint: disable=exec-used
             # Read from the file in binary mode to avoid decoding issues.
             with open(self._path, "rb") as f:
                 contents = f.read()
+            if self._snapshot_dir:
+                snapshot_tag = self._load_snapshot()
+                recording = spec_cache.start_recording()
             exec(compile(contents, self._path, 'exec'), namespace)
         except Exception as e:
             self._log.exception("%s: Error loading module: %s", self, e)
             self._loaded = False
             return
+        finally:
+            if recording is not None:
+                spec_cache.stop_recording(recording)
 
         self._loaded = True
         self._namespace = namespace
 
+        # Save a new snapshot if the module used different specs.
+        if recording is not None:
+            tag = self._get_snapshot_tag(recording)
+            if snapshot_tag != tag:
+                self._save_snapshot(recording, tag)
+            else:
+                self._log.debug("%s: Snapshot is up to date", self)
+
+    def _get_snapshot_path(self):
+        # Snapshot file names include a hash of the module's path, so that
+        #  modules with the same name in different directories don't
+        #  share a snapshot.
+        path_hash = hashlib.sha1(self._path.encode("utf-8")).hexdigest()
+        name = os.path.splitext(os.path.basename(self._path))[0]
+        return os.path.join(self._snapshot_dir,
+                            "%s-%s.snapshot" % (name, path_hash[:12]))
+
+    @staticmethod
+    def _get_snapshot_tag(recording):
+        # Snapshots are tagged with a hash of the specs recorded while
+        #  loading the module, which include the specs of the modules it
+        #  imports and of extras built at load time.
+        specs = sorted(spec for _, spec in recording)
+        data = json.dumps(specs).encode("utf-8")
+        return hashlib.sha1(data).hexdigest()
+
+    def _load_snapshot(self):
+        # Load the module's snapshot, returning its tag.
+        path = self._get_snapshot_path()
+        if not os.path.isfile(path):
+            return None
+        tag = spec_cache.load_snapshot(path)
+        self._log.debug("%s: Loaded snapshot %r", self, path)
+        return tag
+
+    def _save_snapshot(self, recording, tag):
+        path = self._get_snapshot_path()
+        try:
+            if not os.path.isdir(self._snapshot_dir):
+                os.makedirs(self._snapshot_dir)
+            spec_cache.save_snapshot(path, recording, tag)
+            self._log.debug("%s: Saved snapshot %r", self, path)
+        except Exception as e:
+            self._log.warning("%s: Could not save snapshot %r: %s", self,
+                              path, e)
+
     def unload(self):
         self._log.info("%s: Unloading module: '%s'", self, self._path)
 
@@ -85,13 +151,15 @@ class CommandModuleDirectory(object):
 
     _log = logging.getLogger("directory")
 
-    def __init__(self, path, excludes=None, recursive=False):
+    def __init__(self, path, excludes=None, recursive=False,
+                 snapshot_dir=None):
         if excludes is None:
             excludes = []
 
         self._path = os.path.abspath(path)
         self._excludes = excludes
         self._recursive = recursive
+        self._snapshot_dir = snapshot_dir
         self._modules = {}
 
     def load(self):
@@ -107,10 +175,11 @@ class CommandModuleDirectory(object):
         for path in valid_paths:
             if path not in self._modules:
                 if os.path.isfile(path):
-                    module_ = CommandModule(path)
+                    module_ = CommandModule(path, self._snapshot_dir)
                 elif os.path.isdir(path):
                     module_ = CommandModuleDirectory(path, self._excludes,
-                                                     self._recursive)
+                                                     self._recursive,
+                                                     self._snapshot_dir)
                 module_.load()
                 self._modules[path] = module_
             else:
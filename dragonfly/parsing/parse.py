@@ -1,26 +1,335 @@
-from lark import Lark, Transformer
-from ..grammar.elements_basic import Literal, Optional, Sequence, Alternative, Empty
+"""
+Compound spec parser
+============================================================================
+
+This module implements the parser used by :class:`Compound` elements to
+parse their specs.
+
+The LALR parser is built from *grammar.lark* by Lark.  Building its
+tables takes a noticeable amount of time, so a serialized copy of the
+parser is shipped in *grammar.lark.marshal* and the parser is only loaded
+when the first spec is parsed.  The serialized parser is rebuilt from
+the grammar if it is missing, if it was built from a different grammar
+or if it was saved by a different Lark or Python major version.  It is
+stored with :mod:`marshal` rather than :mod:`pickle`, so loading it
+cannot run arbitrary code.  It can be regenerated
+by running this module::
+
+    python -m dragonfly.parsing.parse
+
+Parsed specs are kept in a process-wide :class:`SpecCache`.  Its parse
+trees can be saved to a JSON snapshot file and loaded again by a later
+process, so that the specs of a command module are not parsed again on
+each start.  :class:`dragonfly.loader.CommandModule` does this if it is
+given a snapshot directory.
+
+"""
+
+from collections import OrderedDict, namedtuple
+from threading import Lock
+import hashlib
+import json
+import logging
+import marshal
 import os
+import sys
+
+from six import string_types, text_type
+
+from ..grammar.elements_basic import Literal, Optional, Sequence, Alternative, Empty
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
+grammar_path = os.path.join(dir_path, "grammar.lark")
+parser_path = os.path.join(dir_path, "grammar.lark.marshal")
+
+
+def _get_grammar_hash():
+    with open(grammar_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _get_lark_version():
+    # Only the major and minor version numbers are significant.
+    import lark
+    return ".".join(lark.__version__.split(".")[:2])
+
+
+def build_spec_parser():
+    """ Build the LALR spec parser from the grammar file. """
+    from lark import Lark
+    return Lark.open(grammar_path, parser="lalr")
+
+
+def save_spec_parser(parser, path=parser_path):
+    """ Save a serialized spec parser for :func:`load_spec_parser`. """
+    from lark.grammar import Rule
+    from lark.lexer import TerminalDef
+    # This is what Lark.save() pickles.  It only contains built-in types.
+    data, memo = parser.memo_serialize([TerminalDef, Rule])
+    with open(path, "wb") as f:
+        marshal.dump({
+            "grammar_hash": _get_grammar_hash(),
+            "lark_version": _get_lark_version(),
+            "python_version": sys.version_info[0],
+            "parser": {"data": data, "memo": memo},
+        }, f, 2)
 
-spec_parser = Lark.open(os.path.join(dir_path, "grammar.lark"),
-    parser="lalr"
-)
+
+def load_spec_parser(path=parser_path):
+    """
+        Load the serialized spec parser, falling back to building it from
+        the grammar file if the serialized parser cannot be used.
+    """
+    from lark import Lark
+    try:
+        with open(path, "rb") as f:
+            saved = marshal.load(f)
+        if (saved["grammar_hash"] == _get_grammar_hash()
+                and saved["lark_version"] == _get_lark_version()
+                and saved["python_version"] == sys.version_info[0]):
+            # pylint: disable=protected-access
+            return Lark.__new__(Lark)._load(saved["parser"])
+        _log.debug("Serialized spec parser %r is out of date", path)
+    except Exception as e:
+        _log.debug("Could not load serialized spec parser %r: %s", path, e)
+    return build_spec_parser()
+
+
+class _LazySpecParser(object):
+    """
+        Spec parser which is loaded when the first spec is parsed.
+    """
+
+    def __init__(self):
+        self._parser = None
+        self._lock = Lock()
+
+    def _get_parser(self):
+        if self._parser is None:
+            with self._lock:
+                if self._parser is None:
+                    self._parser = load_spec_parser()
+        return self._parser
+
+    def parse(self, text):
+        return self._get_parser().parse(text)
+
+
+_log = logging.getLogger("compound.parse")
+
+spec_parser = _LazySpecParser()
 
 class ParseError(Exception):
     pass
 
-class CompoundTransformer(Transformer):
+
+SpecTree = namedtuple("SpecTree", "data children")
+SpecTree.__doc__ = """
+    Parse tree of a compound spec, or one of its subtrees.
+
+    The *data* is the name of the grammar rule which the tree matched.
+    The *children* are subtrees and strings of matched words.  These
+    trees are smaller than Lark's and can be saved in snapshots.
+"""
+
+
+def _convert_tree(tree):
+    # Convert a Lark parse tree into a SpecTree.
+    children = tuple(_convert_tree(child) if hasattr(child, "data")
+                     else text_type(child) for child in tree.children)
+    return SpecTree(str(tree.data), children)
+
+
+def _tree_to_json(tree):
+    # Convert a SpecTree into nested lists for a JSON snapshot.
+    return [tree.data, [_tree_to_json(child) if isinstance(child, SpecTree)
+                        else child for child in tree.children]]
+
+
+def _tree_from_json(data):
+    # Convert nested lists from a JSON snapshot back into a SpecTree,
+    #  checking that they have the right structure.
+    name, children = data
+    if not (isinstance(name, string_types) and isinstance(children, list)):
+        raise ValueError("Malformed spec tree: %r" % (data,))
+    return SpecTree(str(name), tuple(
+        child if isinstance(child, string_types)
+        else _tree_from_json(child) for child in children
+    ))
+
+
+def _get_references(tree):
+    # Return a sorted tuple of the extras names referenced in a SpecTree.
+    references = set()
+    stack = [tree]
+    while stack:
+        tree = stack.pop()
+        if tree.data == "reference":
+            references.add(tree.children[0])
+        stack.extend(child for child in tree.children
+                     if isinstance(child, SpecTree))
+    return tuple(sorted(references))
+
+
+class SpecCache(object):
+    """
+        Process-wide LRU cache of parsed compound specs.
+
+        Up to *max_size* parse trees are cached, each along with the
+        names of the extras its spec references, so that identical specs
+        are only parsed once.  The cached :class:`SpecTree` objects are
+        immutable; each compound element builds its own element
+        structure from them.
+
+        Setting *max_size* to 0 disables caching.
+
+        The parse trees of the specs used while recording can be saved
+        to a snapshot file with :meth:`save_snapshot` and loaded into
+        the cache with :meth:`load_snapshot`.
+    """
+
+    # Version of the snapshot file format.
+    snapshot_version = 2
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._trees = OrderedDict()
+        self._recordings = []
+        self._lock = Lock()
+
+    def clear(self):
+        """ Remove all cached entries. """
+        with self._lock:
+            self._trees.clear()
+
+    def _get(self, entries, key):
+        # Return the cached value for *key* or None, marking it as
+        #  recently used.
+        with self._lock:
+            value = entries.pop(key, None)
+            if value is not None:
+                entries[key] = value
+            return value
+
+    def _put(self, entries, key, value):
+        with self._lock:
+            entries[key] = value
+            while len(entries) > self.max_size:
+                entries.popitem(last=False)
+
+    def get_tree(self, parser, spec):
+        """
+            Returns a 2-tuple of the parse tree of *spec* and a tuple of
+            the names of the extras it references, parsing the spec if
+            it isn't cached.
+        """
+        key = (id(parser), spec)
+        value = self._get(self._trees, key)
+        if value is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            tree = _convert_tree(parser.parse(spec))
+            value = (tree, _get_references(tree))
+            if self.max_size > 0:
+                self._put(self._trees, key, value)
+        for recording in self._recordings:
+            recording[key] = value
+        return value
+
+    #-----------------------------------------------------------------------
+    # Methods for snapshots.
+
+    def start_recording(self):
+        """
+            Start recording the specs which are parsed or looked up.
+            Returns the recording, which must be passed to
+            :meth:`stop_recording`.
+        """
+        recording = {}
+        with self._lock:
+            self._recordings.append(recording)
+        return recording
+
+    def stop_recording(self, recording):
+        """ Stop the given recording. """
+        with self._lock:
+            self._recordings.remove(recording)
+
+    def save_snapshot(self, path, recording, tag=None, parser=None):
+        """
+            Save the parse trees of the specs in *recording* which were
+            parsed by *parser* to the file at *path*.
+
+            The *tag* can be any string identifying the snapshot's
+            contents, e.g. a hash of the module which defined the specs.
+            It is returned by :meth:`load_snapshot`.
+        """
+        if parser is None:
+            parser = spec_parser
+        trees = dict((spec, _tree_to_json(value[0])) for (parser_id, spec),
+                     value in recording.items() if parser_id == id(parser))
+        with open(path, "w") as f:
+            json.dump({
+                "version": self.snapshot_version,
+                "grammar_hash": _get_grammar_hash(),
+                "tag": tag,
+                "trees": trees,
+            }, f)
+
+    def load_snapshot(self, path, parser=None):
+        """
+            Load the parse trees saved in the snapshot file at *path*
+            into this cache.
+
+            Returns the snapshot's tag, or *None* if the file could not
+            be loaded or was saved for a different spec grammar or
+            snapshot format.  Specs not in the snapshot are parsed as
+            usual.  Snapshots are JSON files; the file is not loaded if
+            any of its parse trees is malformed.
+        """
+        if parser is None:
+            parser = spec_parser
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+            if (saved["version"] != self.snapshot_version
+                    or saved["grammar_hash"] != _get_grammar_hash()):
+                _log.debug("Spec snapshot %r is out of date", path)
+                return None
+            trees = []
+            for spec, data in saved["trees"].items():
+                tree = _tree_from_json(data)
+                trees.append((spec, (tree, _get_references(tree))))
+        except Exception as e:
+            _log.debug("Could not load spec snapshot %r: %s", path, e)
+            return None
+
+        if self.max_size > 0:
+            for spec, value in trees:
+                self._put(self._trees, (id(parser), spec), value)
+        return saved["tag"]
+
+spec_cache = SpecCache()
+
+class CompoundTransformer(object):
     """
         Visits each node of the parse tree starting with the leaves
         and working up, replacing lark Tree objects with the
         appropriate dragonfly classes.
     """
 
-    def __init__(self, extras=None, *args, **kwargs):
+    def __init__(self, extras=None):
         self.extras = extras or {}
-        Transformer.__init__(self, *args, **kwargs)
+
+    def transform(self, tree):
+        # Transform the children of each tree first, then call the
+        #  method named after the tree's rule.  Tokens are left as is.
+        args = [self.transform(child) if hasattr(child, "data") else child
+                for child in tree.children]
+        return getattr(self, tree.data)(args)
 
     def optional(self, args):
         return Optional(args[0])
@@ -69,3 +378,7 @@ class CompoundTransformer(Transformer):
                              specifier)
 
         return child
+
+
+if __name__ == "__main__":
+    save_spec_parser(build_spec_parser())
@@ -23,6 +23,7 @@ import unittest
 from six import text_type
 
 from dragonfly        import *
+from dragonfly.grammar.state import State
 from ..test           import TestError, RecognitionFailure
 from .element_tester  import ElementTester
 
@@ -70,3 +71,90 @@ class ElementTestCase(unittest.TestCase):
                                        expected_value))
         except TestError as e:
             self.fail(text_type(e))
+
+
+#===========================================================================
+
+class IntegerParserTestCase(unittest.TestCase):
+    """
+        Test case class for comparing the values given by an integer
+        content's word parser with those given by decoding its elements.
+
+        Derived classes set the class attribute :attr:`_content` or
+        override the :meth:`_get_content` method, and override the
+        :meth:`_number_words` method, which returns the spoken words of
+        a number.
+
+    """
+
+    _content = None
+
+    # The parser is compared with decoding for all numbers up to 1000
+    #  and numbers spread across the rest of the range.
+    min = 0
+    max = 1000001
+    numbers = sorted(set(list(range(1001))
+                         + list(range(1001, 1000001, 9973))
+                         + [1100, 9999, 10000, 99999, 100001, 999999,
+                            1000000]))
+
+    def _get_content(self):
+        return self._content
+
+    def _number_words(self, number):
+        raise NotImplementedError()
+
+    def _decode_elements(self, element, words):
+        # Decode the words using the element's children, bypassing the
+        #  word parser.
+        engine = get_engine()
+        state = State([(word, 0) for word in words], ("test",), engine)
+        for _ in Alternative.decode(element, state):
+            if state.finished():
+                return state.build_parse_tree().value()
+        return None
+
+    def test_parser(self):
+        content = self._get_content()
+        if not content:
+            return
+
+        element = Integer(content=content, min=self.min, max=self.max)
+        for number in self.numbers:
+            words = self._number_words(number).split()
+            decoded = self._decode_elements(element, words)
+            parsed = content.parse_words(words, self.min, self.max)
+            self.assertEqual((decoded, parsed), (number, number),
+                             "Mismatch for %r" % " ".join(words))
+
+        # Words which are not a spoken integer are rejected.
+        for words in self._number_words(5).split() * 2, ["x"], []:
+            self.assertEqual(self._decode_elements(element, words), None)
+            self.assertEqual(content.parse_words(words, self.min,
+                                                 self.max), None)
+
+    def _decoding_ends(self, decode, element, words):
+        # Return the word index after each decoding of the element.
+        # pylint: disable=protected-access
+        engine = get_engine()
+        state = State([(word, 0) for word in words], ("test",), engine)
+        return [state._index for _ in decode(element, state)]
+
+    def test_decoding_order(self):
+        # Integer elements yield their decodings in the same order as
+        #  decoding their children, also if the words can be split into
+        #  several integers.
+        content = self._get_content()
+        if not content:
+            return
+
+        element = Integer(content=content, min=self.min, max=self.max)
+        numbers = [1, 5, 20, 21, 100, 101, 1000, 2345, 1000000]
+        for first in numbers:
+            for second in numbers:
+                words = (self._number_words(first).split()
+                         + self._number_words(second).split())
+                self.assertEqual(
+                    self._decoding_ends(Integer.decode, element, words),
+                    self._decoding_ends(Alternative.decode, element, words),
+                    "Mismatch for %r" % " ".join(words))
@@ -38,7 +38,13 @@ common_names = [
     "test_accessibility",
     "test_actions",
     "test_contexts",
+    "test_decoder",
+    "test_basic_elements",
     "test_basic_rule",
+    "test_compound",
+    "test_complexity",
+    "test_grammar",
+    "test_interning",
     "test_engine_nonexistent",
     "test_log",
     "test_parser",
@@ -0,0 +1,100 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from dragonfly import (Rule, Sequence, Alternative, Optional, Repetition,
+                       Literal, RuleRef, ListRef, List, get_engine)
+from dragonfly.grammar.state import State
+
+
+#===========================================================================
+
+class ListDependent(Literal):
+    """ Literal element which computes its own dependencies. """
+
+    def __init__(self, text, lst):
+        Literal.__init__(self, text)
+        self.lst = lst
+
+    def dependencies(self, memo):
+        return [self.lst]
+
+
+class TestBasicElements(unittest.TestCase):
+    """ Tests of basic element trees, grammar strings and dependencies. """
+
+    def setUp(self):
+        self.engine = get_engine()
+
+    def test_repetition_layout(self):
+        # Repetitions of the child element are direct children of the
+        #  repetition's parse tree node.
+        child = Alternative([Literal("one"), Literal("two")])
+        repetition = Repetition(child, 1, 50, name="rep")
+        self.assertEqual(repetition.children, (child,))
+        rule = Rule("test", repetition)
+        state = State([("one", 0), ("two", 0), ("one", 0)], ("test",),
+                      self.engine)
+        self.assertTrue(rule.decode_complete(state))
+        node = state.build_parse_tree().children[0]
+        self.assertEqual([n.actor for n in node.children], [child] * 3)
+        self.assertEqual(node.value(), ["one", "two", "one"])
+
+        # The grammar string is that of the expanded sequence.
+        self.assertEqual(Repetition(Literal("a"), 1, 4).gstring(),
+                         "(a [(a [a])])")
+        self.assertEqual(Repetition(Literal("a"), 2).gstring(), "(a a)")
+
+    def test_cached_gstring(self):
+        lst = List("lst", ["x"])
+        element = Sequence([Literal("go"), Optional(ListRef("lst", lst))])
+        gstring = element.gstring()
+        self.assertEqual(gstring, "(go [{lst}])")
+        self.assertIs(element.gstring(), gstring)
+
+        # Grammar strings don't depend on list contents.
+        lst.append("y")
+        self.assertIs(element.gstring(), gstring)
+
+    def test_cached_dependencies(self):
+        lst1, lst2 = List("lst1"), List("lst2")
+        inner = Rule("inner", ListRef("lst1", lst1), exported=False)
+        shared = RuleRef(inner)
+        outer = Rule("outer", Alternative([
+            Sequence([shared, ListDependent("a", lst2)]),
+            Sequence([shared, RuleRef(inner)]),
+        ]))
+        outer.element.children[1]._children += (RuleRef(outer),)
+        self.assertEqual(outer.dependencies(set()),
+                         [inner, lst1, lst2, outer])
+
+        # Cached dependencies give the same results, and elements
+        #  already in the memo are skipped.
+        memo = set()
+        self.assertEqual(outer.dependencies(memo),
+                         [inner, lst1, lst2, outer])
+        self.assertEqual(outer.element.dependencies(memo), [])
+
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from dragonfly import (Rule, Sequence, Alternative, Optional, Repetition,
+                       Literal, RuleRef, ListRef, List, Dictation,
+                       Impossible, Grammar)
+from dragonfly.grammar.complexity import get_rule_complexity, format_paths
+
+
+#===========================================================================
+
+class TestRuleComplexity(unittest.TestCase):
+    """ Tests of rule complexity metrics. """
+
+    def test_complexity(self):
+        lst = List("lst", ["x", "y", "z"])
+        inner = Rule("inner", Alternative([Literal("a"), Literal("b")]),
+                     exported=False)
+        shared = Literal("c")
+        rule = Rule("test", Sequence([
+            RuleRef(inner), Optional(shared), Repetition(shared, 0, 3),
+            ListRef("lst", lst),
+        ]))
+        complexity = get_rule_complexity(rule)
+        self.assertEqual((complexity.elements, complexity.distinct_elements,
+                          complexity.depth), (7, 6, 3))
+
+        # 2 rule alternatives * 2 optional * 3 repetitions * 3 list items.
+        self.assertEqual(complexity.paths, 36)
+        self.assertEqual(complexity.choice_points, 3)
+        self.assertAlmostEqual(complexity.branching_factor, 8 / 3.0)
+
+        # Dictation and recursive rules give infinite paths.
+        dictation = Rule("dictation", Dictation())
+        self.assertEqual(get_rule_complexity(dictation).paths,
+                         float("inf"))
+        recursive = Rule("recursive", Alternative([Literal("a")]))
+        recursive.element._children += (RuleRef(recursive),)
+        self.assertEqual(get_rule_complexity(recursive).paths,
+                         float("inf"))
+
+
+    def test_impossible_paths(self):
+        # Sequences containing an impossible element have no paths, even
+        #  if they also contain dictation.
+        rule = Rule("test", Sequence([Impossible(), Dictation()]))
+        self.assertEqual(get_rule_complexity(rule).paths, 0)
+        rule = Rule("test", Sequence([Dictation(), Impossible()]))
+        self.assertEqual(get_rule_complexity(rule).paths, 0)
+
+    def test_format_paths(self):
+        self.assertEqual(format_paths(999999), "999999")
+        self.assertEqual(format_paths(1234567), "1.23e+06")
+        self.assertEqual(format_paths(9999999), "1.00e+07")
+        self.assertEqual(format_paths(10 ** 400), "1.00e+400")
+        self.assertEqual(format_paths(float("inf")), "inf")
+
+        # Numbers of paths too large for floats are formatted too.
+        letters = Alternative([Literal(c) for c in "abcdefghij"])
+        rule = Rule("test", Repetition(letters, 1, 400), exported=True)
+        self.assertEqual(format_paths(get_rule_complexity(rule).paths),
+                         "1.11e+399")
+        grammar = Grammar("test")
+        grammar.add_rule(rule)
+        self.assertIn("1.11e+399 paths", grammar.get_complexity_string())
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from dragonfly import Rule, Choice, get_engine
+from dragonfly.grammar.state import State
+
+
+#===========================================================================
+
+class TestCompound(unittest.TestCase):
+    """ Tests of Compound and Choice elements. """
+
+    def setUp(self):
+        self.engine = get_engine()
+
+    def test_choice_phrases(self):
+        # Plain phrases are built as literals, other keys as compounds.
+        choice = Choice("thing", {"open file": 1, "close  window ": None,
+                                  "(save | store) file": 3})
+        classes = sorted(type(child).__name__ for child in choice.children)
+        self.assertEqual(classes, ["Compound", "Literal", "Literal"])
+        rule = Rule("test", choice)
+        for words, value in [("open file", 1), ("close window",
+                                                "close window"),
+                             ("store file", 3)]:
+            state = State([(w, 0) for w in words.split()], ("test",),
+                          self.engine)
+            self.assertTrue(rule.decode_complete(state))
+            node = state.build_parse_tree()
+            self.assertEqual(node.value(), value)
+
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,9 +19,14 @@
 #
 
 
+import copy
+import gc
 import unittest
 
-from dragonfly import CompoundRule, MimicFailure, Grammar, get_engine
+from dragonfly import (CompoundRule, MimicFailure, Grammar, AppContext,
+                       get_engine)
+from dragonfly.grammar import context as context_module
+from dragonfly.grammar.context import ContextMatchCache
 from dragonfly.test import (RuleTestCase, TestContext, RuleTestGrammar)
 
 
@@ -117,6 +122,40 @@ class TestRules(RuleTestCase):
         results = self.recognize_node("test context").words()
         assert results == ["test", "context"]
 
+    def test_skip_unchanged_window(self):
+        """ Verify that contexts are not matched again for phrases in an
+            unchanged window if the engine option is enabled. """
+        class BeginRule(CompoundRule):
+            begin_count = 0
+
+            def _process_begin(self):
+                self.begin_count += 1
+
+        context = CountingContext(True)
+        rule = BeginRule(name="r1", spec="test context", context=context)
+        self.add_rule(rule)
+        self.grammar.load()
+        self.engine.skip_unchanged_window = True
+        try:
+            # Only the first phrase matches the context, but the rule's
+            #  callback is called for each phrase.
+            for _ in range(4):
+                assert self.recognize_node("test context")
+            self.assertEqual(context.count, 1)
+            self.assertEqual(rule.begin_count, 4)
+
+            # Changing a rule's state causes contexts to be matched.
+            context.active = False
+            rule.disable()
+            rule.enable()
+            self.assertRaises(MimicFailure, self.engine.mimic,
+                              "test context")
+            self.assertEqual(context.count, 2)
+            self.assertEqual(rule.begin_count, 4)
+        finally:
+            self.engine.skip_unchanged_window = False
+            self.grammar.unload()
+
     def test_exclusive_grammars(self):
         """ Verify that the engine supports exclusive grammars. """
         # This is here as grammar exclusivity is context related.
@@ -168,6 +207,130 @@ class TestRules(RuleTestCase):
         self.engine.mimic("grammar three")
         assert grammar3.rules[0].words == "grammar three"
 
+
+class CountingContext(TestContext):
+    """ Test context which counts how often it is evaluated. """
+    def __init__(self, active):
+        TestContext.__init__(self, active)
+        self.count = 0
+
+    def matches(self, executable, title, handle):
+        self.count += 1
+        return TestContext.matches(self, executable, title, handle)
+
+
+class TestContextMatchCache(unittest.TestCase):
+
+    def test_match_tokens(self):
+        code = AppContext(executable="Code", title=["a", "b"])
+        same = AppContext(executable="code", title=("A", "B"))
+        token = code._get_match_token()
+        self.assertIs(token, same._get_match_token())
+        self.assertIsNot(token,
+                         AppContext(executable="code")._get_match_token())
+        self.assertIsNot(token,
+                         AppContext(executable="code", title=["a", "b"],
+                                    exclude=True)._get_match_token())
+        self.assertIs((code & ~AppContext(title="x"))._get_match_token(),
+                      (same & ~AppContext(title="x"))._get_match_token())
+        self.assertIsNot((code & AppContext(title="x"))._get_match_token(),
+                         (code | AppContext(title="x"))._get_match_token())
+        self.assertIs(code.copy()._get_match_token(), token)
+
+        # Other contexts only share results with themselves.
+        other = TestContext(True)
+        self.assertIs(other._get_match_token(), None)
+        self.assertIs((code & other)._get_match_token(), None)
+
+        # Contexts are only equal to themselves.
+        self.assertNotEqual(code, same)
+        self.assertEqual(len(set([code, same])), 2)
+
+        # Tokens are not kept after their contexts are gone.
+        count = len(context_module._match_tokens)
+        del code, same, token
+        gc.collect()
+        self.assertEqual(len(context_module._match_tokens), count - 1)
+
+    def test_shared_results(self):
+        cache = ContextMatchCache()
+        window = ("code.exe", "title", 1)
+        calls = []
+        contexts = [AppContext(executable="code") for _ in range(2)]
+        for context in contexts:
+            context.matches = lambda *args: calls.append(args) or True
+        cache.begin_phrase(*window)
+        for context in contexts:
+            self.assertTrue(cache.matches(context, *window))
+        self.assertEqual(len(calls), 1)
+
+    def test_phrase_results(self):
+        cache = ContextMatchCache()
+        counting = CountingContext(True)
+        grammar1, grammar2 = object(), object()
+        window = ("code.exe", "title", 1)
+
+        # Results are shared between grammars within a phrase.
+        cache.begin_grammar(grammar1, *window)
+        self.assertTrue(cache.matches(counting, *window))
+        cache.begin_grammar(grammar2, *window)
+        self.assertTrue(cache.matches(counting, *window))
+        self.assertTrue(cache.matches(counting & AppContext("code"),
+                                      *window))
+        self.assertEqual(counting.count, 1)
+
+        # The same grammar beginning again starts a new phrase.
+        counting.active = False
+        cache.begin_grammar(grammar1, *window)
+        self.assertFalse(cache.matches(counting, *window))
+        self.assertEqual(counting.count, 2)
+
+        # So do explicit calls and different windows.
+        cache.begin_phrase(*window)
+        self.assertFalse(cache.matches(counting, *window))
+        cache.begin_grammar(grammar2, "other.exe", "title", 2)
+        self.assertTrue(cache.matches(~counting, "other.exe", "title", 2))
+        self.assertEqual(counting.count, 4)
+
+        # Direct evaluation doesn't use the cache.
+        self.assertFalse((counting & AppContext("code")).matches(*window))
+        self.assertEqual(counting.count, 5)
+
+    def test_app_context_patterns(self):
+        executable = r"C:\Program Files\Code\Code.exe"
+        title = "Notes.txt - Editor"
+        contexts = [
+            (AppContext(executable="code"), True),
+            (AppContext(executable="code.exe", title="notes"), True),
+            (AppContext(executable=["vim", "code\\code.exe"]), True),
+            (AppContext(title="editor", exclude=True), False),
+            (AppContext(title="terminal"), False),
+        ]
+        for context, expected in contexts:
+            self.assertEqual(context.matches(executable, title, 1),
+                             expected)
+
+        # Contexts created later find their patterns too.
+        self.assertTrue(AppContext(title="notes.txt").matches(
+            executable, title, 1))
+        self.assertFalse(AppContext(title="notes").matches(
+            executable, None, 1))
+
+        # Patterns are only searched for while contexts use them, or
+        #  copies of them.
+        matcher = context_module._pattern_matcher
+        context = AppContext(title="unusual pattern")
+        copied = copy.deepcopy(context)
+        self.assertIn("unusual pattern", matcher.find("Unusual Pattern"))
+        del context
+        gc.collect()
+        self.assertTrue(copied.matches(executable, "unusual pattern", 1))
+        del copied
+        gc.collect()
+        self.assertNotIn("unusual pattern", matcher.find("unusual pattern"))
+        self.assertIn("code", matcher.find(executable.lower()))
+
+
 # ==========================================================================
 
 if __name__ == "__main__":
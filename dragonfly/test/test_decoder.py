@@ -0,0 +1,288 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from dragonfly import (Rule, Sequence, Alternative, Optional, Repetition,
+                       Literal, RuleRef, RuleWrap, ListRef, DictListRef,
+                       List, DictList, Empty, Dictation, Impossible,
+                       Compound, Choice, IntegerRef, get_engine)
+from dragonfly.grammar.state import State
+from dragonfly.grammar.decoder import CompiledDecoder
+from dragonfly.grammar.decode_trace import DecodeTracer
+
+
+#===========================================================================
+
+class CustomLiteral(Literal):
+    """ Literal element with a custom decode() method. """
+
+    def decode(self, state):
+        for result in Literal.decode(self, state):
+            yield result
+
+
+class TestCompiledDecoder(unittest.TestCase):
+    """ Tests comparing compiled decoding with generator decoding. """
+
+    def setUp(self):
+        self.engine = get_engine()
+
+    def _decode(self, rule, words, dictated=(), compiled=True):
+        rule_names = (rule.name, "dgndictation")
+        results = [(word, 1000000 if i in dictated else 0)
+                   for i, word in enumerate(words.split())]
+        state = State(results, rule_names, self.engine)
+        state.initialize_decoding()
+        if compiled:
+            success = CompiledDecoder(rule).decode(state)
+        else:
+            success = False
+            for _ in rule.decode(state):
+                if state.finished():
+                    success = True
+                    break
+        if not success:
+            return None
+        return [(f.depth, f.actor, f.begin, f.end) for f in state._stack]
+
+    def assert_same_decoding(self, element, phrases, dictated=()):
+        rule = Rule("test", element)
+        for words in phrases:
+            generator = self._decode(rule, words, dictated, False)
+            compiled = self._decode(rule, words, dictated, True)
+            self.assertEqual(generator, compiled,
+                             "Different decoding of %r" % words)
+
+    def test_basic_elements(self):
+        element = Sequence([
+            Literal("hello"),
+            Alternative([Literal("big world"), Literal("big"), Empty()]),
+            Optional(Literal("world")),
+            Optional(Sequence([Literal("again"), Impossible()])),
+        ])
+        self.assert_same_decoding(element, [
+            "hello", "hello big", "hello big world", "hello world",
+            "hello big world world", "hello again", "goodbye", "",
+        ])
+
+    def test_repetition(self):
+        child = Alternative([Literal("one"), Literal("two"),
+                             Literal("one two")])
+        element = Sequence([Repetition(child, 1, 16), Literal("end")])
+        self.assert_same_decoding(element, [
+            "one end", "one two end", "two one two one end",
+            " ".join(["one"] * 15) + " end",
+            " ".join(["one"] * 16) + " end", "end",
+        ])
+        element = Sequence([Repetition(child, 0, 3),
+                            Repetition(Optional(Literal("two")), 2, 4),
+                            Literal("end")])
+        self.assert_same_decoding(element, [
+            "end", "one end", "two end", "one two two two end",
+            "one two one two two end", "two two two two two end",
+        ])
+
+    def test_node_name_lookup(self):
+        inner = Sequence([Literal("b", name="x"), Literal("c", name="y")],
+                         name="inner")
+        element = Sequence([Literal("a", name="y"), inner,
+                            Literal("d", name="x")])
+        rule = Rule("test", element)
+        state = State([(w, 0) for w in "a b c d".split()], ("test",),
+                      self.engine)
+        self.assertTrue(rule.decode_complete(state))
+        node = state.build_parse_tree()
+        self.assertEqual(node.get_child_by_name("x").words(), ["b"])
+        self.assertEqual(node.get_child_by_name("x", shallow=True).words(),
+                         ["d"])
+        self.assertEqual([n.words() for n in
+                          node.get_children_by_name("y")], [["a"], ["c"]])
+        self.assertEqual([n.words() for n in
+                          node.get_children_by_name("y", shallow=True)],
+                         [["a"]])
+        self.assertTrue(node.has_child_with_name("inner"))
+        self.assertFalse(node.has_child_with_name("z"))
+        self.assertIsNone(node.get_child_by_name("z"))
+
+    def test_rule_references(self):
+        wrap = RuleWrap("wrap", Choice("", {"alpha": 1, "bravo": 2}))
+        element = Sequence([wrap, RuleRef(wrap.rule),
+                            IntegerRef("n", 1, 100)])
+        self.assert_same_decoding(element, [
+            "alpha bravo fifty", "bravo bravo ninety nine",
+            "alpha bravo one hundred", "alpha",
+        ])
+
+    def test_lists(self):
+        lst = List("lst", ["a", "a b", "b c", "c"])
+        dct = DictList("dct", {"x": 1, "x y": 2})
+        element = Sequence([ListRef("lst", lst), DictListRef("dct", dct),
+                            Optional(ListRef("lst2", lst))])
+        self.assert_same_decoding(element, [
+            "a x", "a b x", "a x y", "a b x y c", "a b c x", "a x y a b",
+            "b x",
+        ])
+
+        # Shorter items are decoded from the same index as longer ones.
+        lst = List("lst", ["a b", "a"])
+        element = Sequence([ListRef("lst", lst), Literal("b c")])
+        self.assert_same_decoding(element, ["a b c", "a b b c"])
+        rule = Rule("test", element)
+        self.assertIsNotNone(self._decode(rule, "a b c", compiled=False))
+
+    def test_dictation(self):
+        element = Sequence([Literal("say"), Dictation("text"),
+                            Optional(Literal("stop"))])
+        self.assert_same_decoding(element, ["say hello there stop"],
+                                  dictated=(1, 2))
+        self.assert_same_decoding(element, ["say hello there stop"],
+                                  dictated=(1, 2, 3))
+        self.assert_same_decoding(element, ["say hello"])
+
+    def test_compound_and_custom_decode(self):
+        element = Sequence([
+            Compound("[please] (open | close) <thing>",
+                     extras=[Choice("thing", {"file": 1, "window": 2})]),
+            CustomLiteral("now"),
+            Optional(CustomLiteral("now")),
+        ])
+        self.assert_same_decoding(element, [
+            "please open file now", "close window now now",
+            "open now", "open file",
+        ])
+
+    def test_failure_memo(self):
+        # Decoding with and without failure memoization should give the
+        #  same results.
+        shared = RuleWrap("n", IntegerRef("n", 1, 100))
+        element = Alternative([
+            Sequence([Literal("go"), shared, Literal(word)])
+            for word in ("up", "down", "left", "right")
+        ])
+        rule = Rule("test", element)
+        phrases = ["go fifty right", "go ninety nine down", "go left"]
+        for compiled in (True, False):
+            memoized = [self._decode(rule, words, compiled=compiled)
+                        for words in phrases]
+            try:
+                State.memoize_failures = False
+                not_memoized = [self._decode(rule, words, compiled=compiled)
+                                for words in phrases]
+            finally:
+                State.memoize_failures = True
+            self.assertEqual(memoized, not_memoized)
+
+        # Check that failures are remembered and cleared.
+        state = State([("go", 0), ("left", 0)], ("test",), self.engine)
+        self.assertFalse(CompiledDecoder(rule).decode(state))
+        self.assertTrue(state.known_failure(shared.rule, 1))
+        state.initialize_decoding()
+        self.assertFalse(state.known_failure(shared.rule, 1))
+
+        # Generator decoding remembers failures of sequences, alternatives
+        #  and rule references too.
+        state = State([("go", 0), ("left", 0)], ("test",), self.engine)
+        state.initialize_decoding()
+        self.assertEqual(list(rule.decode(state)), [])
+        self.assertTrue(state.known_failure(shared, 1))
+        self.assertTrue(state.known_failure(element.children[0], 0))
+        self.assertTrue(state.known_failure(element, 0))
+
+    def test_first_words(self):
+        lst = List("lst", ["Alpha bravo"])
+        element = Sequence([
+            Optional(Literal("Please")),
+            Alternative([ListRef("lst", lst), Empty()]),
+            Literal("go"),
+        ])
+        self.assertEqual(element.first_words(),
+                         (frozenset(["please", "alpha", "alpha bravo",
+                                     "go"]), False))
+        self.assertEqual(Optional(Dictation()).first_words(), (None, True))
+        self.assertEqual(CustomLiteral("word").first_words(), (None, True))
+
+        # Modifications of referenced lists should invalidate cached first
+        #  words, even through rules, but those of other lists shouldn't.
+        other = List("other")
+        rule = Rule("test", element, exported=False)
+        outer = Alternative([RuleRef(rule), ListRef("other", other)])
+        words = outer.first_words()[0]
+        lst.append("charlie")
+        self.assertIn("charlie", element.first_words()[0])
+        self.assertIn("charlie", outer.first_words()[0])
+        words = element.first_words()[0]
+        other.append("delta")
+        self.assertIs(element.first_words()[0], words)
+        self.assertIn("delta", outer.first_words()[0])
+
+    def test_lookahead_table(self):
+        lst = List("lst", ["delta"])
+        element = Alternative([Literal("alpha"), Optional(Literal("bravo")),
+                               ListRef("lst", lst), Literal("alpha two")])
+        mapping, default, nullable, _ = element.get_lookahead_table()
+        self.assertEqual(mapping, {"alpha": (0, 1, 3), "delta": (1, 2)})
+        self.assertEqual((default, nullable), ((1,), (1,)))
+        lst.append("echo")
+        mapping, _, _, _ = element.get_lookahead_table()
+        self.assertEqual(mapping["echo"], (1, 2))
+
+        # Decoding should find list items added after compilation.
+        rule = Rule("test", Sequence([element, Literal("end")]))
+        decoder = CompiledDecoder(rule)
+        lst.append("foxtrot")
+        state = State([("foxtrot", 0), ("end", 0)], ("test",), self.engine)
+        self.assertTrue(decoder.decode(state))
+
+    def test_decode_tracer(self):
+        alpha = Literal("alpha")
+        rule = Rule("test", Alternative([Sequence([alpha, Literal("x")]),
+                                         Sequence([alpha, Literal("y")])]))
+        tracer = DecodeTracer(record_events=True)
+        tracer.install()
+        try:
+            state = State([("alpha", 0), ("y", 0)], ("test",), self.engine)
+        finally:
+            tracer.remove()
+        self.assertTrue(rule.decode_complete(state))
+
+        # States created after the tracer was removed are not traced.
+        self.assertIsNone(State.tracer)
+        state = State([("alpha", 0), ("y", 0)], ("test",), self.engine)
+        self.assertTrue(rule.decode_complete(state))
+
+        stats = dict((s.element, s) for s in tracer.stats)
+        self.assertEqual((stats[alpha].attempts, stats[alpha].failures),
+                         (2, 1))
+        self.assertIs(stats[alpha].rule, rule)
+        self.assertEqual([s.element for s in tracer.hottest_rules()],
+                         [rule])
+        self.assertNotIn(rule, [s.element for s in
+                                tracer.hottest_elements(100)])
+        self.assertEqual(tracer.events[0][:2], ("attempt", rule))
+        self.assertEqual(tracer.events[-1][:2], ("success", rule))
+        self.assertIn("Hottest elements:", tracer.report())
+
+
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
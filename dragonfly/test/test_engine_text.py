@@ -26,7 +26,8 @@ import six
 
 from dragonfly.engines import EngineBase
 from dragonfly import (Literal, Dictation, Sequence, CompoundRule,
-                       get_engine)
+                       Grammar, MappingRule, Function, List, ListRef,
+                       DictList, DictListRef, MimicFailure, Modifier, IntegerRef, get_engine)
 from dragonfly.test import ElementTester, RecognitionFailure, RuleTestCase
 
 
@@ -69,3 +70,278 @@ class TestEngineText(unittest.TestCase):
         # Check that recognition failure is possible.
         results = tester.recognize(u"jalapeo")
         assert results is RecognitionFailure
+
+    def test_rule_dispatch_index(self):
+        """ Verify that recognitions are dispatched to rules in grammar
+            order, using the engine's first word index. """
+        calls = []
+        fruit = List("fruit", ["apple"])
+
+        def make_grammar(name, specs):
+            mapping = dict(
+                (spec, Function(lambda spec=spec: calls.append((name, spec))))
+                for spec in specs
+            )
+            grammar = Grammar(name)
+            grammar.add_rule(MappingRule(name="rule", mapping=mapping,
+                                         extras=[ListRef("fruit", fruit)]))
+            grammar.load()
+            return grammar
+
+        grammar1 = make_grammar("g1", ["eat <fruit>", "drink"])
+        grammar2 = make_grammar("g2", ["eat <fruit>", "<fruit> please"])
+        try:
+            self.engine.mimic("eat apple")
+            self.engine.mimic("apple please")
+            self.assertEqual(calls, [("g1", "eat <fruit>"),
+                                     ("g2", "<fruit> please")])
+
+            # List changes should update the index.
+            self.assertRaises(MimicFailure, self.engine.mimic,
+                              "banana please")
+            fruit.append("banana")
+            self.engine.mimic("banana please")
+            self.assertEqual(calls[-1], ("g2", "<fruit> please"))
+            self.engine.mimic("eat banana")
+            self.assertEqual(calls[-1], ("g1", "eat <fruit>"))
+
+            # Disabled rules should not be recognized.
+            grammar1.rules[0].disable()
+            self.engine.mimic("eat apple")
+            self.assertEqual(calls[-1], ("g2", "eat <fruit>"))
+            self.assertRaises(MimicFailure, self.engine.mimic, "drink")
+            grammar1.rules[0].enable()
+            self.engine.mimic("drink")
+            self.assertEqual(calls[-1], ("g1", "drink"))
+        finally:
+            grammar1.unload()
+            grammar2.unload()
+
+    def test_list_delta(self):
+        """ Verify that list modifications are passed to the engine as
+            the items added and removed. """
+        deltas = []
+        update_list_delta = self.engine.update_list_delta
+
+        def record_delta(lst, grammar, added, removed):
+            deltas.append((added, removed))
+            update_list_delta(lst, grammar, added, removed)
+
+        calls = []
+        fruit = DictList("fruit", {"apple": 1})
+        grammar = Grammar("test")
+        grammar.add_rule(MappingRule(
+            name="rule",
+            mapping={"<fruit>": Function(lambda fruit: calls.append(fruit))},
+            extras=[DictListRef("fruit", fruit)]
+        ))
+        grammar.load()
+        self.engine.update_list_delta = record_delta
+        try:
+            fruit["banana"] = 2
+            self.engine.mimic("banana")
+            self.assertEqual(calls, [2])
+
+            # Changing only the values of keys shouldn't update the engine.
+            fruit["banana"] = 3
+            self.engine.mimic("banana")
+            self.assertEqual(calls, [2, 3])
+
+            # Removed items should no longer be recognized.
+            del fruit["apple"]
+            self.assertRaises(MimicFailure, self.engine.mimic, "apple")
+
+            # Changes in batch mode should be passed together.
+            with fruit:
+                fruit["cherry"] = 4
+                fruit["date"] = 5
+                del fruit["date"]
+                del fruit["banana"]
+            self.engine.mimic("cherry")
+            self.assertEqual(calls, [2, 3, 4])
+            self.assertEqual(deltas, [(["banana"], []), ([], ["apple"]),
+                                      (["cherry"], ["banana"])])
+        finally:
+            del self.engine.update_list_delta
+            grammar.unload()
+
+    def test_deferred_list_updates(self):
+        """ Verify that deferred list changes are applied together at
+            the start of the next phrase. """
+        deltas = []
+        update_list_delta = self.engine.update_list_delta
+
+        def record_delta(lst, grammar, added, removed):
+            deltas.append((lst.name, added, removed))
+            update_list_delta(lst, grammar, added, removed)
+
+        calls = []
+        fruit = List("fruit", ["apple"])
+        colour = List("colour", ["red"])
+        grammar = Grammar("test")
+        grammar.add_rule(MappingRule(
+            name="rule",
+            mapping={"<colour> <fruit>": Function(
+                lambda colour, fruit: calls.append((colour, fruit))
+            )},
+            extras=[ListRef("fruit", fruit), ListRef("colour", colour)]
+        ))
+        grammar.load()
+        self.engine.update_list_delta = record_delta
+        self.engine.defer_list_updates = True
+        self.engine.list_update_delay = None
+        try:
+            fruit.append("banana")
+            colour.append("green")
+            fruit.append("cherry")
+            fruit.remove("apple")
+            self.assertEqual(deltas, [])
+
+            self.engine.mimic("green cherry")
+            self.assertEqual(calls, [("green", "cherry")])
+            self.assertEqual(deltas, [
+                ("fruit", ["banana", "cherry"], ["apple"]),
+                ("colour", ["green"], []),
+            ])
+
+            # Changes can also be applied manually.
+            colour.remove("red")
+            self.engine.apply_list_updates()
+            self.assertEqual(deltas[-1], ("colour", [], ["red"]))
+            self.assertRaises(MimicFailure, self.engine.mimic, "red banana")
+
+            # Invalid items should still be rejected immediately.
+            self.assertRaises(TypeError, fruit.append, 1)
+            fruit.pop()
+
+            # Loading a grammar updates its lists immediately.
+            self.engine.apply_list_updates()
+            grammar.unload()
+            grammar.load()
+            self.assertFalse(self.engine._pending_lists)
+            self.engine.mimic("green banana")
+        finally:
+            del self.engine.update_list_delta
+            del self.engine.defer_list_updates
+            del self.engine.list_update_delay
+            grammar.unload()
+
+    def test_intern_elements(self):
+        """ Verify that grammars with interned elements work as before. """
+        calls = []
+        grammar = Grammar("g1")
+        grammar.intern_elements = True
+        for name in ("r1", "r2"):
+            grammar.add_rule(MappingRule(name=name, mapping={
+                "%s <text> [please]" % name: Function(
+                    lambda text, name=name: calls.append((name, str(text))))
+            }, extras=[Dictation("text")]))
+        grammar.load()
+        try:
+            sequence1, sequence2 = [rule.element.children[0].children[0]
+                                    for rule in grammar.rules]
+            self.assertIs(sequence1.children[2], sequence2.children[2])
+            self.engine.mimic("r2 HELLO WORLD please")
+            self.assertEqual(calls, [("r2", "hello world")])
+        finally:
+            grammar.unload()
+
+    def test_rule_extras(self):
+        """ Verify the extras passed to actions of mapping and compound
+            rules. """
+        calls = []
+        values = []
+
+        def record(value):
+            values.append(value)
+            return value
+
+        def function(**extras):
+            calls.append(extras)
+
+        extras = [IntegerRef("n", 1, 10, default=5),
+                  Modifier(IntegerRef("m", 1, 10), record),
+                  Dictation("text")]
+        grammar = Grammar("g1")
+        grammar.add_rule(MappingRule(name="r1", mapping={
+            "go [<n>] [<m>]": Function(function),
+            "say <text>": Function(function),
+        }, extras=extras, defaults={"n": 1, "m": 2}))
+        grammar.add_rule(CompoundRule(name="r2", spec="jump [<n>] <m>",
+                                      extras=extras, defaults={"m": 3}))
+        grammar.rules[1]._process_recognition = \
+            lambda node, extras: calls.append(extras)
+        grammar.load()
+        try:
+            # Spoken extras override element defaults, which override
+            #  rule defaults.  Values are only computed once.
+            self.engine.mimic("go three")
+            self.engine.mimic("go four seven")
+            self.assertEqual([(e["n"], e["m"]) for e in calls],
+                             [(3, 2), (4, 7)])
+            self.assertEqual(values, [7])
+            self.assertNotIn("text", calls[0])
+            self.assertIs(calls[0]["_rule"], grammar.rules[0])
+            self.assertIs(calls[0]["_node"].actor,
+                          grammar.rules[0].element)
+
+            self.engine.mimic("say HELLO")
+            self.assertEqual(str(calls[-1]["text"]), "hello")
+            self.assertEqual(calls[-1]["n"], 5)
+
+            self.engine.mimic("jump eight")
+            self.assertEqual((calls[-1]["n"], calls[-1]["m"]), (5, 8))
+            self.assertIs(calls[-1]["_node"].actor, grammar.rules[1])
+        finally:
+            grammar.unload()
+
+    def test_mimic_n_best(self):
+        """ Verify that mimic() can return several decodings. """
+        calls = []
+        grammar1 = Grammar("g1")
+        grammar1.add_rule(MappingRule(name="r1", mapping={
+            "go [left] [left]": Function(lambda: calls.append("r1"))
+        }))
+        grammar2 = Grammar("g2")
+        grammar2.add_rule(MappingRule(name="r2", mapping={
+            "go left": Function(lambda: calls.append("r2"))
+        }))
+        grammar1.load()
+        grammar2.load()
+        try:
+            decodings = self.engine.mimic("go left", n_best=5)
+            self.assertEqual([rule.name for rule, _ in decodings],
+                             ["r1", "r1", "r2"])
+            self.assertEqual(decodings[0][1].words(), ["go", "left"])
+            self.assertEqual(calls, ["r1"])
+
+            # The number of decodings is limited.
+            decodings = self.engine.mimic("go left", n_best=1)
+            self.assertEqual(len(decodings), 1)
+            self.assertEqual(self.engine.mimic("go left"), None)
+
+            # Rules can also be decoded directly.
+            rule = grammar1.rules[0]
+            self.assertEqual(len(rule.decode_all("go left".split())), 2)
+            self.assertEqual(len(rule.decode_all("go left".split(),
+                                                 limit=1)), 1)
+            self.assertEqual(rule.decode_all("go right".split()), [])
+
+            # Compiled and generator-based decoding count steps in the
+            #  same way.  The third match of the rule does not consume
+            #  all of the words.
+            words = "go left".split()
+            for max_steps, expected in ((1, 1), (2, 2), (3, 2), (0, 0)):
+                results = []
+                for compiled in (True, False):
+                    rule.compiled_decoding = compiled
+                    results.append([node.words() for node in
+                                    rule.decode_all(words, None,
+                                                    max_steps)])
+                self.assertEqual(results[0], results[1])
+                self.assertEqual(len(results[0]), expected)
+        finally:
+            grammar1.rules[0].compiled_decoding = True
+            grammar1.unload()
+            grammar2.unload()
+
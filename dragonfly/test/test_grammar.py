@@ -0,0 +1,76 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+import gc
+import unittest
+
+from dragonfly import (Rule, Sequence, Literal, Integer, IntegerRef,
+                       Grammar)
+from dragonfly.language.base import integer
+
+
+#===========================================================================
+
+class TestGrammarRules(unittest.TestCase):
+    """ Tests of rules shared between grammars. """
+
+    def test_shared_integer_rule_grammars(self):
+        # Shared private rules stay with the first grammar which contains
+        #  them.
+        shared = IntegerRef("n", 1, 100).rule
+        grammars = [Grammar("g%d" % i) for i in range(2)]
+        for grammar in grammars:
+            grammar.add_rule(Rule("r", Sequence([Literal("go"),
+                                                 IntegerRef("n", 1, 100)]),
+                                  exported=True))
+            grammar.add_all_dependencies()
+        self.assertIs(shared.grammar, grammars[0])
+        grammars[1].remove_rule(shared)
+        self.assertIs(shared.grammar, grammars[0])
+        grammars[1].add_all_dependencies()
+        grammars[0].remove_rule(shared)
+        self.assertIs(shared.grammar, None)
+        grammars[1].add_all_dependencies()
+        self.assertIs(shared.grammar, grammars[1])
+
+        # The grammars can be loaded and unloaded in any order.
+        try:
+            for grammar in grammars + grammars[::-1]:
+                grammar.load()
+                if grammar is grammars[1]:
+                    grammar.unload()
+            self.assertTrue(grammars[0].loaded)
+        finally:
+            for grammar in grammars:
+                grammar.unload()
+
+        # Rules are not kept after all references to them are gone.
+        key = (Integer._content, 1, 77)
+        ref = IntegerRef("n", 1, 77)
+        self.assertIs(integer._integer_rules[key], ref.rule)
+        del ref
+        gc.collect()
+        self.assertNotIn(key, integer._integer_rules)
+
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+#
+# This file is part of Dragonfly.
+# (c) Copyright 2007, 2008 by Christo Butcher
+# Licensed under the LGPL.
+#
+#   Dragonfly is free software: you can redistribute it and/or modify it
+#   under the terms of the GNU Lesser General Public License as published
+#   by the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   Dragonfly is distributed in the hope that it will be useful, but
+#   WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   Lesser General Public License for more details.
+#
+#   You should have received a copy of the GNU Lesser General Public
+#   License along with Dragonfly.  If not, see
+#   <http://www.gnu.org/licenses/>.
+#
+
+import unittest
+
+from dragonfly import (Rule, Sequence, Alternative, Optional, Repetition,
+                       Literal, ListRef, List, Dictation, Compound,
+                       IntegerRef, Grammar, get_engine)
+from dragonfly.grammar.state import State
+from dragonfly.grammar.interning import (ElementInterner,
+                                         intern_rule_elements)
+
+
+#===========================================================================
+
+class CustomLiteral(Literal):
+    """ Literal element with a custom decode() method. """
+
+    def decode(self, state):
+        for result in Literal.decode(self, state):
+            yield result
+
+
+class TestElementInterning(unittest.TestCase):
+    """ Tests for sharing identical element subtrees. """
+
+    def setUp(self):
+        self.engine = get_engine()
+
+    def test_interner(self):
+        interner = ElementInterner()
+        first = Sequence([Literal("go"), Optional(Literal("left"))])
+        second = Sequence([Literal("go"), Optional(Literal("left"))])
+        self.assertIs(interner.intern(first), first)
+        self.assertIs(interner.intern(second), first)
+
+        # Names, values and other attributes are kept where they differ.
+        for element in [Sequence([Literal("go")], name="x"),
+                        Literal("go", value=1), Literal("go", value=1.0),
+                        Optional(Literal("left"), default=2),
+                        Repetition(Literal("go"), 1, 3),
+                        Dictation()]:
+            self.assertIs(interner.intern(element), element)
+        self.assertIs(interner.intern(Literal("go", value=1.0)).value(None),
+                      1.0)
+
+        # Elements of derived classes are not replaced, but their
+        #  children are.
+        custom = Alternative([CustomLiteral("go"), Literal("go")])
+        self.assertIs(interner.intern(custom), custom)
+        self.assertIsNot(custom.children[0], first.children[0])
+        self.assertIs(custom.children[1], first.children[0])
+
+    def test_extra_attributes(self):
+        # Elements can have attributes other than their slots, e.g. set by
+        #  compound spec specials.  Weights are kept apart by interning.
+        weighted = Compound("(go {weight=2}) left").children[0]
+        self.assertEqual(weighted.children[0].weight, 2.0)
+        self.assertFalse(hasattr(Literal("go"), "weight"))
+        interner = ElementInterner()
+        first = interner.intern(Sequence([Literal("go"), Literal("left")]))
+        self.assertIsNot(interner.intern(weighted.children[0]),
+                         first.children[0])
+
+        # Derived classes without slots can add any attributes.
+        custom = CustomLiteral("go")
+        custom.weight = 3
+        self.assertEqual(custom.weight, 3)
+
+    def test_rule_elements(self):
+        lst = List("lst", ["up", "down"])
+        rules = [Rule("r%d" % i, Compound("go <n> [<dir>] [please]",
+                                          extras=[IntegerRef("n", 1, 10),
+                                                  ListRef("dir", lst)]))
+                 for i in range(3)]
+        rules.append(Rule("other", Compound("go <n> [please]", extras=[
+            IntegerRef("n", 1, 10)], value="other")))
+
+        # The rules have 30 elements: three identical trees of 8 elements
+        #  and one tree of 6 elements, 4 of which are in the others.
+        self.assertEqual(intern_rule_elements(rules), 20)
+        self.assertIs(rules[0].element, rules[2].element)
+        self.assertIsNot(rules[0].element, rules[3].element)
+        self.assertIs(rules[0].element.children[0].children[0],
+                      rules[3].element.children[0].children[0])
+        self.assertEqual(intern_rule_elements(rules), 0)
+
+        # Decoding gives the same results with interned elements.
+        state = State([(w, 0) for w in "go five down please".split()],
+                      ("r1",), self.engine)
+        self.assertTrue(rules[1].decode_complete(state))
+        node = state.build_parse_tree()
+        self.assertEqual(node.get_child_by_name("n").value(), 5)
+        self.assertEqual(node.get_child_by_name("dir").value(), "down")
+
+
+    def test_integer_values(self):
+        # Integer elements parse their words directly, finding extras in
+        #  their trees by identity.  Interned grammars should still give
+        #  the same values.
+        grammar = Grammar("test")
+        grammar.intern_elements = True
+        rule = Rule("r", Compound("go <n>", extras=[
+            IntegerRef("n", 1, 10000)]), exported=True)
+        grammar.add_rule(rule)
+        try:
+            grammar.load()
+            for words, value in [("three thousand four hundred twelve",
+                                  3412),
+                                 ("two thousand five", 2005),
+                                 ("nine hundred ninety nine", 999)]:
+                state = State([(w, 0) for w in ("go " + words).split()],
+                              ("r",), self.engine)
+                self.assertTrue(rule.decode_complete(state))
+                node = state.build_parse_tree()
+                self.assertEqual(node.get_child_by_name("n").value(), value)
+        finally:
+            grammar.unload()
+
+#===========================================================================
+
+if __name__ == "__main__":
+    unittest.main()
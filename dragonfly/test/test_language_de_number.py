@@ -25,7 +25,8 @@ Test suite for German language Integer and Digits classes
 """
 
 from dragonfly.test.infrastructure      import RecognitionFailure
-from dragonfly.test.element_testcase    import ElementTestCase
+from dragonfly.test.element_testcase    import (ElementTestCase,
+                                                IntegerParserTestCase)
 from dragonfly.language.base.integer    import Integer
 from dragonfly.language.de.number       import IntegerContent
 
@@ -71,3 +72,40 @@ class GermanIntegerTestCase(ElementTestCase):
                     ("ein hundert",                    100),
                     ("ein hundert drei und zwanzig",   123),
                    ]
+
+
+#---------------------------------------------------------------------------
+
+_ones = ["null", "ein", "zwei", "drei", "vier", "fuenf", "sechs", "sieben",
+         "acht", "neun", "zehn", "elf", "zwoelf", "dreizehn", "vierzehn",
+         "fuenfzehn", "sechzehn", "siebzehn", "achtzehn", "neunzehn"]
+_tens = ["", "", "zwanzig", "dreissig", "vierzig", "fuenfzig", "sechzig",
+         "siebzig", "achtzig", "neunzig"]
+
+def _german_words(number):
+    # Return the German words of a number below 10**7, using "ein" for
+    #  one except when it is said on its own.
+    if number < 20:
+        return _ones[number]
+    elif number < 100:
+        words = _tens[number // 10]
+        if number % 10:
+            words = "%s und %s" % (_ones[number % 10], words)
+        return words
+    for factor, word in ((10**6, "million"), (1000, "tausend"),
+                         (100, "hundert")):
+        if number >= factor:
+            words = "%s %s" % (_german_words(number // factor), word)
+            if number % factor:
+                words += " " + _german_words(number % factor)
+            return words
+
+
+class GermanIntegerParserTestCase(IntegerParserTestCase):
+    """ Verify the German integer parser between 0 and 10**6. """
+    _content = IntegerContent
+
+    def _number_words(self, number):
+        if number == 1:
+            return "eins"
+        return _german_words(number)
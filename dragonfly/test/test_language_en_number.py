@@ -24,9 +24,16 @@ Test suite for English language Integer and Digits classes
 
 """
 
+import unittest
+
 from dragonfly.test.infrastructure      import RecognitionFailure
-from dragonfly.test.element_testcase    import ElementTestCase
+from dragonfly.test.element_testcase    import (ElementTestCase,
+                                                IntegerParserTestCase)
 from dragonfly.language.base.integer    import Integer
+from dragonfly.grammar.elements         import Compound, Sequence
+from dragonfly.grammar.rule_base        import Rule
+from dragonfly.grammar.state            import State
+from dragonfly.engines                  import get_engine
 
 
 #---------------------------------------------------------------------------
@@ -194,3 +201,98 @@ class ShortIntegerTestCase(ElementTestCase):
                     ("two hundred and thirty four thousand five hundred sixty seven", 234567),
                     ("five million two hundred and thirty four thousand five hundred sixty seven", 5234567),
                    ]
+
+
+class IntegerSequenceTestCase(ElementTestCase):
+    """ Verify which integers consecutive number words are split into. """
+    def _build_element(self):
+        from dragonfly.language.en.number       import IntegerContent
+        from dragonfly.language.en.short_number import ShortIntegerContent
+        def value_func(node, extras):
+            return tuple(extras.get(name) for name in ("n", "m", "k"))
+        return Compound("go <n> [<m>] [<k>]", extras=[
+            Integer("n", content=IntegerContent, min=0, max=1000000),
+            Integer("m", content=IntegerContent, min=0, max=100),
+            Integer("k", content=ShortIntegerContent, min=0, max=1000),
+        ], value_func=value_func)
+    input_output = [
+                    ("go one hundred",              (1, None, 100)),
+                    ("go one hundred five",         (1, None, 105)),
+                    ("go two hundred twenty",       (2, None, 120)),
+                    ("go one thousand two hundred", (1002, None, 100)),
+                    ("go twenty five",              (25, None, None)),
+                    ("go three thousand",           (3000, None, None)),
+                   ]
+
+
+class SharedIntegerRuleTestCase(unittest.TestCase):
+    """ Verify that integer references share their private rules. """
+    def setUp(self):
+        self.engine = get_engine()
+
+    def test_shared_integer_rules(self):
+        # Integer references with the same range share a private rule.
+        from dragonfly.language import IntegerRef
+        first, second = IntegerRef("a", 1, 100), IntegerRef("b", 1, 100)
+        other = IntegerRef("c", 1, 50)
+        self.assertIs(first.rule, second.rule)
+        self.assertIsNot(first.rule, other.rule)
+        self.assertEqual(Integer(None, 1, 100).children,
+                         first.rule.element.children)
+        self.assertNotEqual(Integer(None, 1, 50).children,
+                            first.rule.element.children)
+
+        # Each reference keeps its own name and decodes to its own value.
+        rule = Rule("test", Sequence([first, second, other]))
+        state = State([(w, 0) for w in "five ninety nine seven".split()],
+                      ("test",), self.engine)
+        self.assertTrue(rule.decode_complete(state))
+        node = state.build_parse_tree()
+        self.assertEqual([node.get_child_by_name(n, shallow=True).value()
+                          for n in "abc"], [5, 99, 7])
+
+        try:
+            IntegerRef.share_rules = False
+            self.assertIsNot(IntegerRef("d", 1, 100).rule, first.rule)
+        finally:
+            IntegerRef.share_rules = True
+
+
+#---------------------------------------------------------------------------
+
+_ones = ["zero", "one", "two", "three", "four", "five", "six", "seven",
+         "eight", "nine", "ten", "eleven", "twelve", "thirteen", "fourteen",
+         "fifteen", "sixteen", "seventeen", "eighteen", "nineteen"]
+_tens = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy",
+         "eighty", "ninety"]
+
+def _english_words(number, conjunction=False):
+    # Return the English words of a number below 10**7, saying "and"
+    #  before remainders below one hundred if *conjunction* is true.
+    if number < 20:
+        return _ones[number]
+    elif number < 100:
+        words = _tens[number // 10]
+        if number % 10:
+            words += " " + _ones[number % 10]
+        return words
+    for factor, word in ((10**6, "million"), (1000, "thousand"),
+                         (100, "hundred")):
+        if number >= factor:
+            words = "%s %s" % (_english_words(number // factor), word)
+            remainder = number % factor
+            if remainder and remainder < 100 and conjunction:
+                words += " and"
+            if remainder:
+                words += " " + _english_words(remainder, conjunction)
+            return words
+
+
+class EnglishIntegerParserTestCase(IntegerParserTestCase):
+    """ Verify the English integer parser between 0 and 10**6. """
+    def _get_content(self):
+        from dragonfly.language.en.number       import IntegerContent
+        return IntegerContent
+
+    def _number_words(self, number):
+        return _english_words(number, number % 2 == 1)
@@ -25,7 +25,8 @@ Test suite for Dutch language Integer and Digits classes
 """
 
 from dragonfly.test.infrastructure      import RecognitionFailure
-from dragonfly.test.element_testcase    import ElementTestCase
+from dragonfly.test.element_testcase    import (ElementTestCase,
+                                                IntegerParserTestCase)
 from dragonfly.language.base.integer    import Integer
 from dragonfly.language.nl.number       import IntegerContent
 
@@ -55,3 +56,41 @@ class DutchIntegerTestCase(ElementTestCase):
                     ("zeven honderd negen en tachtig",            789),
                     ("vier en dertig honderd zes en vijftig",    3456),
                    ]
+
+
+#---------------------------------------------------------------------------
+
+_ones = ["nul", "1", "twee", "drie", "vier", "vijf", "zes", "zeven", "acht",
+         "negen", "tien", "elf", "twaalf", "dertien", "veertien",
+         "vijftien", "zestien", "zeventien", "achtien", "negentien"]
+_tens = ["", "", "twintig", "dertig", "veertig", "vijftig", "zestig",
+         "zeventig", "tachtig", "negentig"]
+
+def _dutch_words(number, conjunction=False):
+    # Return the Dutch words of a number below 10**7, saying "en" before
+    #  remainders below one hundred if *conjunction* is true.
+    if number < 20:
+        return _ones[number]
+    elif number < 100:
+        words = _tens[number // 10]
+        if number % 10:
+            words = "%s en %s" % (_ones[number % 10], words)
+        return words
+    for factor, word in ((10**6, "millioen"), (1000, "duizend"),
+                         (100, "honderd")):
+        if number >= factor:
+            words = "%s %s" % (_dutch_words(number // factor), word)
+            remainder = number % factor
+            if remainder and remainder < 100 and conjunction:
+                words += " en"
+            if remainder:
+                words += " " + _dutch_words(remainder, conjunction)
+            return words
+
+
+class DutchIntegerParserTestCase(IntegerParserTestCase):
+    """ Verify the Dutch integer parser between 0 and 10**6. """
+    _content = IntegerContent
+
+    def _number_words(self, number):
+        return _dutch_words(number, number % 2 == 1)
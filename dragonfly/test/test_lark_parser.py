@@ -3,7 +3,15 @@
 import unittest
 import string
 
-from dragonfly.parsing.parse import spec_parser, CompoundTransformer
+import json
+import marshal
+import os
+import shutil
+import tempfile
+
+from dragonfly.parsing import parse
+from dragonfly.parsing.parse import (spec_parser, CompoundTransformer,
+                                     SpecCache)
 from dragonfly import Compound, Literal, Sequence, Optional, Empty, Alternative
 
 # ===========================================================================
@@ -113,6 +121,101 @@ class TestLarkParser(unittest.TestCase):
         assert getattr(output.children[2], 'test_special', None) == None
 
 
+class TestSerializedParser(unittest.TestCase):
+    def test_serialized_parser_up_to_date(self):
+        # The shipped parser must be regenerated if the grammar changes.
+        with open(parse.parser_path, "rb") as f:
+            saved = marshal.load(f)
+        assert saved["grammar_hash"] == parse._get_grammar_hash()
+
+    def test_fallback(self):
+        path = os.path.join(parse.dir_path, "nonexistent.pickle")
+        parser = parse.load_spec_parser(path)
+        tree = parser.parse("test <an_extra> [op]")
+        output = CompoundTransformer(extras).transform(tree)
+        assert output.children[1] is extras["an_extra"]
+
+
+class TestSpecCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SpecCache(max_size=2)
+        self.original_cache = Compound._spec_cache
+        Compound._spec_cache = self.cache
+
+    def tearDown(self):
+        Compound._spec_cache = self.original_cache
+
+    def test_shared_trees(self):
+        extra = Literal(u"x", name="x")
+        c1 = Compound("test <x> [op]", extras=[extra])
+        c2 = Compound("test <x> [op]", extras=[extra], value=2)
+        assert (self.cache.hits, self.cache.misses) == (1, 1)
+
+        # Each compound builds its own element structure from the cached
+        #  parse tree.
+        assert c1.children[0] is not c2.children[0]
+        assert c2.children[0].children[1] is extra
+        other = Literal(u"y", name="x")
+        c3 = Compound("test <x> [op]", extras=[other])
+        assert c3.children[0].children[1] is other
+        assert (self.cache.hits, self.cache.misses) == (2, 1)
+
+    def test_lru_eviction(self):
+        for spec in ["a", "b", "a", "c", "a", "b"]:
+            Compound(spec)
+        assert (self.cache.hits, self.cache.misses) == (2, 4)
+        self.cache.max_size = 0
+        self.cache.clear()
+        Compound("a")
+        Compound("a")
+        assert self.cache.misses == 6
+
+    def test_snapshot(self):
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        path = os.path.join(tempdir, "specs.snapshot")
+        self.cache.max_size = 10
+        x = Literal(u"x", name="x")
+
+        # Only specs used while recording are saved.
+        Compound("unrecorded")
+        recording = self.cache.start_recording()
+        Compound("test <x> [op]", extras=[x])
+        Compound("(a | b) c")
+        self.cache.stop_recording(recording)
+        Compound("also unrecorded")
+        assert sorted(key[1] for key in recording) == ["(a | b) c",
+                                                      "test <x> [op]"]
+        self.cache.save_snapshot(path, recording, tag="tag")
+
+        # Loaded specs are not parsed again.
+        cache = SpecCache()
+        Compound._spec_cache = cache
+        assert cache.load_snapshot(path) == "tag"
+        c1 = Compound("test <x> [op]", extras=[x])
+        c2 = Compound("(a | b) c")
+        assert (cache.hits, cache.misses) == (2, 0)
+        assert c1.references == ("x",)
+        expected = Sequence([Literal(u"test"), x, Optional(Literal(u"op"))])
+        assert (c1.children[0].element_tree_string()
+                == expected.element_tree_string())
+        assert c2.gstring() == "(((a | b) c))"
+
+        # Snapshots of another spec grammar are not loaded.
+        with open(path) as f:
+            saved = json.load(f)
+        with open(path, "w") as f:
+            json.dump(dict(saved, grammar_hash="other"), f)
+        assert SpecCache().load_snapshot(path) is None
+
+        # Neither are snapshots with malformed parse trees.
+        saved["trees"]["(a | b) c"] = ["sequence", [0]]
+        with open(path, "w") as f:
+            json.dump(saved, f)
+        assert SpecCache().load_snapshot(path) is None
+        assert SpecCache().load_snapshot(path + ".missing") is None
+
+
 # ===========================================================================
 
 if __name__ == "__main__":